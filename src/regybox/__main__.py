@@ -20,11 +20,25 @@ Raises:
 
 import argparse
 import json
+import signal
 import sys
+import threading
+from pathlib import Path
+from types import FrameType
 
+from regybox.batch import BatchResult, BatchTarget, parse_batch_targets
+from regybox.batch import run_batch as run_batch_targets
 from regybox.common import LOGGER
 from regybox.exceptions import REGYBOX_USER_ERROR_PREFIX, RegyboxBaseError
-from regybox.regybox import OperationOptions, list_classes, main
+from regybox.regybox import (
+    LIST_FORMATS,
+    OperationOptions,
+    list_classes,
+    main,
+    parse_class_slots,
+)
+from regybox.scheduler import Scheduler, serve
+from regybox.watch import WATCH_BUDGET
 
 
 def _log_user_error(error: RegyboxBaseError) -> None:
@@ -35,15 +49,8 @@ def _log_user_error(error: RegyboxBaseError) -> None:
     )
 
 
-def run() -> None:
-    """Run the Regybox enrollment application."""
-    parser = argparse.ArgumentParser(
-        prog="regybox",
-        description="Enroll in a Regybox class.",
-    )
-    parser.add_argument("class_date", help="Class date in YYYY-MM-DD format.")
-    parser.add_argument("class_time", help="Class start time in HH:MM format.")
-    parser.add_argument("class_type", help="Class type name.")
+def _add_operation_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add the options shared by the commands that operate on classes."""
     parser.add_argument(
         "--calendar-event-name",
         default=None,
@@ -66,10 +73,100 @@ def run() -> None:
         action="store_true",
         help="Return a no-op result instead of failing when enrollment is not open yet.",
     )
-    args = parser.parse_args()
+    parser.add_argument(
+        "--fire-at-open",
+        action="store_true",
+        help=(
+            "Sleep until the predicted opening time and enroll as soon as the class opens,"
+            " fetching only the requested class slot."
+        ),
+    )
+    parser.add_argument(
+        "--hedge-requests",
+        action="store_true",
+        help=(
+            "Send a second class fetch when one is slow close to the opening time, using the"
+            " first response. The enrollment request is never duplicated."
+        ),
+    )
+    parser.add_argument(
+        "--fallback-slots",
+        type=parse_class_slots,
+        default=(),
+        metavar="SLOTS",
+        help=(
+            "Comma-separated 'HH:MM CLASS_TYPE' slots to enroll in, in order, when the"
+            " requested class is overbooked."
+        ),
+    )
+    parser.add_argument(
+        "--watch-waitlist",
+        action="store_true",
+        help=(
+            "When the class is overbooked, keep watching it until it starts and enroll as soon"
+            " as a spot frees up. When only the waitlist is left, watch until Regybox moves you"
+            " into the class."
+        ),
+    )
+    parser.add_argument(
+        "--watch-budget",
+        type=int,
+        default=WATCH_BUDGET,
+        help=(
+            f"Maximum number of class fetches while watching a class. Defaults to {WATCH_BUDGET}."
+        ),
+    )
+    parser.add_argument(
+        "--max-fetches",
+        type=int,
+        default=None,
+        help="Maximum number of class fetches while waiting for enrollment to open.",
+    )
+
+
+def _validate_operation_arguments(args: argparse.Namespace) -> None:
+    """Exit with an error if the shared operation options are invalid."""
     if args.timeout_seconds <= 0:
         LOGGER.error("timeout-seconds must be a positive integer.")
         sys.exit(1)
+    if args.max_fetches is not None and args.max_fetches <= 0:
+        LOGGER.error("max-fetches must be a positive integer.")
+        sys.exit(1)
+    if args.watch_budget <= 0:
+        LOGGER.error("watch-budget must be a positive integer.")
+        sys.exit(1)
+
+
+def _operation_options(args: argparse.Namespace) -> OperationOptions:
+    """Build the operation options from the shared command-line options.
+
+    Returns:
+        The operation options.
+    """
+    return OperationOptions(
+        operation=args.operation,
+        not_open_is_noop=args.not_open_is_noop,
+        fire_at_open=args.fire_at_open,
+        max_fetches=args.max_fetches,
+        hedge_requests=args.hedge_requests,
+        fallback_slots=args.fallback_slots,
+        watch_waitlist=args.watch_waitlist,
+        watch_budget=args.watch_budget,
+    )
+
+
+def run() -> None:
+    """Run the Regybox enrollment application."""
+    parser = argparse.ArgumentParser(
+        prog="regybox",
+        description="Enroll in a Regybox class.",
+    )
+    parser.add_argument("class_date", help="Class date in YYYY-MM-DD format.")
+    parser.add_argument("class_time", help="Class start time in HH:MM format.")
+    parser.add_argument("class_type", help="Class type name.")
+    _add_operation_arguments(parser)
+    args = parser.parse_args()
+    _validate_operation_arguments(args)
     try:
         main(
             class_date=args.class_date,
@@ -77,10 +174,7 @@ def run() -> None:
             class_type=args.class_type,
             event_name=args.calendar_event_name,
             timeout=args.timeout_seconds,
-            operation_options=OperationOptions(
-                operation=args.operation,
-                not_open_is_noop=args.not_open_is_noop,
-            ),
+            operation_options=_operation_options(args),
         )
     except RegyboxBaseError as e:
         _log_user_error(e)
@@ -89,20 +183,121 @@ def run() -> None:
 
 def run_list() -> None:
     """Run the list classes command."""
-    try:
-        class_date = sys.argv[1]
-    except IndexError:
-        LOGGER.error("Usage: uv run list <class_date>")
+    parser = argparse.ArgumentParser(
+        prog="list",
+        description="List the Regybox classes for a date or a range of dates.",
+    )
+    parser.add_argument("class_date", nargs="?", help="Class date in YYYY-MM-DD format.")
+    parser.add_argument(
+        "--range",
+        dest="end_date",
+        default=None,
+        metavar="END_DATE",
+        help="Last date of a range of dates to list, in YYYY-MM-DD format.",
+    )
+    parser.add_argument(
+        "--format",
+        dest="output_format",
+        choices=LIST_FORMATS,
+        default="table",
+        help="Output format. Defaults to table.",
+    )
+    args = parser.parse_args()
+    if args.class_date is None:
+        LOGGER.error("Usage: uv run list <class_date> [--range <end_date>] [--format <format>]")
         sys.exit(1)
     try:
-        list_classes(class_date=class_date)
+        list_classes(
+            class_date=args.class_date, end_date=args.end_date, output_format=args.output_format
+        )
     except RegyboxBaseError as e:
         _log_user_error(e)
         sys.exit(1)
     except ValueError as e:
-        LOGGER.error(f"Invalid date format. Expected YYYY-MM-DD: {e}")
+        LOGGER.error(f"Invalid date or date range. Expected YYYY-MM-DD: {e}")
         sys.exit(1)
 
 
+def run_batch() -> None:
+    """Run the same operation on many classes in one process."""
+    parser = argparse.ArgumentParser(
+        prog="batch",
+        description=(
+            "Operate on many Regybox classes concurrently, sharing one session and calendar."
+            " Each line of the targets file is 'YYYY-MM-DD HH:MM CLASS_TYPE'."
+        ),
+    )
+    parser.add_argument(
+        "targets_file",
+        help="File with one target per line, or - to read them from standard input.",
+    )
+    _add_operation_arguments(parser)
+    args = parser.parse_args()
+    _validate_operation_arguments(args)
+    try:
+        lines: list[str] = (
+            sys.stdin.readlines()
+            if args.targets_file == "-"
+            else Path(args.targets_file).read_text(encoding="utf-8").splitlines()
+        )
+        targets: list[BatchTarget] = parse_batch_targets(lines)
+    except (OSError, ValueError) as e:
+        LOGGER.error(f"Invalid targets file: {e}")
+        sys.exit(1)
+    results: list[BatchResult] = run_batch_targets(
+        targets,
+        event_name=args.calendar_event_name,
+        timeout=args.timeout_seconds,
+        operation_options=_operation_options(args),
+    )
+    failed: bool = False
+    for result in results:
+        target: BatchTarget = result.target
+        if result.error is not None:
+            failed = True
+            if isinstance(result.error, RegyboxBaseError):
+                _log_user_error(result.error)
+        elif result.result is not None:
+            LOGGER.info(
+                f"{target.class_date} at {target.class_time}: {result.result.operation}"
+                f" {result.result.class_type} {result.result.status}"
+            )
+    if failed:
+        sys.exit(1)
+
+
+def run_serve() -> None:
+    """Run the scheduler daemon until it is interrupted or terminated."""
+    parser = argparse.ArgumentParser(
+        prog="serve",
+        description=(
+            "Keep running and operate on each Regybox class shortly before its enrollment"
+            " opens. Each line of the targets file is 'YYYY-MM-DD HH:MM CLASS_TYPE'; the file"
+            " is read again when it changes."
+        ),
+    )
+    parser.add_argument("targets_file", type=Path, help="File with one target per line.")
+    _add_operation_arguments(parser)
+    args = parser.parse_args()
+    _validate_operation_arguments(args)
+    stop = threading.Event()
+
+    def handle_sigterm(signum: int, frame: FrameType | None) -> None:
+        del signum, frame
+        stop.set()
+
+    signal.signal(signal.SIGTERM, handle_sigterm)
+    scheduler = Scheduler(
+        event_name=args.calendar_event_name,
+        timeout=args.timeout_seconds,
+        operation_options=_operation_options(args),
+    )
+    LOGGER.info(f"Serving the targets of {args.targets_file}")
+    try:
+        serve(args.targets_file, scheduler, stop=stop)
+    except KeyboardInterrupt:
+        LOGGER.info("Stopped serving")
+
+
 if __name__ == "__main__":
     run()
@@ -0,0 +1,269 @@
+"""Run many class operations in one process.
+
+The run_batch function runs the operations of several targets concurrently,
+sharing the Regybox session, the calendar and the classes page of each date.
+"""
+
+import contextvars
+import datetime
+import functools
+import itertools
+from collections.abc import Iterable
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+
+from regybox.classes import sharing_classes_pages
+from regybox.common import LOGGER
+from regybox.regybox import (
+    DEFAULT_CALENDAR_EVENT_NAME,
+    ClassSlot,
+    OperationOptions,
+    OperationResult,
+    enroll_many,
+    main,
+)
+
+BATCH_MAX_WORKERS: int = 16
+BATCH_SHARED_PAGE_SECONDS: float = 0.2
+
+
+@dataclass(frozen=True)
+class BatchTarget:
+    """A class to operate on as part of a batch.
+
+    Attributes:
+        class_date: The date of the class in the format 'YYYY-MM-DD'.
+        class_time: The start time of the class in the format 'HH:MM'.
+        class_type: The class type, with optional comma-separated fallbacks.
+    """
+
+    class_date: str
+    class_time: str
+    class_type: str
+
+
+@dataclass(frozen=True)
+class BatchResult:
+    """The outcome of the operation on one batch target.
+
+    Exactly one of `result` and `error` is set.
+    """
+
+    target: BatchTarget
+    result: OperationResult | None = None
+    error: Exception | None = None
+
+
+def parse_batch_targets(lines: Iterable[str]) -> list[BatchTarget]:
+    """Parse batch targets, one per line.
+
+    A target is written as ``YYYY-MM-DD HH:MM CLASS_TYPE``, see
+    `parse_class_types`. Blank lines and lines starting with ``#`` are ignored.
+
+    Args:
+        lines: The lines to parse.
+
+    Returns:
+        The targets, in the order of the lines.
+
+    Raises:
+        ValueError: If a line is not a valid target.
+    """
+    targets: list[BatchTarget] = []
+    for number, line in enumerate(lines, start=1):
+        stripped: str = line.strip()
+        if not stripped or stripped.startswith("#"):
+            continue
+        parts: list[str] = stripped.split(maxsplit=2)
+        if len(parts) != 3:  # noqa: PLR2004
+            raise ValueError(f"Line {number} is not 'YYYY-MM-DD HH:MM CLASS_TYPE': {stripped!r}")
+        class_date, class_time, class_type = parts
+        try:
+            datetime.date.fromisoformat(class_date)
+            datetime.time.fromisoformat(class_time.zfill(5))
+        except ValueError as e:
+            raise ValueError(f"Line {number} has an invalid date or time: {e}") from e
+        targets.append(BatchTarget(class_date, class_time.zfill(5), class_type))
+    return targets
+
+
+def run_target(
+    target: BatchTarget,
+    *,
+    event_name: str | None = DEFAULT_CALENDAR_EVENT_NAME,
+    check_calendar: bool = True,
+    timeout: int = 900,
+    operation_options: OperationOptions | None = None,
+) -> BatchResult:
+    """Run the operation on one target, catching the error it fails with.
+
+    Args:
+        target: The class to operate on.
+        event_name: The calendar event name to match.
+        check_calendar: Whether to check the calendar.
+        timeout: Maximum number of seconds to wait for enrollment to open.
+        operation_options: Options for the operation.
+
+    Returns:
+        The result of the operation, or the error it failed with.
+    """
+    try:
+        result: OperationResult = main(
+            class_date=target.class_date,
+            class_time=target.class_time,
+            class_type=target.class_type,
+            event_name=event_name or DEFAULT_CALENDAR_EVENT_NAME,
+            check_calendar=check_calendar,
+            timeout=timeout,
+            operation_options=operation_options,
+        )
+    except Exception as e:  # noqa: BLE001
+        return _failed(target, e)
+    return BatchResult(target=target, result=result)
+
+
+def _failed(target: BatchTarget, error: Exception) -> BatchResult:
+    LOGGER.error(f"{target.class_type} on {target.class_date} at {target.class_time}: {error}")
+    return BatchResult(target=target, error=error)
+
+
+def _run_targets(
+    targets: list[BatchTarget],
+    *,
+    event_name: str | None,
+    check_calendar: bool,
+    timeout: int,
+    operation_options: OperationOptions,
+) -> list[BatchResult]:
+    return [
+        run_target(
+            target,
+            event_name=event_name,
+            check_calendar=check_calendar,
+            timeout=timeout,
+            operation_options=operation_options,
+        )
+        for target in targets
+    ]
+
+
+def _run_day(
+    targets: list[BatchTarget],
+    *,
+    event_name: str | None,
+    check_calendar: bool,
+    timeout: int,
+    operation_options: OperationOptions,
+) -> list[BatchResult]:
+    """Enroll in the targets of one date from a single polling loop.
+
+    Returns:
+        The result of every target, in the order of the targets.
+    """
+    try:
+        outcomes: list[OperationResult | Exception] = enroll_many(
+            [ClassSlot(target.class_time, target.class_type) for target in targets],
+            class_date=targets[0].class_date,
+            event_name=event_name or DEFAULT_CALENDAR_EVENT_NAME,
+            check_calendar=check_calendar,
+            timeout=timeout,
+            operation_options=operation_options,
+        )
+    except Exception as e:  # noqa: BLE001
+        return [_failed(target, e) for target in targets]
+    return [
+        _failed(target, outcome)
+        if isinstance(outcome, Exception)
+        else BatchResult(target=target, result=outcome)
+        for target, outcome in zip(targets, outcomes, strict=True)
+    ]
+
+
+def run_batch(
+    targets: list[BatchTarget],
+    *,
+    event_name: str | None = DEFAULT_CALENDAR_EVENT_NAME,
+    check_calendar: bool = True,
+    timeout: int = 900,
+    operation_options: OperationOptions | None = None,
+    max_workers: int = BATCH_MAX_WORKERS,
+) -> list[BatchResult]:
+    """Run the same operation on several targets concurrently.
+
+    The targets to enroll in are grouped by date, and each date is polled by
+    one loop in its own thread, see `enroll_many`. Otherwise, each target runs
+    `main` in its own thread, sharing the classes page of each date within
+    `BATCH_SHARED_PAGE_SECONDS`. Either way the waits for enrollment to open
+    overlap, and the Regybox session and the calendar are shared.
+
+    Args:
+        targets: The classes to operate on.
+        event_name: The calendar event name to match for every target.
+        check_calendar: Whether to check the calendar for every target.
+        timeout: Maximum number of seconds each target waits for enrollment
+            to open.
+        operation_options: Options for the operation, shared by every target.
+        max_workers: The maximum number of dates or targets run at the same
+            time.
+
+    Returns:
+        The result of every target, in the order of the targets. A target
+        that fails gets the error it failed with instead of a result.
+
+    Raises:
+        ValueError: If `max_workers` is not positive.
+    """
+    if max_workers <= 0:
+        raise ValueError("max_workers must be a positive integer")
+    if not targets:
+        return []
+    options: OperationOptions = operation_options or OperationOptions()
+    jobs: list[tuple[list[int], functools.partial[list[BatchResult]]]] = []
+    if options.operation == "enroll" and not options.fire_at_open:
+        indexes: list[int] = sorted(range(len(targets)), key=lambda i: targets[i].class_date)
+        for class_date, day_indexes in itertools.groupby(
+            indexes, key=lambda i: targets[i].class_date
+        ):
+            day: list[int] = list(day_indexes)
+            LOGGER.info(f"Batch has {len(day)} target(s) on {class_date}")
+            jobs.append((
+                day,
+                functools.partial(
+                    _run_day,
+                    [targets[i] for i in day],
+                    event_name=event_name,
+                    check_calendar=check_calendar,
+                    timeout=timeout,
+                    operation_options=options,
+                ),
+            ))
+    else:
+        jobs.extend(
+            (
+                [i],
+                functools.partial(
+                    _run_targets,
+                    [target],
+                    event_name=event_name,
+                    check_calendar=check_calendar,
+                    timeout=timeout,
+                    operation_options=options,
+                ),
+            )
+            for i, target in enumerate(targets)
+        )
+    results: list[BatchResult | None] = [None] * len(targets)
+    with (
+        sharing_classes_pages(BATCH_SHARED_PAGE_SECONDS),
+        ThreadPoolExecutor(
+            max_workers=min(max_workers, len(jobs)), thread_name_prefix="regybox-batch"
+        ) as executor,
+    ):
+        futures: list[tuple[list[int], Future[list[BatchResult]]]] = [
+            (job_indexes, executor.submit(contextvars.copy_context().run, job))
+            for job_indexes, job in jobs
+        ]
+        for job_indexes, future in futures:
+            for i, result in zip(job_indexes, future.result(), strict=True):
+                results[i] = result
+    return [result for result in results if result is not None]
@@ -1,7 +1,8 @@
 """Provide functionality to interact with a personal calendar.
 
 This module defines the Calendar class, which is responsible for fetching and
-parsing the calendar specified by CALENDAR_URL.
+parsing the calendar specified by CALENDAR_URL. The calendar is not fetched
+while its host is failing, see `regybox.circuit_breaker`.
 """
 
 import datetime
@@ -11,10 +12,14 @@ import icalendar
 import recurring_ical_events  # pyright: ignore[reportMissingTypeStubs]
 import requests
 
+from regybox.circuit_breaker import CircuitBreaker, get_circuit_breaker
 from regybox.common import CALENDAR_URL, LOGGER
 from regybox.exceptions import UnplannedClassError
 from regybox.utils.singleton import Singleton
 
+SERVICE_NAME: str = "the calendar"
+CALENDAR_TIMEOUT_SECONDS: int = 10
+
 
 def _normalize_event_name(event_name: str | None) -> str | None:
     """Normalize calendar event names for exact, case-insensitive matching.
@@ -45,13 +50,37 @@ class Calendar(metaclass=Singleton):
             self.calendar = None
             return
         if not self.calendar:
-            res: requests.models.Response = requests.get(CALENDAR_URL, timeout=10)
-            res.raise_for_status()
-            decoded = res.content.decode("utf-8", errors="replace")
-            self.calendar = cast(
-                "icalendar.Calendar",
-                icalendar.Calendar.from_ical(decoded),
+            self.refresh()
+
+    def refresh(self) -> None:
+        """Download and parse the calendar again.
+
+        Long-running processes call it so that later checks see the events
+        added or removed since the calendar was first downloaded. The
+        previous calendar is kept if the download fails.
+
+        Raises:
+            requests.ConnectionError: If the calendar host cannot be reached.
+            requests.Timeout: If the download times out.
+        """
+        if not CALENDAR_URL:
+            return
+        breaker: CircuitBreaker = get_circuit_breaker(SERVICE_NAME)
+        breaker.before_request()
+        try:
+            res: requests.models.Response = requests.get(
+                CALENDAR_URL, timeout=CALENDAR_TIMEOUT_SECONDS
             )
+        except (requests.ConnectionError, requests.Timeout):
+            breaker.record_failure()
+            raise
+        breaker.record_status(res.status_code)
+        res.raise_for_status()
+        decoded = res.content.decode("utf-8", errors="replace")
+        self.calendar = cast(
+            "icalendar.Calendar",
+            icalendar.Calendar.from_ical(decoded),
+        )
 
     def find(
         self,
@@ -0,0 +1,152 @@
+"""Stop sending requests to a failing upstream service.
+
+Each upstream service has a CircuitBreaker, which fails requests fast with
+ServiceUnavailableError after consecutive failures, until a probe succeeds.
+"""
+
+import threading
+import time
+from typing import Literal
+
+from regybox.common import CIRCUIT_BREAKER_THRESHOLD, LOGGER
+from regybox.exceptions import ServiceUnavailableError
+from regybox.utils.singleton import Singleton
+
+CircuitState = Literal["closed", "open", "half_open"]
+CIRCUIT_RESET_SECONDS: float = 30.0
+CIRCUIT_FAILURE_STATUS_CODES: frozenset[int] = frozenset({429, 500, 502, 503, 504})
+
+
+class CircuitBreaker:
+    """Track the consecutive failures of an upstream service.
+
+    The breaker is closed while the service answers, open while requests to it
+    fail fast, and half-open while a single probe request is in flight. A probe
+    that never reports back is replaced after `reset_timeout` seconds.
+    Connection errors, timeouts and `CIRCUIT_FAILURE_STATUS_CODES` responses
+    count as failures. A threshold of zero disables the breaker.
+    """
+
+    def __init__(
+        self,
+        service: str,
+        *,
+        threshold: int = CIRCUIT_BREAKER_THRESHOLD,
+        reset_timeout: float = CIRCUIT_RESET_SECONDS,
+    ) -> None:
+        """Initialize a new instance of the CircuitBreaker class.
+
+        Args:
+            service: The name of the service, as shown to users.
+            threshold: The number of consecutive failures that open the
+                breaker, or 0 to never open it.
+            reset_timeout: The number of seconds the breaker stays open
+                before a probe request is let through.
+        """
+        self.service: str = service
+        self.threshold: int = threshold
+        self.reset_timeout: float = reset_timeout
+        self.state: CircuitState = "closed"
+        self.failures: int = 0
+        self._opened_at: float = 0.0
+        self._probe_started_at: float | None = None
+        self._lock: threading.Lock = threading.Lock()
+
+    def before_request(self) -> None:
+        """Check that a request may be sent to the service.
+
+        Raises:
+            ServiceUnavailableError: If the breaker is open, or half-open with
+                a probe request already in flight.
+        """
+        if self.threshold <= 0:
+            return
+        with self._lock:
+            now: float = time.monotonic()
+            if self.state == "open":
+                retry_in: float = self._opened_at + self.reset_timeout - now
+                if retry_in > 0:
+                    raise ServiceUnavailableError(self.service, retry_in=retry_in)
+                LOGGER.info(f"Probing {self.service} after {self.reset_timeout:.0f} seconds")
+                self.state = "half_open"
+            elif self.state == "half_open" and self._probe_started_at is not None:
+                probe_age: float = now - self._probe_started_at
+                if probe_age < self.reset_timeout:
+                    raise ServiceUnavailableError(
+                        self.service, retry_in=self.reset_timeout - probe_age
+                    )
+            if self.state == "half_open":
+                self._probe_started_at = now
+
+    def record_success(self) -> None:
+        """Record that the service answered, closing the breaker."""
+        with self._lock:
+            if self.state != "closed":
+                LOGGER.info(f"Closing the circuit breaker of {self.service}, which answered")
+            self.state = "closed"
+            self.failures = 0
+            self._probe_started_at = None
+
+    def record_failure(self) -> None:
+        """Record that the service failed, opening the breaker if needed."""
+        if self.threshold <= 0:
+            return
+        with self._lock:
+            self.failures += 1
+            if self.state == "half_open" or self.failures >= self.threshold:
+                if self.state != "open":
+                    LOGGER.warning(
+                        f"Opening the circuit breaker of {self.service} after {self.failures}"
+                        f" consecutive failure(s); not sending it requests for"
+                        f" {self.reset_timeout:.0f} seconds"
+                    )
+                self.state = "open"
+                self._opened_at = time.monotonic()
+                self._probe_started_at = None
+
+    def record_status(self, status_code: int) -> None:
+        """Record the status of a response of the service.
+
+        Args:
+            status_code: The HTTP status code of the response.
+        """
+        if status_code in CIRCUIT_FAILURE_STATUS_CODES:
+            self.record_failure()
+        else:
+            self.record_success()
+
+
+class CircuitBreakers(metaclass=Singleton):
+    """Share one circuit breaker per upstream service across the process."""
+
+    def __init__(self) -> None:
+        """Initialize a new instance of the CircuitBreakers class."""
+        self._breakers: dict[str, CircuitBreaker] = {}
+        self._lock: threading.Lock = threading.Lock()
+
+    def get(self, service: str) -> CircuitBreaker:
+        """Get the circuit breaker of a service, creating it if needed.
+
+        Args:
+            service: The name of the service.
+
+        Returns:
+            The circuit breaker of the service.
+        """
+        with self._lock:
+            breaker: CircuitBreaker | None = self._breakers.get(service)
+            if breaker is None:
+                breaker = self._breakers[service] = CircuitBreaker(service)
+            return breaker
+
+
+def get_circuit_breaker(service: str) -> CircuitBreaker:
+    """Get the circuit breaker shared by the requests to a service.
+
+    Args:
+        service: The name of the service.
+
+    Returns:
+        The circuit breaker of the service.
+    """
+    return CircuitBreakers().get(service)
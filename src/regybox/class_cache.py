@@ -0,0 +1,162 @@
+"""Cache the parsed class listings of Regybox members.
+
+Read-only commands, such as listing classes or checking a class before
+unenrolling, often fetch the same listing seconds apart. This module defines
+the ClassCache class, which keeps the parsed listing of each member and date in
+memory and, optionally, in a local JSON file shared by later runs. Entries
+expire after a time to live chosen by the caller and are invalidated when an
+enrollment changes the listing on the server.
+"""
+
+import json
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import cast
+
+from regybox.common import CLASS_CACHE, LOGGER
+from regybox.utils.files import write_private_file
+from regybox.utils.singleton import Singleton
+
+CLASS_CACHE_VERSION: int = 1
+
+ClassRecord = dict[str, object]
+
+
+@dataclass(frozen=True)
+class CachedListing:
+    """A class listing held by the class cache.
+
+    Attributes:
+        classes: The serialized classes of the listing.
+        expires_at: The Unix time at which the listing expires.
+    """
+
+    classes: list[ClassRecord]
+    expires_at: float
+
+
+def _parse_listing(raw: object) -> CachedListing | None:
+    if not isinstance(raw, dict):
+        return None
+    data: dict[str, object] = cast("dict[str, object]", raw)
+    expires_at: object = data.get("expires_at")
+    classes: object = data.get("classes")
+    if not isinstance(expires_at, int | float) or not isinstance(classes, list):
+        return None
+    records: list[object] = cast("list[object]", classes)
+    if not all(isinstance(record, dict) for record in records):
+        return None
+    return CachedListing(classes=cast("list[ClassRecord]", records), expires_at=expires_at)
+
+
+class ClassCache(metaclass=Singleton):
+    """Cache class listings by member and date, in memory and on disk.
+
+    Listings are stored under the key of the member credentials and the ISO
+    date of the classes. The file configured with ``REGYBOX_CLASS_CACHE`` is
+    only a second level behind the memory cache: a missing, unreadable or
+    corrupt file is treated as empty, and failing to write it is logged and
+    ignored.
+    """
+
+    def __init__(self) -> None:
+        """Initialize a new instance of the ClassCache class."""
+        self.path: Path | None = Path(CLASS_CACHE) if CLASS_CACHE else None
+        self._listings: dict[str, CachedListing] = {}
+        self._lock: threading.Lock = threading.Lock()
+
+    def get(self, key: str, date: str) -> list[ClassRecord] | None:
+        """Get a cached listing that has not expired.
+
+        Args:
+            key: The key of the member credentials.
+            date: The ISO date of the classes.
+
+        Returns:
+            The serialized classes, or None if there is no fresh listing.
+        """
+        entry: str = f"{key}|{date}"
+        with self._lock:
+            listing: CachedListing | None = self._listings.get(entry)
+            if listing is None and self.path is not None:
+                listing = self._read().get(entry)
+            if listing is None or listing.expires_at <= time.time():
+                self._listings.pop(entry, None)
+                return None
+            self._listings[entry] = listing
+        LOGGER.debug(f"Using the cached classes of {date}")
+        return listing.classes
+
+    def put(self, key: str, date: str, classes: list[ClassRecord], *, ttl: float) -> None:
+        """Cache a listing, replacing any previous one for the same date.
+
+        Args:
+            key: The key of the member credentials.
+            date: The ISO date of the classes.
+            classes: The serialized classes.
+            ttl: The number of seconds the listing stays fresh.
+        """
+        entry: str = f"{key}|{date}"
+        listing = CachedListing(classes=classes, expires_at=time.time() + ttl)
+        with self._lock:
+            self._listings[entry] = listing
+            if self.path is not None:
+                listings: dict[str, CachedListing] = self._read()
+                listings[entry] = listing
+                self._write(listings)
+
+    def invalidate(self, key: str, date: str) -> None:
+        """Remove the cached listing of a date, if any.
+
+        Args:
+            key: The key of the member credentials.
+            date: The ISO date of the classes.
+        """
+        entry: str = f"{key}|{date}"
+        with self._lock:
+            self._listings.pop(entry, None)
+            if self.path is not None:
+                listings: dict[str, CachedListing] = self._read()
+                if listings.pop(entry, None) is not None:
+                    self._write(listings)
+
+    def _read(self) -> dict[str, CachedListing]:
+        if self.path is None:
+            return {}
+        try:
+            data: object = json.loads(self.path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError):
+            LOGGER.warning(f"Ignoring unreadable class cache at {self.path}")
+            return {}
+        if not isinstance(data, dict):
+            return {}
+        store: dict[str, object] = cast("dict[str, object]", data)
+        raw_listings: object = store.get("listings")
+        if store.get("version") != CLASS_CACHE_VERSION or not isinstance(raw_listings, dict):
+            return {}
+        listings: dict[str, CachedListing] = {}
+        now: float = time.time()
+        for entry, raw_listing in cast("dict[str, object]", raw_listings).items():
+            listing: CachedListing | None = _parse_listing(raw_listing)
+            if listing is not None and listing.expires_at > now:
+                listings[entry] = listing
+        return listings
+
+    def _write(self, listings: dict[str, CachedListing]) -> None:
+        if self.path is None:
+            return
+        payload: str = json.dumps({
+            "version": CLASS_CACHE_VERSION,
+            "listings": {
+                entry: {"classes": listing.classes, "expires_at": listing.expires_at}
+                for entry, listing in listings.items()
+            },
+        })
+        try:
+            write_private_file(self.path, payload)
+        except OSError:
+            LOGGER.warning(f"Unable to write class cache at {self.path}", exc_info=True)
@@ -1,21 +1,35 @@
 """Provide classes and functions for interacting with CrossFit classes."""
 
+import asyncio
+import contextvars
 import datetime
 import re
 import time
-from dataclasses import dataclass, field
+from collections.abc import Generator, Iterable, Iterator
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field, fields
+from typing import Literal, TypedDict, TypeVar, cast, overload, override
 from urllib.parse import urljoin, urlparse
 
 import ftfy
 from bs4 import BeautifulSoup
-from bs4.element import NavigableString, Tag
+from bs4.element import Tag
 
-from regybox.common import LOGGER, TIMEZONE
+from regybox.class_cache import ClassCache
+from regybox.clock import ClockSample, capture_sample, capturing_sample
+from regybox.common import CLASSES_FRESHNESS_SECONDS, LOGGER, TIMEZONE
 from regybox.connection import (
     DOMAIN,
+    AsyncRegyboxSession,
+    RegyboxCredentials,
     get_classes_html,
+    get_classes_params,
+    get_default_credentials,
     get_url_html,
+    stream_classes_html,
 )
+from regybox.deadline import fits_in_deadline
 from regybox.exceptions import (
     ClassIsOverbookedError,
     ClassNotFoundError,
@@ -24,9 +38,31 @@ from regybox.exceptions import (
     UnparseableError,
     UserAlreadyEnrolledError,
 )
+from regybox.parsing import parse_class_blocks
+from regybox.singleflight import SingleFlight
 
 EMPTY_CLASS_RETRY_TOTAL: int = 10
 EMPTY_CLASS_RETRY_BACKOFF_FACTOR: float = 0.05
+RANGE_EMPTY_CLASS_RETRY_TOTAL: int = 2
+RANGE_MAX_WORKERS: int = 8
+CLASS_CACHE_MIN_TTL_SECONDS: float = 5.0
+CLASS_CACHE_MAX_TTL_SECONDS: float = 300.0
+CLASS_CACHE_TTL_FRACTION: float = 0.01
+DIV_TAG_PATTERN: re.Pattern[str] = re.compile(r"<(/?)div\b[^>]*>", re.IGNORECASE)
+WAITLIST_PRELOADER_PATTERN: re.Pattern[str] = re.compile(r"preloader\s*color-orange")
+PADDING_TOP_1PX_PATTERN: re.Pattern[str] = re.compile(r"padding-top:\s*1px")
+PADDING_TOP_7PX_PATTERN: re.Pattern[str] = re.compile(r"padding-top:\s*7px")
+
+ClassesKey = tuple[str, int, tuple[tuple[str, str], ...]]
+_CLASSES_TAGS_FLIGHTS: SingleFlight[ClassesKey, tuple[list[Tag], ClockSample | None]] = (
+    SingleFlight(fresh_for=CLASSES_FRESHNESS_SECONDS)
+)
+_CLASSES_HTML_FLIGHTS: SingleFlight[ClassesKey, tuple[str, ClockSample | None]] = SingleFlight(
+    fresh_for=CLASSES_FRESHNESS_SECONDS
+)
+_shared_pages_fresh_for: contextvars.ContextVar[float | None] = contextvars.ContextVar(
+    "regybox_shared_pages_fresh_for", default=None
+)
 
 
 def parse_capacity_value(value: str) -> int | None:
@@ -51,8 +87,212 @@ def parse_capacity_value(value: str) -> int | None:
         raise UnparseableError(f"Unexpected capacity value: {value}") from e
 
 
+def _attr_text(tag: Tag, name: str) -> str | None:
+    value = tag.get(name)
+    if value is None or isinstance(value, str):
+        return value
+    return " ".join(value)
+
+
+def _has_class(tag: Tag, class_name: str) -> bool:
+    """Match a CSS class the way ``Tag.find(attrs={"class": ...})`` does.
+
+    Returns:
+        True if any of the tag classes, or all of them joined, equal the name.
+    """
+    value = tag.get("class")
+    if value is None or isinstance(value, str):
+        return value == class_name
+    return class_name in value or " ".join(value) == class_name
+
+
+def _attr_matches(tag: Tag, name: str, pattern: re.Pattern[str]) -> bool:
+    text: str | None = _attr_text(tag, name)
+    return text is not None and pattern.search(text) is not None
+
+
 @dataclass
-class Class:
+class _ClassBlock:
+    """The elements of a class block that are read by the Class parser.
+
+    Every field holds what the equivalent ``Tag.find`` or ``Tag.find_all``
+    search over the class block would return, so that the block is traversed
+    once instead of once per search.
+    """
+
+    name: Tag | None = None
+    details: Tag | None = None
+    time_: Tag | None = None
+    capacity: Tag | None = None
+    waitlist_preloader: Tag | None = None
+    open_elsewhere: Tag | None = None
+    enrolled_marker: Tag | None = None
+    timer: Tag | None = None
+    buttons: list[Tag] = field(default_factory=list[Tag])
+    states: list[Tag] = field(default_factory=list[Tag])
+    error_spans: list[Tag] = field(default_factory=list[Tag])
+    padding_7px_divs: list[Tag] = field(default_factory=list[Tag])
+
+    @property
+    def error(self) -> Tag | None:
+        """The first error span in the class block, if any."""
+        return self.error_spans[0] if self.error_spans else None
+
+    @staticmethod
+    def first_within(ancestor: Tag, candidates: list[Tag]) -> Tag | None:
+        """Return the first candidate that is a descendant of a given tag.
+
+        Returns:
+            The first candidate nested in the ancestor tag, or None.
+        """
+        return next(
+            (tag for tag in candidates if any(parent is ancestor for parent in tag.parents)),
+            None,
+        )
+
+    def add_div(self, div: Tag) -> None:
+        """Record a div tag in every search it matches."""
+        align: str | None = _attr_text(div, "align")
+        if align == "left":
+            if self.name is None and _has_class(div, "col-50"):
+                self.name = div
+            if self.time_ is None and _has_class(div, "col"):
+                self.time_ = div
+        elif align == "right":
+            if self.details is None and _has_class(div, "col-50"):
+                self.details = div
+            if _has_class(div, "col"):
+                self.states.append(div)
+            if (
+                self.enrolled_marker is None
+                and _has_class(div, "ok_color")
+                and _attr_matches(div, "style", PADDING_TOP_1PX_PATTERN)
+            ):
+                self.enrolled_marker = div
+        elif align == "center" and self.capacity is None and _has_class(div, "col"):
+            self.capacity = div
+        if self.waitlist_preloader is None and _attr_matches(
+            div, "class", WAITLIST_PRELOADER_PATTERN
+        ):
+            self.waitlist_preloader = div
+        if _attr_matches(div, "style", PADDING_TOP_7PX_PATTERN):
+            self.padding_7px_divs.append(div)
+            if self.open_elsewhere is None and _has_class(div, "letra_10"):
+                self.open_elsewhere = div
+
+
+def _scan_class_block(tag: Tag) -> _ClassBlock:
+    """Collect the elements read by the Class parser in one traversal.
+
+    Args:
+        tag: The HTML tag representing the class.
+
+    Returns:
+        The elements of the class block.
+    """
+    block = _ClassBlock()
+    for node in tag.descendants:
+        if not isinstance(node, Tag):
+            continue
+        if node.name == "div":
+            block.add_div(node)
+        elif node.name == "span":
+            if _has_class(node, "erro_color"):
+                block.error_spans.append(node)
+        elif node.name == "button":
+            block.buttons.append(node)
+        elif node.name == "input" and block.timer is None and _has_class(node, "timers"):
+            block.timer = node
+    return block
+
+
+class _EnrollmentActions:
+    """Enroll in and unenroll from a class, shared by Class and ClassSnapshot.
+
+    Both send the same requests, but only a Class updates its own state from
+    the response, see its `_handle_enroll_response`.
+    """
+
+    __slots__ = ()
+
+    date: str
+    is_open: bool
+    is_overbooked: bool
+    user_is_enrolled: bool
+    enroll_url: str | None
+    unenroll_url: str | None
+
+    def _handle_enroll_response(self, res_html: str) -> str:
+        LOGGER.debug(f"Enrolled at {self.enroll_url} with response: '{res_html}'")
+        return _parse_enroll_response(
+            BeautifulSoup(res_html, "html.parser").find_all("script"), res_html
+        )
+
+    def _handle_unenroll_response(self, res_html: str) -> str:
+        LOGGER.debug(f"Unenrolled at {self.unenroll_url} with response: '{res_html}'")
+        return _parse_unenroll_response(res_html)
+
+    def enroll(self, *, credentials: RegyboxCredentials | None = None) -> str:
+        """Enroll the student in the CrossFit class.
+
+        Args:
+            credentials: The credentials of the member the class was fetched
+                for. Defaults to the credentials configured in the environment.
+
+        Returns:
+            The response message after successful enrollment.
+        """
+        url: str = _check_enrollable(self)
+        with _invalidating_listing(self.date, credentials):
+            res_html: str = get_url_html(url, credentials=credentials)
+        return self._handle_enroll_response(res_html)
+
+    async def async_enroll(self, session: AsyncRegyboxSession) -> str:
+        """Enroll the student in the CrossFit class using an asyncio session.
+
+        Args:
+            session: The asyncio session to send the request with.
+
+        Returns:
+            The response message after successful enrollment.
+        """
+        url: str = _check_enrollable(self)
+        with _invalidating_listing(self.date, session.credentials):
+            res_html: str = await session.get_url_html(url)
+        return self._handle_enroll_response(res_html)
+
+    def unenroll(self, *, credentials: RegyboxCredentials | None = None) -> str:
+        """Unenroll the student from the CrossFit class.
+
+        Args:
+            credentials: The credentials of the member the class was fetched
+                for. Defaults to the credentials configured in the environment.
+
+        Returns:
+            The response message indicating successful unenrollment.
+        """
+        url: str = _check_unenrollable(self)
+        with _invalidating_listing(self.date, credentials):
+            res_html: str = get_url_html(url, credentials=credentials)
+        return self._handle_unenroll_response(res_html)
+
+    async def async_unenroll(self, session: AsyncRegyboxSession) -> str:
+        """Unenroll the student from the CrossFit class via an asyncio session.
+
+        Args:
+            session: The asyncio session to send the request with.
+
+        Returns:
+            The response message indicating successful unenrollment.
+        """
+        url: str = _check_unenrollable(self)
+        with _invalidating_listing(self.date, session.credentials):
+            res_html: str = await session.get_url_html(url)
+        return self._handle_unenroll_response(res_html)
+
+
+@dataclass
+class Class(_EnrollmentActions):
     """Represent a CrossFit class with its attributes and behavior.
 
     This class encapsulates the attributes and behavior of a class,
@@ -84,6 +324,8 @@ class Class:
         time_to_enroll: The number of seconds until enrollment closes.
         enroll_url: The URL to enroll in the class.
         unenroll_url: The URL to unenroll from the class.
+        clock_sample: The server clock sample of the response the class was
+            parsed from, which pins its timers to the server clock.
     """
 
     _tag: Tag = field(init=False, repr=False)
@@ -106,33 +348,27 @@ class Class:
     time_to_enroll: int | None = None
     enroll_url: str | None = field(init=True, repr=False, default=None)
     unenroll_url: str | None = field(init=True, repr=False, default=None)
+    clock_sample: ClockSample | None = field(default=None, repr=False, compare=False)
 
-    def __init__(self, tag: Tag) -> None:
+    def __init__(self, tag: Tag, *, clock_sample: ClockSample | None = None) -> None:
         """Initialize a Class object.
 
         Args:
             tag: The HTML tag representing the class.
+            clock_sample: The server clock sample of the response the tag was
+                parsed from, if known.
 
         Raises:
             UnparseableError: If unable to parse the class HTML.
         """
         self._tag = tag
-        name: Tag | NavigableString | None = self._tag.find(
-            "div", attrs={"align": "left", "class": "col-50"}
-        )
-        details: Tag | NavigableString | None = self._tag.find(
-            "div", attrs={"align": "right", "class": "col-50"}
-        )
+        self.clock_sample = clock_sample
+        block: _ClassBlock = _scan_class_block(tag)
         try:
             date: int = int(self._tag.attrs["id"].removeprefix("feed_time_slot"))
         except KeyError as e:
             raise UnparseableError from e
-        time_: Tag | NavigableString | None = self._tag.find(
-            "div", attrs={"align": "left", "class": "col"}
-        )
-        capacity: Tag | NavigableString | None = self._tag.find(
-            "div", attrs={"align": "center", "class": "col"}
-        )
+        name, details, time_, capacity = block.name, block.details, block.time_, block.capacity
         if name is None or details is None or time_ is None or capacity is None:
             raise UnparseableError
 
@@ -150,21 +386,19 @@ class Class:
             self.is_full = self.cur_capacity >= self.max_capacity
         else:
             self.is_full = False
-        error: Tag | NavigableString | None = self._tag.find("span", attrs={"class": "erro_color"})
+        error: Tag | None = block.error
         # Avoid localized status text: Regybox uses the same error span for
         # full/closed classes and deadline-expired classes. With the current
         # markup, capacity is the stable structural signal separating them.
         self.is_overbooked = self.is_full and bool(error)
         self.enrollment_deadline_expired = bool(error) and not self.is_full
-        self.user_is_waitlisted = bool(
-            self._tag.find("div", attrs={"class": re.compile(r"preloader\s*color-orange")})
-        )
+        self.user_is_waitlisted = bool(block.waitlist_preloader)
 
-        self._init_button()
-        self._init_state()
-        self._init_timer()
+        self._init_button(block)
+        self._init_state(block)
+        self._init_timer(block)
 
-    def _init_button(self) -> None:
+    def _init_button(self, block: _ClassBlock) -> None:
         """Sets class attributes mainly using button state.
 
         This method sets the following attributes:
@@ -173,11 +407,14 @@ class Class:
             * unenroll_url
             * enroll_url
 
+        Args:
+            block: The scanned elements of the class block.
+
         Raises:
             UnparseableError: If class action buttons are ambiguous or use an
                 unknown booking endpoint.
         """
-        button_actions, unknown_action_endpoints = self._get_button_actions()
+        button_actions, unknown_action_endpoints = self._get_button_actions(block.buttons)
         if unknown_action_endpoints:
             raise UnparseableError(
                 f"Unknown class action endpoint: {', '.join(unknown_action_endpoints)}"
@@ -187,24 +424,12 @@ class Class:
             raise UnparseableError(f"Ambiguous class action controls: {', '.join(endpoints)}")
         button_action = button_actions[0] if button_actions else None
         self.is_open = bool(button_action)
-        if self._tag.find(
-            "div", attrs={"class": "letra_10", "style": re.compile(r"padding-top:\s*7px")}
-        ):
+        if block.open_elsewhere:
             # edge case when class is open but user is already enrolled in
             # another class
             self.is_open = True
 
-        if (
-            self._tag.find(
-                "div",
-                attrs={
-                    "align": "right",
-                    "class": "ok_color",
-                    "style": re.compile(r"padding-top:\s*1px"),
-                },
-            )
-            is not None
-        ):
+        if block.enrolled_marker is not None:
             self.user_is_enrolled = True
         elif button_action is None:
             self.user_is_enrolled = False
@@ -215,14 +440,13 @@ class Class:
             self.user_is_enrolled = False
             self.enroll_url = button_action[1]
 
-    def _get_button_actions(self) -> tuple[list[tuple[str, str]], list[str]]:
+    def _get_button_actions(self, buttons: list[Tag]) -> tuple[list[tuple[str, str]], list[str]]:
         """Return known booking actions and unknown booking-like endpoints.
 
         Raises:
             UnparseableError: If a known action uses an unexpected origin or
                 path.
         """
-        buttons: list[Tag] = self._tag.find_all("button")
         button_actions: list[tuple[str, str]] = []
         unknown_action_endpoints: list[str] = []
         domain = urlparse(DOMAIN)
@@ -252,34 +476,29 @@ class Class:
                     unknown_action_endpoints.append(pathname)
         return button_actions, unknown_action_endpoints
 
-    def _init_state(self) -> None:
+    def _init_state(self, block: _ClassBlock) -> None:
         """Sets class attributes mainly using class descriptors.
 
         This method sets the following attributes:
             * is_over
             * user_is_blocked
 
+        Args:
+            block: The scanned elements of the class block.
+
         Raises:
             ValueError: If the state object is not found.
-            TypeError: If the state object is not of the expected type.
         """
-        states: list[Tag | NavigableString] = self._tag.find_all(
-            "div", attrs={"align": "right", "class": "col"}
-        )
-        if not states:
+        if not block.states:
             raise ValueError
-        state: Tag | NavigableString | None = states[-1]
-        if not isinstance(state, Tag):
-            raise TypeError(f"Unexpected type for state: {state}")
+        state: Tag | None = block.states[-1]
 
         if not self.is_open and not self.user_is_enrolled:
             self.user_is_blocked = True
 
-        if state.find("span", attrs={"class": "erro_color"}):
+        if block.first_within(state, block.error_spans):
             self.user_is_blocked = True  # enroll window expired
-        elif state := state.find("div", attrs={"style": re.compile(r"padding-top:\s*7px")}):
-            if not isinstance(state, Tag):
-                raise TypeError(f"Unexpected type for state: {state}")
+        elif state := block.first_within(state, block.padding_7px_divs):
             if self.user_is_waitlisted:
                 # next check fails for waitlisted classes
                 self.is_over = False
@@ -289,15 +508,18 @@ class Class:
                 self.user_is_blocked = True  # already enrolled in a class today
         # if state has no child div, there is a timer
 
-    def _init_timer(self) -> None:
+    def _init_timer(self, block: _ClassBlock) -> None:
         """Sets class attributes using timers.
 
         This method sets the following attributes:
             * time_to_start
             * time_to_enroll
+
+        Args:
+            block: The scanned elements of the class block.
         """
-        timer: Tag | NavigableString | None = self._tag.find("input", attrs={"class": "timers"})
-        if isinstance(timer, Tag):
+        timer: Tag | None = block.timer
+        if timer is not None:
             if not self.is_open:
                 self.time_to_enroll = int(timer.attrs["value"])
             elif not self.user_is_enrolled:  # timer disappears once you're enrolled
@@ -311,88 +533,233 @@ class Class:
         LOGGER.debug("Found %d PHP button endpoint(s)", len(urls))
         return urls
 
-    def enroll(self) -> str:
-        """Enroll the student in the CrossFit class.
+    @override
+    def _handle_enroll_response(self, res_html: str) -> str:
+        """Update the class state from an enrollment response.
 
         Returns:
             The response message after successful enrollment.
-
-        Raises:
-            ValueError: If the enroll URL is not set.
-            UserAlreadyEnrolledError: If the user is already enrolled in the
-                class.
-            ClassNotOpenError: If the class is not open for enrollment.
-            ClassIsOverbookedError: If the class is already overbooked.
-            UnparseableError: If the response for enrollment cannot be parsed.
         """
-        if self.user_is_enrolled:
-            raise UserAlreadyEnrolledError
-        if self.is_overbooked:
-            raise ClassIsOverbookedError
-        if self.enroll_url is None:
-            raise ValueError("Enroll URL is not set")
-        if not self.is_open:
-            raise ClassNotOpenError
-
-        res_html: str = get_url_html(self.enroll_url)
         LOGGER.debug(f"Enrolled at {self.enroll_url} with response: '{res_html}'")
         self.user_is_enrolled = True
-        soup = BeautifulSoup(res_html, "html.parser")
-        scripts: list[Tag] = soup.find_all("script")
-        self.user_is_waitlisted = False
-        waitlist_script = _find_script_containing(scripts, "lista_espera.php")
-        if waitlist_script is not None:
-            self.user_is_waitlisted = bool(
-                re.findall(
-                    r"parent.popup\('php\/popups\/lista_espera\.php'",
-                    waitlist_script,
-                )
-            )
-        response_script = _find_script_containing(scripts, "msg_toast_icon")
-        if response_script is None:
-            raise UnparseableError(f"Couldn't parse response for enrollment: {res_html}")
-        responses: list[str] = re.findall(
-            r"parent\.msg_toast_icon\s*\(\"(.+?)\",",
-            response_script,
-        )
-        if len(responses) != 1:
-            raise UnparseableError(f"Couldn't parse response for enrollment: {res_html}")
-        response = ftfy.fix_text(responses[0])
-        LOGGER.info(f"Enrolled with response '{response}'")
-        return response
+        scripts: list[Tag] = BeautifulSoup(res_html, "html.parser").find_all("script")
+        self.user_is_waitlisted = _is_waitlisted(scripts)
+        return _parse_enroll_response(scripts, res_html)
 
-    def unenroll(self) -> str:
-        """Unenroll the student from the CrossFit class.
+    @override
+    def _handle_unenroll_response(self, res_html: str) -> str:
+        """Update the class state from an unenrollment response.
 
         Returns:
             The response message indicating successful unenrollment.
-
-        Raises:
-            ValueError: If the unenroll URL is not set.
-            RuntimeError: If the student is not enrolled in the class.
-            UnparseableError: If the unenrollment response cannot be parsed.
         """
-        if self.unenroll_url is None:
-            raise ValueError("Unenroll URL is not set")
-        if not self.user_is_enrolled:
-            raise RuntimeError("Not enrolled in class")
-
-        res_html: str = get_url_html(self.unenroll_url)
         LOGGER.debug(f"Unenrolled at {self.unenroll_url} with response: '{res_html}'")
         self.user_is_enrolled = False
-        soup = BeautifulSoup(res_html, "html.parser")
-        response_script = _find_script_containing(soup.find_all("script"), "msg_toast_icon")
-        if response_script is None:
-            raise UnparseableError(f"Couldn't parse response for unenrollment: {res_html}")
-        responses: list[str] = re.findall(
-            r"parent\.msg_toast_icon\s*\(\"(.+?)\",",
-            response_script,
-        )
-        if len(responses) != 1:
-            raise UnparseableError(f"Couldn't parse response for unenrollment: {res_html}")
-        response = ftfy.fix_text(responses[0])
-        LOGGER.info(f"Unenrolled with response '{response}'")
-        return response
+        return _parse_unenroll_response(res_html)
+
+    def snapshot(self) -> "ClassSnapshot":
+        """Copy the parsed fields of the class into an immutable snapshot.
+
+        Returns:
+            A snapshot of the class that does not retain the HTML tag.
+        """
+        return ClassSnapshot(**{f.name: getattr(self, f.name) for f in fields(ClassSnapshot)})
+
+
+class ClassSnapshotDict(TypedDict):
+    """The serialized form of a ClassSnapshot."""
+
+    name: str
+    details: str
+    date: str
+    start: str
+    end: str
+    max_capacity: int | None
+    cur_capacity: int
+    is_open: bool
+    is_full: bool
+    is_overbooked: bool
+    enrollment_deadline_expired: bool
+    is_over: bool
+    user_is_blocked: bool
+    user_is_enrolled: bool
+    user_is_waitlisted: bool
+    time_to_start: int | None
+    time_to_enroll: int | None
+    enroll_url: str | None
+    unenroll_url: str | None
+
+
+@dataclass(frozen=True, slots=True)
+class ClassSnapshot(_EnrollmentActions):
+    """An immutable copy of the parsed fields of a Class.
+
+    A Class keeps its HTML tag, and with it the whole parsed classes page, in
+    memory. A snapshot holds only the parsed values, so it is small, hashable
+    and serializable, and suits processes that keep many classes around.
+
+    The attributes are the same as those of Class. Enrolling or unenrolling
+    through a snapshot does not update it; fetch the class again to get its new
+    state.
+    """
+
+    name: str
+    details: str
+    date: str
+    start: str
+    end: str
+    max_capacity: int | None
+    cur_capacity: int
+    is_open: bool = False
+    is_full: bool = False
+    is_overbooked: bool = False
+    enrollment_deadline_expired: bool = False
+    is_over: bool = False
+    user_is_blocked: bool = False
+    user_is_enrolled: bool = False
+    user_is_waitlisted: bool = False
+    time_to_start: int | None = None
+    time_to_enroll: int | None = None
+    enroll_url: str | None = field(repr=False, default=None)
+    unenroll_url: str | None = field(repr=False, default=None)
+
+    def to_dict(self) -> ClassSnapshotDict:
+        """Serialize the snapshot into a JSON-compatible dictionary.
+
+        Returns:
+            The fields of the snapshot.
+        """
+        return cast("ClassSnapshotDict", asdict(self))
+
+    @classmethod
+    def from_dict(cls, data: ClassSnapshotDict) -> "ClassSnapshot":
+        """Deserialize a snapshot from a dictionary created by `to_dict`.
+
+        Args:
+            data: The fields of the snapshot.
+
+        Returns:
+            The snapshot.
+        """
+        return cls(**data)
+
+
+ClassT = TypeVar("ClassT", Class, ClassSnapshot)
+
+
+@contextmanager
+def _invalidating_listing(
+    class_date: str, credentials: RegyboxCredentials | None
+) -> Generator[None]:
+    """Invalidate the cached listing of a date once a request changes it.
+
+    The listing is invalidated even if the request fails, since the server
+    may have changed it anyway.
+
+    Args:
+        class_date: The ISO date of the class.
+        credentials: The member credentials. Defaults to the credentials
+            configured in the environment.
+
+    Yields:
+        None.
+    """
+    try:
+        yield
+    finally:
+        ClassCache().invalidate((credentials or get_default_credentials()).key, class_date)
+
+
+def _check_enrollable(class_: _EnrollmentActions) -> str:
+    """Check that a class can be enrolled in.
+
+    Returns:
+        The URL to enroll in the class.
+
+    Raises:
+        ValueError: If the enroll URL is not set.
+        UserAlreadyEnrolledError: If the user is already enrolled in the
+            class.
+        ClassNotOpenError: If the class is not open for enrollment.
+        ClassIsOverbookedError: If the class is already overbooked.
+    """
+    if class_.user_is_enrolled:
+        raise UserAlreadyEnrolledError
+    if class_.is_overbooked:
+        raise ClassIsOverbookedError
+    if class_.enroll_url is None:
+        raise ValueError("Enroll URL is not set")
+    if not class_.is_open:
+        raise ClassNotOpenError
+    return class_.enroll_url
+
+
+def _check_unenrollable(class_: _EnrollmentActions) -> str:
+    """Check that a class can be unenrolled from.
+
+    Returns:
+        The URL to unenroll from the class.
+
+    Raises:
+        ValueError: If the unenroll URL is not set.
+        RuntimeError: If the student is not enrolled in the class.
+    """
+    if class_.unenroll_url is None:
+        raise ValueError("Unenroll URL is not set")
+    if not class_.user_is_enrolled:
+        raise RuntimeError("Not enrolled in class")
+    return class_.unenroll_url
+
+
+def _is_waitlisted(scripts: list[Tag]) -> bool:
+    """Check whether an enrollment response put the user on the waitlist.
+
+    Returns:
+        True if the response opens the waitlist popup.
+    """
+    waitlist_script = _find_script_containing(scripts, "lista_espera.php")
+    if waitlist_script is None:
+        return False
+    return bool(re.findall(r"parent.popup\('php\/popups\/lista_espera\.php'", waitlist_script))
+
+
+def _parse_toast_message(scripts: list[Tag], res_html: str, *, action: str) -> str:
+    """Extract the toast message shown by an enrollment action response.
+
+    Args:
+        scripts: The script tags of the response.
+        res_html: The HTML of the response, for error messages.
+        action: The name of the action, for error messages.
+
+    Returns:
+        The response message.
+
+    Raises:
+        UnparseableError: If the response message cannot be parsed.
+    """
+    response_script = _find_script_containing(scripts, "msg_toast_icon")
+    if response_script is None:
+        raise UnparseableError(f"Couldn't parse response for {action}: {res_html}")
+    responses: list[str] = re.findall(
+        r"parent\.msg_toast_icon\s*\(\"(.+?)\",",
+        response_script,
+    )
+    if len(responses) != 1:
+        raise UnparseableError(f"Couldn't parse response for {action}: {res_html}")
+    return ftfy.fix_text(responses[0])
+
+
+def _parse_enroll_response(scripts: list[Tag], res_html: str) -> str:
+    response: str = _parse_toast_message(scripts, res_html, action="enrollment")
+    LOGGER.info(f"Enrolled with response '{response}'")
+    return response
+
+
+def _parse_unenroll_response(res_html: str) -> str:
+    scripts: list[Tag] = BeautifulSoup(res_html, "html.parser").find_all("script")
+    response: str = _parse_toast_message(scripts, res_html, action="unenrollment")
+    LOGGER.info(f"Unenrolled with response '{response}'")
+    return response
 
 
 def _find_script_containing(scripts: list[Tag], needle: str) -> str | None:
@@ -404,45 +771,154 @@ def _find_script_containing(scripts: list[Tag], needle: str) -> str | None:
     return None
 
 
+def _parse_classes_tags(res_html: str | Iterable[str]) -> list[Tag]:
+    """Parse the class tags out of a classes page or its chunks.
+
+    Returns:
+        The tags of every class block in the page.
+    """
+    return parse_class_blocks(res_html)
+
+
+def _get_empty_retry_wait(attempt: int, retry_backoff_factor: float) -> float:
+    wait = retry_backoff_factor * (2**attempt)
+    LOGGER.warning(f"No classes found in response; retrying in {wait:.2f} seconds.")
+    return wait
+
+
+@contextmanager
+def sharing_classes_pages(seconds: float) -> Generator[None]:
+    """Reuse the classes pages fetched inside the context for a few seconds.
+
+    Jobs that poll the same date, such as the targets of a batch, then share
+    one fetch of its classes page per poll instead of fetching it each. The
+    window should stay below the interval between polls of a single job.
+
+    Args:
+        seconds: The number of seconds a fetched classes page is reused for.
+
+    Yields:
+        None.
+    """
+    token: contextvars.Token[float | None] = _shared_pages_fresh_for.set(seconds)
+    try:
+        yield
+    finally:
+        _shared_pages_fresh_for.reset(token)
+
+
+def _get_classes_timestamp(year: int, month: int, day: int) -> int:
+    return int(datetime.datetime(year, month, day, tzinfo=TIMEZONE).timestamp() * 1000)
+
+
+def _get_classes_key(timestamp: int, credentials: RegyboxCredentials | None) -> ClassesKey:
+    """Identify the classes page fetched for a member and date.
+
+    Returns:
+        The key of identical classes page fetches.
+    """
+    member: RegyboxCredentials = credentials or get_default_credentials()
+    params: dict[str, str] = get_classes_params(timestamp, user=member.user)
+    return member.key, timestamp, tuple(sorted(params.items()))
+
+
 def _get_classes_tags_with_retry(
     timestamp: int,
     *,
+    credentials: RegyboxCredentials | None = None,
     retry_total: int = EMPTY_CLASS_RETRY_TOTAL,
     retry_backoff_factor: float = EMPTY_CLASS_RETRY_BACKOFF_FACTOR,
+    streamed: bool = False,
 ) -> list[Tag]:
     """Fetch class tags, retrying when no classes are found.
 
+    Concurrent fetches of the same page for the same member share one request
+    and its parsed tags, see `regybox.singleflight`, as do later fetches inside
+    a `sharing_classes_pages` context. Empty responses are never
+    shared with later fetches, and are no longer retried once the retry would
+    not fit in the current deadline, see `regybox.deadline`. The server clock
+    sample of the response the tags were parsed from is captured along with
+    them, see `regybox.clock.capturing_sample`.
+
     Args:
         timestamp: The class date timestamp in milliseconds.
+        credentials: The member credentials. Defaults to the credentials
+            configured in the environment.
         retry_total: The number of empty responses to retry after the initial
             request.
         retry_backoff_factor: The base delay for exponential retry backoff.
+        streamed: Whether to parse the page while it is downloaded instead
+            of fetching it whole. Streamed fetches are never hedged.
 
     Returns:
         The parsed class tags, or an empty list for a valid response with no
         classes.
     """
+    key: ClassesKey = _get_classes_key(timestamp, credentials)
+
+    def fetch() -> tuple[list[Tag], ClockSample | None]:
+        with capturing_sample() as captured:
+            tags: list[Tag] = _parse_classes_tags(
+                stream_classes_html(timestamp, credentials=credentials)
+                if streamed
+                else get_classes_html(timestamp, credentials=credentials)
+            )
+        return tags, captured.sample
+
     max_fetch_attempts = retry_total + 1
     for attempt in range(max_fetch_attempts):
-        res_html = get_classes_html(timestamp)
-        soup: BeautifulSoup = BeautifulSoup(res_html, "html.parser")
-        classes: list[Tag] = soup.find_all("div", attrs={"class": "filtro0"})
+        classes, sample = _CLASSES_TAGS_FLIGHTS.do(
+            key, fetch, fresh_for=_shared_pages_fresh_for.get()
+        )
         if classes:
+            capture_sample(sample)
             return classes
+        _CLASSES_TAGS_FLIGHTS.forget(key)
         if attempt < retry_total:
-            wait = retry_backoff_factor * (2**attempt)
-            LOGGER.warning(f"No classes found in response; retrying in {wait:.2f} seconds.")
+            wait: float = _get_empty_retry_wait(attempt, retry_backoff_factor)
+            if not fits_in_deadline(wait):
+                break
             time.sleep(wait)
     return []
 
 
-def get_classes_tags(year: int, month: int, day: int) -> list[Tag]:
+async def _async_get_classes_tags_with_retry(
+    session: AsyncRegyboxSession,
+    timestamp: int,
+    *,
+    retry_total: int = EMPTY_CLASS_RETRY_TOTAL,
+    retry_backoff_factor: float = EMPTY_CLASS_RETRY_BACKOFF_FACTOR,
+) -> list[Tag]:
+    """Fetch class tags with an asyncio session, retrying when none are found.
+
+    Returns:
+        The parsed class tags, or an empty list for a valid response with no
+        classes.
+    """
+    max_fetch_attempts = retry_total + 1
+    for attempt in range(max_fetch_attempts):
+        classes: list[Tag] = _parse_classes_tags(await session.get_classes_html(timestamp))
+        if classes:
+            return classes
+        if attempt < retry_total:
+            wait: float = _get_empty_retry_wait(attempt, retry_backoff_factor)
+            if not fits_in_deadline(wait):
+                break
+            await asyncio.sleep(wait)
+    return []
+
+
+def get_classes_tags(
+    year: int, month: int, day: int, *, credentials: RegyboxCredentials | None = None
+) -> list[Tag]:
     """Fetch all class tags for a specific date.
 
     Args:
         year: The year of the date.
         month: The month of the date.
         day: The day of the date.
+        credentials: The member credentials. Defaults to the credentials
+            configured in the environment.
 
     Returns:
         A list of Tag objects containing the HTML for the classes for
@@ -451,30 +927,402 @@ def get_classes_tags(year: int, month: int, day: int) -> list[Tag]:
     Raises:
         NoClassesFoundError: If no classes are found for the specified date.
     """
-    timestamp: int = int(datetime.datetime(year, month, day, tzinfo=TIMEZONE).timestamp() * 1000)
-    classes = _get_classes_tags_with_retry(timestamp)
+    classes = _get_classes_tags_with_retry(
+        _get_classes_timestamp(year, month, day), credentials=credentials
+    )
     if not classes:
         raise NoClassesFoundError(class_date=f"{year}-{month}-{day}")
     return classes
 
 
-def get_classes(year: int, month: int, day: int) -> list[Class]:
+def _block_may_match(tag: Tag, *, class_time: str | None, class_types: list[str] | None) -> bool:
+    """Cheaply check whether a class block can match the requested class.
+
+    Only the name and time divs of the block are read, so blocks for other
+    classes are rejected without building a full Class.
+
+    Args:
+        tag: The HTML tag representing the class.
+        class_time: The class start time in HH:MM format, or None to accept
+            any time.
+        class_types: The candidate class types, or None or empty to accept
+            any class type.
+
+    Returns:
+        False if the block cannot match the requested class.
+    """
+    name: str | None = None
+    start: str | None = None
+    for node in tag.descendants:
+        if not isinstance(node, Tag) or node.name != "div" or node.get("align") != "left":
+            continue
+        if name is None and _has_class(node, "col-50"):
+            name = node.get_text().strip()
+        if start is None and _has_class(node, "col"):
+            start = next(iter(node.get_text().split()), "")
+        if name is not None and start is not None:
+            break
+    if class_time is not None and start is not None and start != class_time:
+        return False
+    return not class_types or name is None or name.upper() in {t.upper() for t in class_types}
+
+
+@overload
+def get_classes(
+    year: int,
+    month: int,
+    day: int,
+    *,
+    class_time: str | None = None,
+    class_types: list[str] | None = None,
+    credentials: RegyboxCredentials | None = None,
+    snapshots: Literal[False] = False,
+) -> list[Class]: ...
+
+
+@overload
+def get_classes(
+    year: int,
+    month: int,
+    day: int,
+    *,
+    class_time: str | None = None,
+    class_types: list[str] | None = None,
+    credentials: RegyboxCredentials | None = None,
+    snapshots: Literal[True],
+) -> list[ClassSnapshot]: ...
+
+
+def get_classes(
+    year: int,
+    month: int,
+    day: int,
+    *,
+    class_time: str | None = None,
+    class_types: list[str] | None = None,
+    credentials: RegyboxCredentials | None = None,
+    snapshots: bool = False,
+) -> list[Class] | list[ClassSnapshot]:
     """Fetch all classes for a specific date.
 
+    When a class time or class types are given, blocks that cannot match them
+    are skipped before being parsed, so the result may omit other classes.
+
     Args:
         year: The year of the date.
         month: The month of the date.
         day: The day of the date.
+        class_time: Optional class start time in HH:MM format to filter on.
+        class_types: Optional candidate class types to filter on.
+        credentials: The member credentials. Defaults to the credentials
+            configured in the environment.
+        snapshots: Whether to return ClassSnapshot objects, which do not keep
+            the parsed classes page in memory, instead of Class objects.
 
     Returns:
-        A list of Class objects for the specified date.
+        A list of Class or ClassSnapshot objects for the specified date.
     """
-    return [Class(tag) for tag in get_classes_tags(year, month, day)]
+    with capturing_sample() as captured:
+        tags: list[Tag] = get_classes_tags(year, month, day, credentials=credentials)
+    classes: list[Class] = [
+        Class(tag, clock_sample=captured.sample)
+        for tag in tags
+        if _block_may_match(tag, class_time=class_time, class_types=class_types)
+    ]
+    if snapshots:
+        return [class_.snapshot() for class_ in classes]
+    return classes
+
 
+def _get_listing_ttl(classes: list[ClassSnapshot], *, now: datetime.datetime) -> float:
+    """Choose how long a class listing stays fresh.
 
-def pick_class(
-    classes: list[Class], *, class_time: str, class_type: str, class_date: str
+    A listing changes the most around the start of its classes and the
+    opening of their enrollment, so it is cached for a fraction of the time
+    left before the nearest of them.
+
+    Args:
+        classes: The classes of the listing.
+        now: The time at which the listing was fetched.
+
+    Returns:
+        The number of seconds the listing stays fresh.
+    """
+    distances: list[float] = []
+    for class_ in classes:
+        start = datetime.datetime.combine(
+            datetime.date.fromisoformat(class_.date),
+            datetime.time.fromisoformat(class_.start),
+            tzinfo=TIMEZONE,
+        )
+        distances.append((start - now).total_seconds())
+        if class_.time_to_enroll is not None:
+            distances.append(class_.time_to_enroll)
+    upcoming: list[float] = [distance for distance in distances if distance > 0]
+    if not upcoming:
+        return CLASS_CACHE_MAX_TTL_SECONDS
+    return min(
+        CLASS_CACHE_MAX_TTL_SECONDS,
+        max(CLASS_CACHE_MIN_TTL_SECONDS, min(upcoming) * CLASS_CACHE_TTL_FRACTION),
+    )
+
+
+def get_cached_classes(
+    year: int, month: int, day: int, *, credentials: RegyboxCredentials | None = None
+) -> list[ClassSnapshot]:
+    """Fetch all classes for a specific date, reusing a fresh cached listing.
+
+    Listings are cached by member and date, see `regybox.class_cache`, for a
+    time that shrinks as their classes get closer to starting or opening.
+    Enrolling or unenrolling in a class invalidates the listing of its date.
+    Use it to list classes only; paths that enroll, unenroll or wait for a
+    class to open must use `get_classes`.
+
+    Args:
+        year: The year of the date.
+        month: The month of the date.
+        day: The day of the date.
+        credentials: The member credentials. Defaults to the credentials
+            configured in the environment.
+
+    Returns:
+        A list of ClassSnapshot objects for the specified date.
+    """
+    key: str = (credentials or get_default_credentials()).key
+    date: str = datetime.date(year, month, day).isoformat()
+    cache = ClassCache()
+    records: list[dict[str, object]] | None = cache.get(key, date)
+    if records is not None:
+        try:
+            return [
+                ClassSnapshot.from_dict(cast("ClassSnapshotDict", record)) for record in records
+            ]
+        except TypeError:
+            LOGGER.warning(f"Ignoring invalid cached classes of {date}")
+    now: datetime.datetime = datetime.datetime.now(TIMEZONE)
+    classes: list[ClassSnapshot] = get_classes(
+        year, month, day, credentials=credentials, snapshots=True
+    )
+    cache.put(
+        key,
+        date,
+        [cast("dict[str, object]", class_.to_dict()) for class_ in classes],
+        ttl=_get_listing_ttl(classes, now=now),
+    )
+    return classes
+
+
+def _get_day_snapshots(
+    date: datetime.date, credentials: RegyboxCredentials | None
+) -> list[ClassSnapshot]:
+    tags: list[Tag] = _get_classes_tags_with_retry(
+        _get_classes_timestamp(date.year, date.month, date.day),
+        credentials=credentials,
+        retry_total=RANGE_EMPTY_CLASS_RETRY_TOTAL,
+        streamed=True,
+    )
+    return [Class(tag).snapshot() for tag in tags]
+
+
+def get_classes_range(
+    start: datetime.date,
+    end: datetime.date,
+    *,
+    max_workers: int = RANGE_MAX_WORKERS,
+    credentials: RegyboxCredentials | None = None,
+) -> Iterator[tuple[datetime.date, list[ClassSnapshot]]]:
+    """Fetch the classes of every day in a date range concurrently.
+
+    Days are fetched by a bounded pool of threads sharing the Regybox session,
+    so a range costs about one round trip per `max_workers` days. Each page is
+    parsed while it is downloaded, see `stream_classes_html`. Days without
+    classes are common in a range, such as days the gym is closed, so empty
+    responses are retried fewer times than in `get_classes` and yield an empty
+    list instead of raising. The days are fetched in the context of the caller,
+    so they share its deadline and request priority.
+
+    Args:
+        start: The first date of the range.
+        end: The last date of the range, inclusive.
+        max_workers: The maximum number of days fetched at the same time.
+        credentials: The member credentials. Defaults to the credentials
+            configured in the environment.
+
+    Yields:
+        Each date with its classes, in the order the days finish fetching.
+
+    Raises:
+        ValueError: If the range ends before it starts or `max_workers` is not
+            positive.
+    """
+    if end < start:
+        raise ValueError(f"Date range ends before it starts: {start} to {end}")
+    if max_workers <= 0:
+        raise ValueError("max_workers must be a positive integer")
+    dates: list[datetime.date] = [
+        start + datetime.timedelta(days=offset) for offset in range((end - start).days + 1)
+    ]
+    executor = ThreadPoolExecutor(max_workers=min(max_workers, len(dates)))
+    try:
+        futures: dict[Future[list[ClassSnapshot]], datetime.date] = {
+            executor.submit(
+                contextvars.copy_context().run, _get_day_snapshots, date, credentials
+            ): date
+            for date in dates
+        }
+        for future in as_completed(futures):
+            yield futures[future], future.result()
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def get_class_at(
+    date: datetime.date,
+    class_time: str,
+    class_types: list[str],
+    *,
+    credentials: RegyboxCredentials | None = None,
 ) -> Class:
+    """Fetch the class at a given date and time, parsing only that class.
+
+    Args:
+        date: The date of the class.
+        class_time: The class start time in HH:MM format.
+        class_types: The candidate class types, in order of preference.
+        credentials: The member credentials. Defaults to the credentials
+            configured in the environment.
+
+    Returns:
+        The class matching the first possible class type.
+
+    Raises:
+        ClassNotFoundError: If none of the class types match a class.
+    """
+    classes: list[Class] = get_classes(
+        date.year,
+        date.month,
+        date.day,
+        class_time=class_time,
+        class_types=class_types,
+        credentials=credentials,
+    )
+    for class_type in class_types:
+        try:
+            return pick_class(
+                classes, class_time=class_time, class_type=class_type, class_date=date.isoformat()
+            )
+        except ClassNotFoundError:
+            continue
+    raise ClassNotFoundError(
+        class_type=class_types[0] if class_types else "",
+        class_time=class_time,
+        class_date=date.isoformat(),
+    )
+
+
+def _extract_slot_blocks(res_html: str, slot_id: int) -> list[str]:
+    """Cut the class blocks of one time slot out of a classes page.
+
+    Args:
+        res_html: The HTML content of the classes page.
+        slot_id: The start timestamp in seconds that identifies the slot.
+
+    Returns:
+        The raw HTML of every class block starting in the slot.
+    """
+    blocks: list[str] = []
+    for match in re.finditer(rf"id=[\"']?feed_time_slot{slot_id}\b", res_html):
+        start: int = res_html.rfind("<div", 0, match.start())
+        depth: int = 0
+        for div in DIV_TAG_PATTERN.finditer(res_html, start):
+            depth += -1 if div.group(1) else 1
+            if depth == 0:
+                blocks.append(res_html[start : div.end()])
+                break
+    return blocks
+
+
+def get_slot_classes(
+    year: int,
+    month: int,
+    day: int,
+    *,
+    start: str,
+    class_types: list[str] | None = None,
+    credentials: RegyboxCredentials | None = None,
+) -> list[Class]:
+    """Fetch only the classes starting at a given time on a specific date.
+
+    Unlike `get_classes`, the classes page is fetched once without retrying
+    empty responses, and only the blocks of the requested time slot are
+    parsed. This keeps the enrollment critical path down to one round trip,
+    which is shared with identical concurrent fetches of the page.
+
+    Args:
+        year: The year of the date.
+        month: The month of the date.
+        day: The day of the date.
+        start: The class start time in HH:MM format.
+        class_types: Optional candidate class types; blocks of other class
+            types are skipped before being parsed.
+        credentials: The member credentials. Defaults to the credentials
+            configured in the environment.
+
+    Returns:
+        The classes starting at the given time, which may be empty.
+    """
+    hour, minute = (int(part) for part in start.split(":"))
+    slot_id: int = int(
+        datetime.datetime(year, month, day, hour, minute, tzinfo=TIMEZONE).timestamp()
+    )
+    timestamp: int = _get_classes_timestamp(year, month, day)
+
+    def fetch() -> tuple[str, ClockSample | None]:
+        with capturing_sample() as captured:
+            html: str = get_classes_html(timestamp, credentials=credentials)
+        return html, captured.sample
+
+    res_html, sample = _CLASSES_HTML_FLIGHTS.do(
+        _get_classes_key(timestamp, credentials), fetch, fresh_for=_shared_pages_fresh_for.get()
+    )
+    classes: list[Class] = []
+    for block in _extract_slot_blocks(res_html, slot_id):
+        classes.extend(
+            Class(tag, clock_sample=sample)
+            for tag in parse_class_blocks(block)
+            if _block_may_match(tag, class_time=None, class_types=class_types)
+        )
+    return classes
+
+
+async def async_get_classes(
+    year: int, month: int, day: int, *, session: AsyncRegyboxSession
+) -> list[Class]:
+    """Fetch all classes for a specific date using an asyncio session.
+
+    Args:
+        year: The year of the date.
+        month: The month of the date.
+        day: The day of the date.
+        session: The asyncio session to send the requests with.
+
+    Returns:
+        A list of Class objects for the specified date.
+
+    Raises:
+        NoClassesFoundError: If no classes are found for the specified date.
+    """
+    tags: list[Tag] = await _async_get_classes_tags_with_retry(
+        session, _get_classes_timestamp(year, month, day)
+    )
+    if not tags:
+        raise NoClassesFoundError(class_date=f"{year}-{month}-{day}")
+    return [Class(tag) for tag in tags]
+
+
+def pick_class(  # noqa: UP047
+    classes: list[ClassT], *, class_time: str, class_type: str, class_date: str
+) -> ClassT:
     """Pick a class from the given list based on the specified criteria.
 
     Args:
@@ -0,0 +1,210 @@
+"""Estimate the offset between the local clock and the Regybox server clock.
+
+The ServerClock class narrows the offset from the one-second ``Date`` headers
+of many responses, and `capturing_sample` keeps the sample of one response.
+"""
+
+import contextvars
+import datetime
+import email.utils
+import threading
+import time
+from collections import deque
+from collections.abc import Generator
+from contextlib import contextmanager
+from dataclasses import dataclass
+
+from regybox.common import LOGGER
+from regybox.utils.singleton import Singleton
+
+CLOCK_MAX_SAMPLES: int = 32
+DATE_HEADER_RESOLUTION: float = 1.0
+
+
+@dataclass(frozen=True)
+class ClockSample:
+    """One observation of the server clock.
+
+    Attributes:
+        server_time: The server time from the ``Date`` header, as a Unix
+            timestamp truncated to the second.
+        sent_at: The local Unix time at which the request was sent.
+        received_at: The local Unix time at which the response was received.
+    """
+
+    server_time: float
+    sent_at: float
+    received_at: float
+
+    @property
+    def min_offset(self) -> float:
+        """The smallest server clock offset consistent with this sample."""
+        return self.server_time - self.received_at
+
+    @property
+    def max_offset(self) -> float:
+        """The largest server clock offset consistent with this sample."""
+        return self.server_time + DATE_HEADER_RESOLUTION - self.sent_at
+
+
+@dataclass
+class CapturedSample:
+    """The sample of the last response received in a `capturing_sample`.
+
+    Attributes:
+        sample: The sample, or None if no response with a valid ``Date``
+            header was received.
+    """
+
+    sample: ClockSample | None = None
+
+
+_captured: contextvars.ContextVar[CapturedSample | None] = contextvars.ContextVar(
+    "regybox_captured_sample", default=None
+)
+
+
+@contextmanager
+def capturing_sample() -> Generator[CapturedSample]:
+    """Capture the sample of the last response received inside the context.
+
+    Responses received inside a nested context are only captured by it, so
+    that a fetch running in another thread with a copy of the context, such
+    as a hedged request, does not overwrite the sample of the fetch that was
+    used. See `capture_sample` to hand a sample on to the enclosing context.
+
+    Yields:
+        The captured sample, set once the response is received.
+    """
+    captured = CapturedSample()
+    token: contextvars.Token[CapturedSample | None] = _captured.set(captured)
+    try:
+        yield captured
+    finally:
+        _captured.reset(token)
+
+
+def capture_sample(sample: ClockSample | None) -> None:
+    """Set the sample captured by the current `capturing_sample` context.
+
+    Args:
+        sample: The sample of the response the current context received, if
+            any. Outside of a `capturing_sample` context, it is dropped.
+    """
+    captured: CapturedSample | None = _captured.get()
+    if captured is not None:
+        captured.sample = sample
+
+
+@dataclass(frozen=True)
+class ClockOffset:
+    """An estimate of the server clock offset.
+
+    Attributes:
+        offset: The number of seconds to add to the local time to get the
+            server time.
+        error: The maximum error of the offset, in seconds.
+        samples: The number of samples used for the estimate.
+    """
+
+    offset: float
+    error: float
+    samples: int
+
+
+class ServerClock(metaclass=Singleton):
+    """Track the Regybox server clock from response ``Date`` headers.
+
+    Only the most recent `CLOCK_MAX_SAMPLES` samples are kept. If they stop
+    being consistent with each other, for instance because the local clock was
+    adjusted, only the latest sample is trusted.
+    """
+
+    def __init__(self) -> None:
+        """Initialize a new instance of the ServerClock class."""
+        self._samples: deque[ClockSample] = deque(maxlen=CLOCK_MAX_SAMPLES)
+        self._lock: threading.Lock = threading.Lock()
+
+    @property
+    def last_sample(self) -> ClockSample | None:
+        """The most recent sample, if any."""
+        with self._lock:
+            return self._samples[-1] if self._samples else None
+
+    def add_sample(self, sample: ClockSample) -> None:
+        """Add a sample of the server clock.
+
+        Args:
+            sample: The sample to add.
+        """
+        with self._lock:
+            self._samples.append(sample)
+
+    def record_response(self, date_header: object, elapsed: object) -> None:
+        """Record a sample from a response that was just received.
+
+        The sample is also captured by the current `capturing_sample` context.
+        Responses without a valid ``Date`` header or round-trip time are
+        ignored, and captured as having no sample.
+
+        Args:
+            date_header: The value of the response ``Date`` header.
+            elapsed: The time between sending the request and receiving the
+                response headers.
+        """
+        capture_sample(None)
+        if not isinstance(date_header, str) or not isinstance(elapsed, datetime.timedelta):
+            return
+        try:
+            server_time: float = email.utils.parsedate_to_datetime(date_header).timestamp()
+        except (TypeError, ValueError):
+            LOGGER.debug(f"Ignoring unparseable Date header: {date_header!r}")
+            return
+        received_at: float = time.time()
+        sample = ClockSample(
+            server_time=server_time,
+            sent_at=received_at - elapsed.total_seconds(),
+            received_at=received_at,
+        )
+        self.add_sample(sample)
+        capture_sample(sample)
+
+    def estimate(self) -> ClockOffset | None:
+        """Estimate the server clock offset from the collected samples.
+
+        Returns:
+            The offset estimate, or None if no samples were collected.
+        """
+        with self._lock:
+            samples: list[ClockSample] = list(self._samples)
+        if not samples:
+            return None
+        min_offset: float = max(sample.min_offset for sample in samples)
+        max_offset: float = min(sample.max_offset for sample in samples)
+        if min_offset > max_offset:
+            LOGGER.debug("Server clock samples are inconsistent; using the latest one only")
+            samples = samples[-1:]
+            min_offset, max_offset = samples[0].min_offset, samples[0].max_offset
+        return ClockOffset(
+            offset=(min_offset + max_offset) / 2,
+            error=(max_offset - min_offset) / 2,
+            samples=len(samples),
+        )
+
+    def seconds_until(self, server_time: float) -> float | None:
+        """Compute how long until the server clock reaches a given time.
+
+        The earliest local instant consistent with the error bound is used, so
+        that a request sent then is never late.
+
+        Args:
+            server_time: The server time as a Unix timestamp.
+
+        Returns:
+            The number of seconds until the given server time, or None if no
+            samples were collected.
+        """
+        estimate: ClockOffset | None = self.estimate()
+        if estimate is None:
+            return None
+        return server_time - estimate.offset - estimate.error - time.time()
@@ -9,6 +9,33 @@ Variables:
     REGYBOX_USER: The Regybox user, used to create the Regybox website cookie.
     PHPSESSID: The PHP session ID, used to create the Regybox website cookie.
     CALENDAR_URL: The URL of the calendar.
+    HTML_BACKEND: The HTML backend used to parse classes pages, or empty to
+        use the fastest installed one.
+    TRANSPORT: The transport used for Regybox traffic, ``http2`` or
+        ``http1``, or empty to use HTTP/2 when it is installed.
+    CLASSES_FRESHNESS_SECONDS: The number of seconds a fetched classes page is
+        reused for by identical fetches, or 0 to only share fetches in
+        flight.
+    RATE_LIMIT: The number of Regybox requests per second the process may
+        send, or 0 to not limit them.
+    RATE_LIMIT_BURST: The number of Regybox requests the process may send at
+        once.
+    CIRCUIT_BREAKER_THRESHOLD: The number of consecutive failures of an
+        upstream service after which requests to it fail fast, or 0 to never
+        stop sending them.
+    CACHE_DIR: The directory of the files kept across runs,
+        ``$XDG_CACHE_HOME/regybox``.
+    SESSION_STORE: The path of the file that persists Regybox sessions across
+        runs, or empty to disable it. Defaults to ``sessions.json`` in
+        CACHE_DIR.
+    CLASS_CACHE: The path of the file that caches class listings across runs,
+        or empty to only cache them in memory. Defaults to ``classes.json``
+        in CACHE_DIR.
+    SCHEDULE_STATE: The path of the file that persists the jobs of the
+        scheduler daemon across restarts, or empty to keep them in memory.
+        Defaults to ``schedule.json`` in CACHE_DIR.
+    CANCELLATION_DEADLINE_MINUTES: The number of minutes before a class
+        starts until which members can cancel without a penalty.
 
 Note:
     The module loads environment variables from a .env file using the dotenv
@@ -17,6 +44,7 @@ Note:
 
 import logging
 import os
+from pathlib import Path
 from zoneinfo import ZoneInfo
 
 from dotenv import find_dotenv, load_dotenv
@@ -34,3 +62,16 @@ TIMEZONE: ZoneInfo = ZoneInfo("Europe/Lisbon")
 REGYBOX_USER: str = os.environ["REGYBOX_USER"]
 PHPSESSID: str = os.environ["PHPSESSID"]
 CALENDAR_URL: str = os.environ.get("CALENDAR_URL", "")
+HTML_BACKEND: str = os.environ.get("REGYBOX_HTML_BACKEND", "")
+TRANSPORT: str = os.environ.get("REGYBOX_TRANSPORT", "")
+CLASSES_FRESHNESS_SECONDS: float = float(os.environ.get("REGYBOX_CLASSES_FRESHNESS_SECONDS") or 0)
+RATE_LIMIT: float = float(os.environ.get("REGYBOX_RATE_LIMIT") or 5)
+RATE_LIMIT_BURST: float = float(os.environ.get("REGYBOX_RATE_LIMIT_BURST") or 10)
+CIRCUIT_BREAKER_THRESHOLD: int = int(os.environ.get("REGYBOX_CIRCUIT_BREAKER_THRESHOLD") or 5)
+CACHE_DIR: Path = Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache") / "regybox"
+SESSION_STORE: str = os.environ.get("REGYBOX_SESSION_STORE", str(CACHE_DIR / "sessions.json"))
+CLASS_CACHE: str = os.environ.get("REGYBOX_CLASS_CACHE", str(CACHE_DIR / "classes.json"))
+SCHEDULE_STATE: str = os.environ.get("REGYBOX_SCHEDULE_STATE", str(CACHE_DIR / "schedule.json"))
+CANCELLATION_DEADLINE_MINUTES: float = float(
+    os.environ.get("REGYBOX_CANCELLATION_DEADLINE_MINUTES") or 60
+)
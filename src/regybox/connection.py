@@ -1,33 +1,70 @@
 """Provide functionality for managing a connection to the Regybox website.
 
 This module defines the RegyboxSession class, which represents a session with
-the Regybox website. It also provides functions for retrieving HTML content
-from URLs and generating parameters for class retrieval requests.
+the Regybox website over the transport selected in `regybox.transport`, and the
+SessionPool class, which shares one session per set of member credentials
+across the process. Every request waits for the process-wide rate limiter, see
+`regybox.rate_limit`, and fails fast while Regybox is failing, see
+`regybox.circuit_breaker`. It also provides functions for retrieving HTML
+content from URLs and generating parameters for class retrieval requests.
 """
 
-import re
-from urllib.parse import urljoin
+import asyncio
+import codecs
+import datetime
+import hashlib
+import itertools
+import threading
+import time
+from collections.abc import Iterator
+from dataclasses import dataclass, field
+from http.cookiejar import Cookie, CookieJar, DefaultCookiePolicy
+from types import TracebackType
+from typing import Any, Self, cast, override
+from urllib.parse import urljoin, urlparse
+from urllib.request import Request
 
+import httpx
 import requests
 from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import ConnectionPool
+from urllib3.exceptions import MaxRetryError
+from urllib3.response import BaseHTTPResponse, HTTPResponse
 from urllib3.util.retry import Retry
 
-from regybox.common import PHPSESSID, REGYBOX_USER
-from regybox.exceptions import RegyboxLoginError
+from regybox.circuit_breaker import CircuitBreaker, get_circuit_breaker
+from regybox.clock import ClockSample, ServerClock, capture_sample, capturing_sample
+from regybox.common import LOGGER, PHPSESSID, REGYBOX_USER
+from regybox.deadline import attempt_timeout, fits_in_deadline, remaining_seconds
+from regybox.exceptions import DeadlineExceededError, RegyboxLoginError, ServiceUnavailableError
+from regybox.hedging import LatencyTracker, hedge_delay, hedged
+from regybox.rate_limit import RateLimiter
+from regybox.session_store import SessionStore, StoredCookie, StoredSession, get_session_store
+from regybox.transport import get_adapter, get_transport, over_http1
 from regybox.utils.singleton import Singleton
 
 DOMAIN: str = "https://www.regybox.pt/app/app_nova/"
+SERVICE_NAME: str = "Regybox"
+COOKIE_DOMAIN: str = urlparse(DOMAIN).hostname or ""
 DEFAULT_TIMEOUT_SECONDS: int = 15
+LOGIN_PAGE_MARKER: str = "app/app_nova/login.php"
+STREAM_CHUNK_SIZE: int = 16 * 1024
+WARMUP_TIMEOUT_SECONDS: int = 5
 RETRY_TOTAL: int = 10
 RETRY_BACKOFF_FACTOR: float = 0.05
 RETRY_STATUS_CODES: frozenset[int] = frozenset({429, 500, 502, 503, 504})
+RETRY_ALLOWED_METHODS: frozenset[str] = frozenset({
+    "HEAD",
+    "GET",
+    "POST",
+    "PUT",
+    "DELETE",
+    "OPTIONS",
+})
 HEADERS: dict[str, str] = {
     "Accept": "text/html, */*; q=0.01",
     "Accept-Encoding": "gzip, deflate, br",
     "Accept-Language": "en-US,en;q=0.9",
-    "Cookie": (
-        f"PHPSESSID={PHPSESSID}; regybox_boxes=%2A{REGYBOX_USER}; regybox_user={REGYBOX_USER}"
-    ),
     "DNT": "1",
     "Host": "www.regybox.pt",
     "Referer": DOMAIN,
@@ -45,31 +82,307 @@ HEADERS: dict[str, str] = {
 }
 
 
-class RegyboxSession(requests.Session, metaclass=Singleton):
-    """A singleton class representing a session with the Regybox website.
+@dataclass(frozen=True)
+class RegyboxCredentials:
+    """The credentials of a Regybox member.
 
-    This class extends the `requests.Session` class and implements a singleton
-    pattern to ensure that only one instance of the session is created. This is
-    needed since every request to the Regybox website requires a valid session
-    to have been set.
+    Attributes:
+        user: The Regybox user, from the ``regybox_user`` cookie.
+        phpsessid: The PHP session ID, from the ``PHPSESSID`` cookie.
     """
 
-    def __init__(self, *, user: str = REGYBOX_USER) -> None:
-        """Initialize a new instance of the RegyboxSession class."""
-        super().__init__()
-        retry_policy = Retry(
-            total=RETRY_TOTAL,
-            connect=RETRY_TOTAL,
-            read=RETRY_TOTAL,
-            status=RETRY_TOTAL,
-            backoff_factor=RETRY_BACKOFF_FACTOR,
-            status_forcelist=RETRY_STATUS_CODES,
-            allowed_methods=frozenset({"HEAD", "GET", "POST", "PUT", "DELETE", "OPTIONS"}),
+    user: str
+    phpsessid: str = field(repr=False)
+
+    @property
+    def cookies(self) -> dict[str, str]:
+        """The Regybox website cookies for these credentials."""
+        return {
+            "PHPSESSID": self.phpsessid,
+            "regybox_boxes": f"%2A{self.user}",
+            "regybox_user": self.user,
+        }
+
+    @property
+    def key(self) -> str:
+        """A key that identifies these credentials without revealing them."""
+        digest: str = hashlib.sha256(self.phpsessid.encode()).hexdigest()[:16]
+        return f"{self.user}:{digest}"
+
+
+def get_default_credentials() -> RegyboxCredentials:
+    """Get the credentials configured in the environment.
+
+    Returns:
+        The credentials built from ``REGYBOX_USER`` and ``PHPSESSID``.
+    """
+    return RegyboxCredentials(user=REGYBOX_USER, phpsessid=PHPSESSID)
+
+
+class DeadlineRetry(Retry):
+    """A urllib3 retry policy that stops retrying once the deadline is near.
+
+    Outside of a deadline it behaves like `Retry`. Inside one, a retry is only
+    made while its backoff and the retried attempt fit in the remaining budget,
+    see `regybox.deadline.fits_in_deadline`. With a `rate_limit_key`, every
+    retry waits for a token from the rate limiter, like the first attempt does
+    in `RegyboxSession.send`.
+    """
+
+    rate_limit_key: str | None = None
+
+    @override
+    def new(self, **kw: Any) -> Self:
+        """Return a copy of the retry policy with the given changes.
+
+        Returns:
+            The new retry policy, limited by the same rate limit key.
+        """
+        retry: Self = super().new(**kw)
+        retry.rate_limit_key = self.rate_limit_key
+        return retry
+
+    def increment(
+        self,
+        method: str | None = None,
+        url: str | None = None,
+        response: BaseHTTPResponse | None = None,
+        error: Exception | None = None,
+        _pool: ConnectionPool | None = None,
+        _stacktrace: TracebackType | None = None,
+    ) -> Self:
+        """Return a new retry policy with the retry counters incremented.
+
+        Raises:
+            MaxRetryError: If the retries are exhausted, or with a
+                DeadlineExceededError reason if the retry does not fit in the
+                deadline.
+        """
+        retry: Self = super().increment(method, url, response, error, _pool, _stacktrace)
+        if not fits_in_deadline(retry.get_backoff_time()):
+            raise MaxRetryError(
+                cast("ConnectionPool", _pool),
+                url,
+                DeadlineExceededError(max(0.0, remaining_seconds() or 0.0)),
+            )
+        if retry.rate_limit_key is not None:
+            RateLimiter().acquire(retry.rate_limit_key)
+        return retry
+
+
+def get_retry_policy(*, rate_limit_key: str | None = None) -> DeadlineRetry:
+    """Build the retry policy shared by the blocking and asyncio sessions.
+
+    Args:
+        rate_limit_key: The key of the member whose retries wait for the rate
+            limiter, see `DeadlineRetry`. Defaults to no rate limiting.
+
+    Returns:
+        A fresh urllib3 retry policy for transient connection and status
+        errors, bounded by the current deadline.
+    """
+    retry = DeadlineRetry(
+        total=RETRY_TOTAL,
+        connect=RETRY_TOTAL,
+        read=RETRY_TOTAL,
+        status=RETRY_TOTAL,
+        backoff_factor=RETRY_BACKOFF_FACTOR,
+        status_forcelist=RETRY_STATUS_CODES,
+        allowed_methods=RETRY_ALLOWED_METHODS,
+    )
+    retry.rate_limit_key = rate_limit_key
+    return retry
+
+
+def set_cookie(jar: CookieJar, name: str, value: str, *, domain: str, path: str = "/") -> None:
+    """Set a cookie in a cookie jar, like `requests.cookies.create_cookie`.
+
+    Args:
+        jar: The cookie jar to set the cookie in.
+        name: The name of the cookie.
+        value: The value of the cookie.
+        domain: The domain the cookie is sent to.
+        path: The path the cookie is sent to.
+    """
+    jar.set_cookie(
+        Cookie(
+            version=0,
+            name=name,
+            value=value,
+            port=None,
+            port_specified=False,
+            domain=domain,
+            domain_specified=bool(domain),
+            domain_initial_dot=domain.startswith("."),
+            path=path,
+            path_specified=True,
+            secure=False,
+            expires=None,
+            discard=True,
+            comment=None,
+            comment_url=None,
+            rest={},
+            rfc2109=False,
         )
-        adapter: HTTPAdapter = HTTPAdapter(max_retries=retry_policy)
-        self.mount("http://", adapter)
-        self.mount("https://", adapter)
-        self.set_session(user=user)  # only called once since this is a singleton
+    )
+
+
+class CredentialsCookiePolicy(DefaultCookiePolicy):
+    """A cookie policy that keeps responses from replacing member credentials.
+
+    The configured ``PHPSESSID`` is the session the member logged in with, and
+    the pool and store key sessions by it, so a ``Set-Cookie`` for it or for
+    the other credential cookies is ignored.
+    """
+
+    def __init__(self, credentials: RegyboxCredentials) -> None:
+        """Initialize a new instance of the CredentialsCookiePolicy class.
+
+        Args:
+            credentials: The member credentials to keep.
+        """
+        super().__init__()
+        self.names: frozenset[str] = frozenset(credentials.cookies)
+
+    @override
+    def set_ok(self, cookie: Cookie, request: Request) -> bool:
+        """Check whether a cookie set by a response may be stored.
+
+        Returns:
+            False for a credential cookie, otherwise whether the default policy
+            accepts the cookie.
+        """
+        return cookie.name not in self.names and super().set_ok(cookie, request)
+
+
+def is_login_page(html: str) -> bool:
+    """Check whether a response body is the Regybox login redirect.
+
+    Args:
+        html: The decoded response body.
+
+    Returns:
+        True if the response redirects to the login page.
+    """
+    return LOGIN_PAGE_MARKER in html
+
+
+def _incremental_decoder(encoding: str | None) -> codecs.IncrementalDecoder:
+    try:
+        return codecs.getincrementaldecoder(encoding or "utf-8")(errors="replace")
+    except LookupError:
+        return codecs.getincrementaldecoder("utf-8")(errors="replace")
+
+
+def iter_response_text(res: requests.Response) -> Iterator[str]:
+    """Decode a streamed response body incrementally.
+
+    The body is checked for the login redirect while it is read, including
+    across chunk boundaries, and reading stops as soon as it is found. The
+    response is closed once the body is read or the iteration stops.
+
+    Args:
+        res: A response requested with ``stream=True``.
+
+    Yields:
+        The decoded chunks of the body.
+
+    Raises:
+        RegyboxLoginError: If the body redirects to the login page.
+    """
+    decoder: codecs.IncrementalDecoder = _incremental_decoder(res.encoding)
+    overlap: int = len(LOGIN_PAGE_MARKER) - 1
+    tail: str = ""
+    try:
+        for chunk in itertools.chain(res.iter_content(STREAM_CHUNK_SIZE), [None]):
+            text: str = decoder.decode(chunk or b"", final=chunk is None)
+            if is_login_page(tail + text):
+                raise RegyboxLoginError
+            tail = (tail + text)[-overlap:]
+            if text:
+                yield text
+    finally:
+        res.close()
+
+
+class RegyboxSession(requests.Session):
+    """A session with the Regybox website for one member.
+
+    This class extends the `requests.Session` class with a retrying connection
+    adapter and a cookie jar holding the member credentials, from which the
+    ``Cookie`` header of every request is built. Responses may add cookies to
+    the jar but not replace the credentials, see `CredentialsCookiePolicy`.
+    Every request to the Regybox website requires a valid session to have been
+    set, which `ensure_session` does once per session. With a session store, a
+    session set by an earlier run is reused until `reset_session` is called.
+    Sessions are usually shared through a SessionPool.
+    """
+
+    def __init__(
+        self,
+        credentials: RegyboxCredentials | None = None,
+        *,
+        store: SessionStore | None = None,
+    ) -> None:
+        """Initialize a new instance of the RegyboxSession class.
+
+        Args:
+            credentials: The member credentials. Defaults to the credentials
+                configured in the environment.
+            store: Optional store to reuse and persist the session with.
+        """
+        super().__init__()
+        self.credentials: RegyboxCredentials = credentials or get_default_credentials()
+        retry: Retry = get_retry_policy(rate_limit_key=self.credentials.key)
+        self.mount("http://", HTTPAdapter(max_retries=retry))
+        self.mount("https://", get_adapter(retry))
+        self.user: str = self.credentials.user
+        for name, value in self.credentials.cookies.items():
+            set_cookie(self.cookies, name, value, domain=COOKIE_DOMAIN)
+        self.cookies.set_policy(CredentialsCookiePolicy(self.credentials))
+        self._session_lock: threading.Lock = threading.Lock()
+        self._session_is_set: bool = False
+        self._store: SessionStore | None = store
+        stored: StoredSession | None = store.load(self.credentials.key) if store else None
+        if stored is not None:
+            for cookie in stored.cookies:
+                set_cookie(
+                    self.cookies,
+                    cookie["name"],
+                    cookie["value"],
+                    domain=cookie["domain"],
+                    path=cookie["path"],
+                )
+            self._session_is_set = True
+            LOGGER.debug("Reusing the stored Regybox session")
+
+    def ensure_session(self) -> None:
+        """Set the session for the Regybox API unless it was already set."""
+        with self._session_lock:
+            if self._session_is_set:
+                return
+            self.set_session(user=self.user)
+            self._session_is_set = True
+            if self._store is not None:
+                cookies: list[StoredCookie] = [
+                    StoredCookie(
+                        name=cookie.name,
+                        value=cookie.value or "",
+                        domain=cookie.domain,
+                        path=cookie.path,
+                    )
+                    for cookie in self.cookies
+                ]
+                self._store.save(
+                    self.credentials.key, StoredSession(cookies=cookies, validated_at=time.time())
+                )
+
+    def reset_session(self) -> None:
+        """Forget the session so that `ensure_session` sets it again."""
+        with self._session_lock:
+            self._session_is_set = False
+            if self._store is not None:
+                self._store.discard(self.credentials.key)
 
     def set_session(self, *, user: str) -> None:
         """Set the session for the Regybox API.
@@ -84,6 +397,63 @@ class RegyboxSession(requests.Session, metaclass=Singleton):
             timeout=DEFAULT_TIMEOUT_SECONDS,
         ).raise_for_status()
 
+    def warm_up(self) -> None:
+        """Leave a verified live connection to Regybox in the connection pool.
+
+        The Regybox session is set again over the pooled keep-alive connection.
+        If the server has closed that connection while idle, urllib3 discards
+        it and performs a fresh TLS handshake, so a successful warm-up means
+        the next request can reuse a live connection.
+
+        Raises:
+            requests.RequestException: If the warm-up request fails.
+        """
+        try:
+            self.get(
+                urljoin(DOMAIN, "set_session.php"),
+                headers=HEADERS,
+                params=self.get_session_params(user=self.user),
+                timeout=WARMUP_TIMEOUT_SECONDS,
+            ).raise_for_status()
+        except requests.RequestException:
+            LOGGER.warning("Unable to warm up connection to Regybox", exc_info=True)
+            raise
+
+    def send(self, request: requests.PreparedRequest, **kwargs: Any) -> requests.Response:  # noqa: ANN401
+        """Send a prepared request and sample the server clock and latency.
+
+        The request fails fast while the Regybox circuit breaker is open, see
+        `regybox.circuit_breaker`, and otherwise waits for a token from the
+        rate limiter, see `regybox.rate_limit`, as does every retry of the
+        adapter. Its outcome, once its retries are exhausted, is recorded by
+        the circuit breaker.
+
+        Args:
+            request: The prepared request to send.
+            **kwargs: Additional arguments for `requests.Session.send`.
+
+        Returns:
+            The response to the request.
+
+        Raises:
+            requests.ConnectionError: If the request cannot connect.
+            requests.Timeout: If the request times out.
+            requests.exceptions.RetryError: If the status retries are
+                exhausted.
+        """
+        breaker: CircuitBreaker = get_circuit_breaker(SERVICE_NAME)
+        breaker.before_request()
+        RateLimiter().acquire(self.credentials.key)
+        try:
+            res: requests.Response = super().send(request, **kwargs)
+        except (requests.ConnectionError, requests.Timeout, requests.exceptions.RetryError):
+            breaker.record_failure()
+            raise
+        breaker.record_status(res.status_code)
+        ServerClock().record_response(res.headers.get("Date"), res.elapsed)
+        LatencyTracker().record(res.elapsed.total_seconds())
+        return res
+
     @staticmethod
     def get_session_params(*, user: str) -> dict[str, str]:
         """Fetch the session parameters for the Regybox API.
@@ -101,27 +471,205 @@ class RegyboxSession(requests.Session, metaclass=Singleton):
         }
 
 
-def get_url_html(url: str, *, params: dict[str, str] | None = None) -> str:
+class SessionPool(metaclass=Singleton):
+    """A pool of Regybox sessions keyed by member credentials.
+
+    Each member gets their own RegyboxSession, with its own cookie jar and
+    connection pool, so that one process can act for several members. The
+    Regybox session of a member is set the first time their session is used.
+    """
+
+    def __init__(self) -> None:
+        """Initialize a new instance of the SessionPool class."""
+        self._sessions: dict[RegyboxCredentials, RegyboxSession] = {}
+        self._lock: threading.Lock = threading.Lock()
+
+    def __len__(self) -> int:
+        """Return the number of pooled sessions."""
+        return len(self._sessions)
+
+    def get(self, credentials: RegyboxCredentials) -> RegyboxSession:
+        """Get the session of a member, creating and setting it if needed.
+
+        Args:
+            credentials: The member credentials.
+
+        Returns:
+            The session of the member, with the Regybox session set.
+        """
+        with self._lock:
+            session: RegyboxSession | None = self._sessions.get(credentials)
+            if session is None:
+                session = self._sessions[credentials] = RegyboxSession(
+                    credentials, store=get_session_store()
+                )
+        session.ensure_session()
+        return session
+
+    def discard(self, credentials: RegyboxCredentials) -> None:
+        """Close and remove the session of a member, if it is pooled.
+
+        Args:
+            credentials: The member credentials.
+        """
+        with self._lock:
+            session: RegyboxSession | None = self._sessions.pop(credentials, None)
+        if session is not None:
+            session.close()
+
+    def close(self) -> None:
+        """Close and remove every pooled session."""
+        with self._lock:
+            sessions: list[RegyboxSession] = list(self._sessions.values())
+            self._sessions.clear()
+        for session in sessions:
+            session.close()
+
+
+def get_session(credentials: RegyboxCredentials | None = None) -> RegyboxSession:
+    """Get the pooled session of a member.
+
+    Args:
+        credentials: The member credentials. Defaults to the credentials
+            configured in the environment.
+
+    Returns:
+        The session of the member, with the Regybox session set.
+    """
+    return SessionPool().get(credentials or get_default_credentials())
+
+
+def warm_up_connection(credentials: RegyboxCredentials | None = None) -> bool:
+    """Warm up a pooled Regybox session ahead of a latency-critical request.
+
+    Args:
+        credentials: The member credentials. Defaults to the credentials
+            configured in the environment.
+
+    Returns:
+        True if a live connection was verified, False if the warm-up failed or
+        Regybox is failing, see `regybox.circuit_breaker`.
+    """
+    start: float = time.monotonic()
+    try:
+        get_session(credentials).warm_up()
+    except (requests.RequestException, ServiceUnavailableError):
+        return False
+    LOGGER.debug(f"Warmed up connection to Regybox in {time.monotonic() - start:.3f} seconds")
+    return True
+
+
+def get_url_html(
+    url: str,
+    *,
+    params: dict[str, str] | None = None,
+    credentials: RegyboxCredentials | None = None,
+) -> str:
     """Retrieve the HTML content of a given URL.
 
+    See `stream_url_html`, which reads the body.
+
     Args:
         url: The URL to retrieve the HTML content from.
         params: Optional parameters to include in the request.
+        credentials: The member credentials. Defaults to the credentials
+            configured in the environment.
 
     Returns:
         The HTML content of the URL as a string.
+    """
+    return "".join(stream_url_html(url, params=params, credentials=credentials))
+
+
+def stream_url_html(
+    url: str,
+    *,
+    params: dict[str, str] | None = None,
+    credentials: RegyboxCredentials | None = None,
+) -> Iterator[str]:
+    """Stream the HTML content of a given URL as it is read.
+
+    If Regybox redirects to the login page, for instance because a stored
+    session expired, the session is set again and the request is retried once.
+    The redirect is detected as soon as it is read, see `iter_response_text`.
+    Inside a deadline, see `regybox.deadline`, every attempt is timed out
+    within the remaining budget and connection failures are retried with a
+    shorter timeout while the budget allows it.
+
+    Args:
+        url: The URL to retrieve the HTML content from.
+        params: Optional parameters to include in the request.
+        credentials: The member credentials. Defaults to the credentials
+            configured in the environment.
+
+    Yields:
+        The decoded chunks of the HTML content.
 
     Raises:
-        RegyboxLoginError: If the request to the URL fails.
+        RegyboxLoginError: If the response is still the login page after the
+            Regybox session was set again, or if the login redirect is only
+            found after some of the content was yielded.
     """
     query_params: dict[str, str] = params if params is not None else {}
-    res: requests.models.Response = RegyboxSession().get(
-        url, headers=HEADERS, params=query_params, timeout=DEFAULT_TIMEOUT_SECONDS
-    )
-    res.raise_for_status()
-    if re.findall(r"app/app_nova/login.php", res.text):
-        raise RegyboxLoginError
-    return res.text
+    session: RegyboxSession = get_session(credentials)
+    for attempt in range(2):
+        if attempt:
+            LOGGER.info("Regybox session expired; setting it again")
+            session.reset_session()
+            session.ensure_session()
+        res: requests.Response = _get_within_deadline(session, url, params=query_params)
+        try:
+            res.raise_for_status()
+            chunks: Iterator[str] = iter_response_text(res)
+            try:
+                first: str = next(chunks, "")
+            except RegyboxLoginError:
+                continue
+            yield first
+            yield from chunks
+            return
+        finally:
+            res.close()
+    raise RegyboxLoginError
+
+
+def _get_within_deadline(
+    session: RegyboxSession, url: str, *, params: dict[str, str]
+) -> requests.Response:
+    """Send a GET request whose attempts are bounded by the current deadline.
+
+    The session adapter retries an attempt only while the whole attempt
+    timeout still fits in the deadline. Once it gives up, the request is
+    retried here with a timeout shrunk to the remaining budget.
+
+    Returns:
+        The response to the request.
+
+    Raises:
+        requests.ConnectionError: If the connection fails outside of a
+            deadline, or after all retries.
+        requests.Timeout: If the request times out outside of a deadline.
+        DeadlineExceededError: If the deadline passes before a response.
+    """
+    retry: Retry = get_retry_policy()
+    while True:
+        try:
+            with attempt_timeout(DEFAULT_TIMEOUT_SECONDS) as timeout:
+                return session.get(
+                    url, headers=HEADERS, params=params, timeout=timeout, stream=True
+                )
+        except (requests.ConnectionError, requests.Timeout) as e:
+            remaining: float | None = remaining_seconds()
+            if remaining is None:
+                raise
+            try:
+                retry = retry.increment(method="GET", url=url, error=e)
+            except MaxRetryError as max_retries:
+                if isinstance(max_retries.reason, DeadlineExceededError):
+                    raise DeadlineExceededError(max(0.0, remaining)) from e
+                raise e from None
+            LOGGER.warning(f"Request failed with {remaining:.3f} seconds left; retrying")
+            time.sleep(retry.get_backoff_time())
 
 
 def get_classes_params(timestamp: int, *, user: str) -> dict[str, str]:
@@ -145,17 +693,241 @@ def get_classes_params(timestamp: int, *, user: str) -> dict[str, str]:
     }
 
 
-def get_classes_html(timestamp: int, user: str = REGYBOX_USER) -> str:
+def get_classes_html(
+    timestamp: int,
+    user: str | None = None,
+    *,
+    credentials: RegyboxCredentials | None = None,
+) -> str:
     """Retrieve the HTML content of the classes page.
 
+    Fetching the classes page has no side effects, so inside a hedging
+    context, see `regybox.hedging`, a slow fetch is sent again and the first
+    response is used. The hedged fetch is sent over HTTP/1.1, see
+    `over_http1`, so that it does not share the HTTP/2 connection of the
+    slow fetch. Either way, the server clock sample of the response that is
+    used is captured, see `regybox.clock.capturing_sample`.
+
     Args:
         timestamp: The timestamp in milliseconds.
-        user: The user identifier.
+        user: The user identifier. Defaults to the user of the credentials.
+        credentials: The member credentials. Defaults to the credentials
+            configured in the environment.
 
     Returns:
         The HTML content of the classes page as a string.
     """
-    return get_url_html(
+    member: RegyboxCredentials = credentials or get_default_credentials()
+    url: str = urljoin(DOMAIN, "php/aulas/aulas.php")
+    params: dict[str, str] = get_classes_params(timestamp, user=user or member.user)
+
+    def fetch() -> tuple[str, ClockSample | None]:
+        with capturing_sample() as captured:
+            html: str = get_url_html(url, params=params, credentials=member)
+        return html, captured.sample
+
+    def fetch_over_http1() -> tuple[str, ClockSample | None]:
+        with over_http1():
+            return fetch()
+
+    delay: float | None = hedge_delay()
+    html, sample = fetch() if delay is None else hedged(fetch, delay=delay, hedge=fetch_over_http1)
+    capture_sample(sample)
+    return html
+
+
+def stream_classes_html(
+    timestamp: int, *, credentials: RegyboxCredentials | None = None
+) -> Iterator[str]:
+    """Stream the HTML content of the classes page as it is read.
+
+    Unlike `get_classes_html`, the fetch is never hedged, since its content
+    is consumed while it is read.
+
+    Args:
+        timestamp: The timestamp in milliseconds.
+        credentials: The member credentials. Defaults to the credentials
+            configured in the environment.
+
+    Returns:
+        An iterator over the decoded chunks of the classes page.
+    """
+    member: RegyboxCredentials = credentials or get_default_credentials()
+    return stream_url_html(
         urljoin(DOMAIN, "php/aulas/aulas.php"),
-        params=get_classes_params(timestamp, user=user),
+        params=get_classes_params(timestamp, user=member.user),
+        credentials=member,
     )
+
+
+class AsyncRegyboxSession:
+    """An asyncio session with the Regybox website.
+
+    This is the asyncio counterpart of `RegyboxSession`, built on
+    `httpx.AsyncClient` so that a single event loop can poll many dates and
+    accounts at once. It is not a singleton: each instance owns its own
+    connection pool and must be closed, preferably by using it as an async
+    context manager, which also sets the Regybox session on entry.
+    """
+
+    def __init__(
+        self,
+        *,
+        credentials: RegyboxCredentials | None = None,
+        transport: httpx.AsyncBaseTransport | None = None,
+    ) -> None:
+        """Initialize a new instance of the AsyncRegyboxSession class.
+
+        Args:
+            credentials: The member credentials. Defaults to the credentials
+                configured in the environment.
+            transport: Optional httpx transport, mainly useful for testing.
+        """
+        self.credentials: RegyboxCredentials = credentials or get_default_credentials()
+        self.user: str = self.credentials.user
+        cookies = httpx.Cookies()
+        for name, value in self.credentials.cookies.items():
+            cookies.set(name, value, domain=COOKIE_DOMAIN)
+        self.client: httpx.AsyncClient = httpx.AsyncClient(
+            headers=HEADERS,
+            cookies=cookies,
+            timeout=DEFAULT_TIMEOUT_SECONDS,
+            http2=get_transport() == "http2",
+            transport=transport,
+        )
+
+    async def __aenter__(self) -> Self:
+        """Set the Regybox session when entering the context.
+
+        Returns:
+            The session itself.
+        """
+        await self.set_session(user=self.user)
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        """Close the underlying connection pool when leaving the context."""
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        """Close the underlying connection pool."""
+        await self.client.aclose()
+
+    async def set_session(self, *, user: str) -> None:
+        """Set the session for the Regybox API.
+
+        Args:
+            user: The username for the Regybox session.
+        """
+        res: httpx.Response = await self.get(
+            urljoin(DOMAIN, "set_session.php"),
+            params=RegyboxSession.get_session_params(user=user),
+        )
+        res.raise_for_status()
+
+    async def get(self, url: str, *, params: dict[str, str] | None = None) -> httpx.Response:
+        """Send a GET request, retrying with the same policy as RegyboxSession.
+
+        The request fails fast while the Regybox circuit breaker is open, see
+        `regybox.circuit_breaker`, and every attempt waits for a token from
+        the rate limiter, see `regybox.rate_limit`. Like `RegyboxSession.send`,
+        the outcome is recorded by the circuit breaker once, after the retries
+        are exhausted.
+
+        Args:
+            url: The URL to request.
+            params: Optional parameters to include in the request.
+
+        Returns:
+            The final response, which may still carry an error status once the
+            status retries are exhausted.
+
+        Raises:
+            httpx.TransportError: If the connection keeps failing after all
+                retries.
+            DeadlineExceededError: If the deadline passes before a response,
+                see `regybox.deadline`.
+        """
+        breaker: CircuitBreaker = get_circuit_breaker(SERVICE_NAME)
+        retry: Retry = get_retry_policy()
+        breaker.before_request()
+        while True:
+            await RateLimiter().async_acquire(self.credentials.key)
+            sent_at: float = time.monotonic()
+            try:
+                with attempt_timeout(DEFAULT_TIMEOUT_SECONDS) as timeout:
+                    res: httpx.Response = await self.client.get(
+                        url, params=params, timeout=timeout
+                    )
+            except httpx.TransportError as e:
+                try:
+                    retry = retry.increment(method="GET", url=url, error=e)
+                except MaxRetryError as max_retries:
+                    breaker.record_failure()
+                    if isinstance(max_retries.reason, DeadlineExceededError):
+                        raise DeadlineExceededError(max(0.0, remaining_seconds() or 0.0)) from e
+                    raise e from None
+                await asyncio.sleep(retry.get_backoff_time())
+                continue
+            ServerClock().record_response(
+                res.headers.get("Date"),
+                datetime.timedelta(seconds=time.monotonic() - sent_at),
+            )
+            has_retry_after: bool = "Retry-After" in res.headers
+            if not retry.is_retry("GET", res.status_code, has_retry_after):
+                breaker.record_status(res.status_code)
+                return res
+            raw = HTTPResponse(
+                headers=dict(res.headers), status=res.status_code, preload_content=False
+            )
+            try:
+                retry = retry.increment(method="GET", url=url, response=raw)
+            except MaxRetryError:
+                breaker.record_status(res.status_code)
+                return res
+            retry_after: float | None = (
+                retry.get_retry_after(raw) if retry.respect_retry_after_header else None
+            )
+            await res.aclose()
+            await asyncio.sleep(
+                retry_after if retry_after is not None else retry.get_backoff_time()
+            )
+
+    async def get_url_html(self, url: str, *, params: dict[str, str] | None = None) -> str:
+        """Retrieve the HTML content of a given URL.
+
+        Args:
+            url: The URL to retrieve the HTML content from.
+            params: Optional parameters to include in the request.
+
+        Returns:
+            The HTML content of the URL as a string.
+
+        Raises:
+            RegyboxLoginError: If the request to the URL fails.
+        """
+        res: httpx.Response = await self.get(url, params=params if params is not None else {})
+        res.raise_for_status()
+        if is_login_page(res.text):
+            raise RegyboxLoginError
+        return res.text
+
+    async def get_classes_html(self, timestamp: int, user: str | None = None) -> str:
+        """Retrieve the HTML content of the classes page.
+
+        Args:
+            timestamp: The timestamp in milliseconds.
+            user: The user identifier. Defaults to the session user.
+
+        Returns:
+            The HTML content of the classes page as a string.
+        """
+        return await self.get_url_html(
+            urljoin(DOMAIN, "php/aulas/aulas.php"),
+            params=get_classes_params(timestamp, user=user or self.user),
+        )
@@ -0,0 +1,108 @@
+"""Bound Regybox requests by a deadline.
+
+Requests made inside a `deadline` context share one time budget: each attempt
+gets a timeout that fits in it, and a retry is only made while it still fits.
+"""
+
+import contextvars
+from collections.abc import Generator
+from contextlib import contextmanager
+from time import monotonic
+
+from regybox.common import LOGGER
+from regybox.exceptions import DeadlineExceededError
+
+DEADLINE_MIN_ATTEMPT_SECONDS: float = 0.1
+
+_deadline: contextvars.ContextVar[float | None] = contextvars.ContextVar(
+    "regybox_deadline", default=None
+)
+_attempt_timeout: contextvars.ContextVar[float | None] = contextvars.ContextVar(
+    "regybox_attempt_timeout", default=None
+)
+
+
+@contextmanager
+def deadline(seconds: float) -> Generator[None]:
+    """Bound the requests made inside the context to a time budget.
+
+    Args:
+        seconds: The number of seconds the requests may take in total. An
+            enclosing deadline that expires sooner is kept.
+
+    Yields:
+        None.
+    """
+    expires_at: float = monotonic() + seconds
+    enclosing: float | None = _deadline.get()
+    if enclosing is not None:
+        expires_at = min(expires_at, enclosing)
+    token: contextvars.Token[float | None] = _deadline.set(expires_at)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining_seconds() -> float | None:
+    """Get the time left before the current deadline.
+
+    Returns:
+        The number of seconds left, which is negative once the deadline has
+        passed, or None outside of a deadline.
+    """
+    expires_at: float | None = _deadline.get()
+    return None if expires_at is None else expires_at - monotonic()
+
+
+@contextmanager
+def attempt_timeout(default: float) -> Generator[float]:
+    """Compute the timeout of a request attempt that fits in the deadline.
+
+    Args:
+        default: The timeout of the attempt outside of a deadline.
+
+    Yields:
+        The timeout of the attempt, in seconds.
+
+    Raises:
+        DeadlineExceededError: If the remaining budget cannot fit an attempt.
+    """
+    remaining: float | None = remaining_seconds()
+    if remaining is None:
+        yield default
+        return
+    if remaining < DEADLINE_MIN_ATTEMPT_SECONDS:
+        raise DeadlineExceededError(max(0.0, remaining))
+    timeout: float = min(default, remaining)
+    LOGGER.debug(
+        f"{remaining:.3f} seconds left before the deadline; attempt timeout {timeout:.3f}"
+    )
+    token: contextvars.Token[float | None] = _attempt_timeout.set(timeout)
+    try:
+        yield timeout
+    finally:
+        _attempt_timeout.reset(token)
+
+
+def fits_in_deadline(wait: float) -> bool:
+    """Check whether waiting and then retrying still fits in the deadline.
+
+    Inside an attempt, the retry must fit the whole attempt timeout, since the
+    retried attempt reuses it. Otherwise it must fit a minimal attempt, whose
+    timeout is then shrunk to the remaining budget.
+
+    Args:
+        wait: The number of seconds to wait before retrying.
+
+    Returns:
+        True if there is no deadline or the retry fits in the budget.
+    """
+    remaining: float | None = remaining_seconds()
+    if remaining is None:
+        return True
+    needed: float | None = _attempt_timeout.get()
+    if remaining - wait >= (needed if needed is not None else DEADLINE_MIN_ATTEMPT_SECONDS):
+        return True
+    LOGGER.info(f"Not retrying: {remaining:.3f} seconds left before the deadline")
+    return False
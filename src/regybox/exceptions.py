@@ -143,6 +143,49 @@ class RegyboxTimeoutError(RegyboxBaseError):
         )
 
 
+class DeadlineExceededError(RegyboxBaseError):
+    """Exception raised when a request runs out of its time budget."""
+
+    def __init__(self, budget_secs: float) -> None:
+        """Initialize a new instance of the DeadlineExceededError class."""
+        super().__init__(
+            f"Request deadline exceeded with {budget_secs:.3f} seconds of budget left",
+            error_code="deadline_exceeded",
+            user_title="Regybox did not answer in time",
+            user_message=(
+                "Regybox was too slow to answer before the time allowed for the request ran out."
+            ),
+            user_next_steps=(
+                "Retry the workflow once in case this was temporary.",
+                "If it keeps failing, check whether regybox.pt is reachable.",
+            ),
+        )
+
+
+class ServiceUnavailableError(RegyboxBaseError):
+    """Exception raised when a service is failing and requests are not sent."""
+
+    def __init__(self, service: str, *, retry_in: float) -> None:
+        """Initialize a new instance of the ServiceUnavailableError class."""
+        subject: str = service[:1].upper() + service[1:]
+        super().__init__(
+            f"Not sending request to {service}: its circuit breaker is open for another"
+            f" {retry_in:.3f} seconds",
+            error_code="service_unavailable",
+            user_title=f"{subject} is unavailable",
+            user_message=(
+                f"{subject} kept failing to answer, so the automation stopped sending it"
+                " requests for now."
+            ),
+            user_next_steps=(
+                f"Check whether {service} is reachable.",
+                "Retry the workflow once it is back.",
+            ),
+        )
+        self.service = service
+        self.retry_in = retry_in
+
+
 class UnplannedClassError(RegyboxBaseError):
     """Exception raised when a class is not planned on the user's calendar."""
 
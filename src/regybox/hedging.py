@@ -0,0 +1,147 @@
+"""Hedge idempotent Regybox requests against tail latency.
+
+Inside a `hedging` context, idempotent requests that are slow to answer are
+sent again over another connection, and the first response wins.
+"""
+
+import contextvars
+import threading
+from collections import deque
+from collections.abc import Callable, Generator
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from typing import TypeVar
+
+from regybox.common import LOGGER
+from regybox.utils.singleton import Singleton
+
+HEDGE_QUANTILE: float = 0.9
+HEDGE_MIN_SAMPLES: int = 5
+HEDGE_DEFAULT_DELAY_SECONDS: float = 0.5
+HEDGE_MIN_DELAY_SECONDS: float = 0.05
+LATENCY_MAX_SAMPLES: int = 50
+
+T = TypeVar("T")
+
+_hedging: contextvars.ContextVar[bool] = contextvars.ContextVar("regybox_hedging", default=False)
+_hedge_delay: contextvars.ContextVar[float | None] = contextvars.ContextVar(
+    "regybox_hedge_delay", default=None
+)
+
+
+class LatencyTracker(metaclass=Singleton):
+    """Track the latency of recent Regybox requests.
+
+    Only the most recent `LATENCY_MAX_SAMPLES` latencies are kept, so that the
+    tracked quantiles follow the current state of the network and server.
+    """
+
+    def __init__(self) -> None:
+        """Initialize a new instance of the LatencyTracker class."""
+        self._samples: deque[float] = deque(maxlen=LATENCY_MAX_SAMPLES)
+        self._lock: threading.Lock = threading.Lock()
+
+    def record(self, seconds: float) -> None:
+        """Record the latency of a request.
+
+        Args:
+            seconds: The number of seconds the request took.
+        """
+        with self._lock:
+            self._samples.append(seconds)
+
+    def quantile(self, q: float) -> float | None:
+        """Get a quantile of the recent request latencies.
+
+        Args:
+            q: The quantile, between 0 and 1.
+
+        Returns:
+            The latency quantile in seconds, or None with fewer than
+            `HEDGE_MIN_SAMPLES` samples.
+        """
+        with self._lock:
+            samples: list[float] = sorted(self._samples)
+        if len(samples) < HEDGE_MIN_SAMPLES:
+            return None
+        return samples[min(len(samples) - 1, int(q * len(samples)))]
+
+
+@contextmanager
+def hedging(delay: float | None = None) -> Generator[None]:
+    """Hedge the idempotent requests made inside the context.
+
+    Requests with side effects, such as enrolling, must never be hedged.
+
+    Args:
+        delay: The number of seconds to wait for a response before sending a
+            hedged request. Defaults to the `HEDGE_QUANTILE` of the recent
+            request latencies.
+
+    Yields:
+        None.
+    """
+    token: contextvars.Token[bool] = _hedging.set(True)
+    delay_token: contextvars.Token[float | None] = _hedge_delay.set(delay)
+    try:
+        yield
+    finally:
+        _hedge_delay.reset(delay_token)
+        _hedging.reset(token)
+
+
+def hedge_delay() -> float | None:
+    """Get the delay before hedging a request in the current context.
+
+    Returns:
+        The number of seconds to wait before sending a hedged request, or
+        None outside of a `hedging` context.
+    """
+    if not _hedging.get():
+        return None
+    delay: float | None = _hedge_delay.get()
+    if delay is None:
+        latency: float | None = LatencyTracker().quantile(HEDGE_QUANTILE)
+        delay = HEDGE_DEFAULT_DELAY_SECONDS if latency is None else latency
+    return max(HEDGE_MIN_DELAY_SECONDS, delay)
+
+
+def hedged(  # noqa: UP047
+    fetch: Callable[[], T], *, delay: float, hedge: Callable[[], T] | None = None
+) -> T:
+    """Call an idempotent fetch, calling it again if it is slow to return.
+
+    Both calls run in the context of the caller, so they share its deadline.
+    The slower call is left to finish in the background. If both calls fail,
+    the error of the first one is raised.
+
+    Args:
+        fetch: The idempotent fetch to call.
+        delay: The number of seconds to wait before calling it again.
+        hedge: The fetch to call again, such as the same fetch over another
+            transport. Defaults to `fetch`.
+
+    Returns:
+        The result of the first call to succeed.
+    """
+    executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="regybox-hedge")
+    try:
+        first: Future[T] = executor.submit(contextvars.copy_context().run, fetch)
+        done, _ = wait([first], timeout=delay)
+        if done:
+            return first.result()
+        LOGGER.info(f"No response after {delay:.3f} seconds; sending a hedged request")
+        pending: set[Future[T]] = {
+            first,
+            executor.submit(contextvars.copy_context().run, hedge or fetch),
+        }
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    if future is not first:
+                        LOGGER.info("The hedged request answered first")
+                    return future.result()
+        return first.result()
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,170 @@
+"""Parse Regybox classes pages into class block tags.
+
+Building a full BeautifulSoup tree with the pure-Python ``html.parser``
+backend is the slowest step of every class fetch. This module lets the parser
+backend be selected:
+
+    * ``lxml``: BeautifulSoup backed by the lxml C parser, installed with the
+      ``lxml`` extra.
+    * ``stream``: a dependency-free ``html.parser.HTMLParser`` scanner that
+      only builds tags for the ``div.filtro0`` class blocks, and that can
+      consume a page chunk by chunk while it is downloaded.
+    * ``html.parser``: a full BeautifulSoup tree built with ``html.parser``.
+
+By default the fastest installed backend is used. It can be overridden with
+the ``REGYBOX_HTML_BACKEND`` environment variable.
+"""
+
+import importlib.util
+from collections.abc import Iterable
+from html.parser import HTMLParser
+from typing import Literal, Protocol, cast
+
+from bs4 import BeautifulSoup
+from bs4.element import Comment, NavigableString, Tag
+
+from regybox.common import HTML_BACKEND
+
+HtmlBackend = Literal["lxml", "stream", "html.parser"]
+HTML_BACKENDS: tuple[HtmlBackend, ...] = ("lxml", "stream", "html.parser")
+CLASS_BLOCK_CLASS: str = "filtro0"
+
+
+def available_html_backends() -> list[HtmlBackend]:
+    """List the installed HTML backends, fastest first.
+
+    Returns:
+        The names of the HTML backends that can be used.
+    """
+    return [
+        backend
+        for backend in HTML_BACKENDS
+        if backend != "lxml" or importlib.util.find_spec("lxml") is not None
+    ]
+
+
+def get_html_backend(backend: str | None = None) -> HtmlBackend:
+    """Resolve the HTML backend to use for parsing classes pages.
+
+    Args:
+        backend: The requested backend. If None or empty, the
+            ``REGYBOX_HTML_BACKEND`` environment variable is used, falling
+            back to the fastest installed backend.
+
+    Returns:
+        The name of the HTML backend.
+
+    Raises:
+        ValueError: If the requested backend is unknown or not installed.
+    """
+    requested: str = backend or HTML_BACKEND
+    available: list[HtmlBackend] = available_html_backends()
+    if not requested:
+        return available[0]
+    if requested not in available:
+        raise ValueError(
+            f"Unknown or unavailable HTML backend {requested!r}; expected one of"
+            f" {', '.join(available)}"
+        )
+    return requested
+
+
+class _TreeBuilder(Protocol):
+    def can_be_empty_element(self, tag_name: str) -> bool: ...
+
+
+class _TreeTarget(Protocol):
+    """The untyped tree building methods of a BeautifulSoup object."""
+
+    builder: _TreeBuilder
+
+    def handle_starttag(
+        self, name: str, namespace: str | None, nsprefix: str | None, attrs: dict[str, str]
+    ) -> Tag | None: ...
+
+    def handle_endtag(self, name: str) -> None: ...
+
+    def handle_data(self, data: str) -> None: ...
+
+    def endData(self, container: type[NavigableString] | None = None, /) -> None: ...  # noqa: N802
+
+
+class _ClassBlockScanner(HTMLParser):
+    """Stream a classes page and build tags only for its class blocks.
+
+    Parser events outside of ``div.filtro0`` blocks are dropped. Events inside
+    them are forwarded to an empty BeautifulSoup object, which builds the same
+    tags that a full ``html.parser`` tree would contain.
+    """
+
+    def __init__(self) -> None:
+        super().__init__(convert_charrefs=True)
+        self._soup: _TreeTarget = cast("_TreeTarget", BeautifulSoup("", "html.parser"))
+        self._div_depth: int = 0
+        self.blocks: list[Tag] = []
+
+    def handle_starttag(self, tag: str, attrs: list[tuple[str, str | None]]) -> None:
+        if not self._div_depth and (
+            tag != "div" or CLASS_BLOCK_CLASS not in (dict(attrs).get("class") or "").split()
+        ):
+            return
+        element: Tag | None = self._soup.handle_starttag(
+            tag, None, None, {name: value or "" for name, value in attrs}
+        )
+        if self._soup.builder.can_be_empty_element(tag):
+            self._soup.handle_endtag(tag)
+            return
+        if tag == "div":
+            if not self._div_depth and element is not None:
+                self.blocks.append(element)
+            self._div_depth += 1
+
+    def handle_startendtag(self, tag: str, attrs: list[tuple[str, str | None]]) -> None:
+        self.handle_starttag(tag, attrs)
+        if self._div_depth and not self._soup.builder.can_be_empty_element(tag):
+            self.handle_endtag(tag)
+
+    def handle_endtag(self, tag: str) -> None:
+        if not self._div_depth or self._soup.builder.can_be_empty_element(tag):
+            return
+        self._soup.handle_endtag(tag)
+        if tag == "div":
+            self._div_depth -= 1
+
+    def handle_data(self, data: str) -> None:
+        if self._div_depth:
+            self._soup.handle_data(data)
+
+    def handle_comment(self, data: str) -> None:
+        if self._div_depth:
+            self._soup.endData()
+            self._soup.handle_data(data)
+            self._soup.endData(Comment)
+
+    def close(self) -> None:
+        super().close()
+        self._soup.endData()
+
+
+def parse_class_blocks(res_html: str | Iterable[str], *, backend: str | None = None) -> list[Tag]:
+    """Parse the class block tags out of a classes page.
+
+    Args:
+        res_html: The HTML of the classes page, or its chunks in order. The
+            ``stream`` backend parses chunks as they are produced, while other
+            backends join them first.
+        backend: The HTML backend to use, see `get_html_backend`.
+
+    Returns:
+        The tags of every class block in the page, in document order.
+    """
+    resolved: HtmlBackend = get_html_backend(backend)
+    chunks: Iterable[str] = [res_html] if isinstance(res_html, str) else res_html
+    if resolved == "stream":
+        scanner = _ClassBlockScanner()
+        for chunk in chunks:
+            scanner.feed(chunk)
+        scanner.close()
+        return scanner.blocks
+    soup: BeautifulSoup = BeautifulSoup("".join(chunks), resolved)
+    return soup.find_all("div", attrs={"class": CLASS_BLOCK_CLASS})
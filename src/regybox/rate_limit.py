@@ -0,0 +1,174 @@
+"""Limit the rate of Regybox requests made by the process.
+
+Every Regybox request takes a token from a bucket shared by the process, see
+the RateLimiter class, by `priority` and round-robin across members.
+"""
+
+import asyncio
+import contextvars
+import itertools
+import threading
+import time
+from collections.abc import Generator
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Literal
+
+from regybox.common import LOGGER, RATE_LIMIT, RATE_LIMIT_BURST
+from regybox.utils.singleton import Singleton
+
+Priority = Literal["critical", "normal", "background"]
+PRIORITIES: tuple[Priority, ...] = ("critical", "normal", "background")
+RATE_LIMIT_CRITICAL_RESERVE: float = 2.0
+RATE_LIMIT_MIN_WAIT_SECONDS: float = 0.01
+
+_priority: contextvars.ContextVar[Priority] = contextvars.ContextVar(
+    "regybox_priority", default="normal"
+)
+
+
+@contextmanager
+def priority(level: Priority) -> Generator[None]:
+    """Set the priority of the requests made inside the context.
+
+    Enrolling and polling just before an opening are ``critical``, scans such
+    as listing classes are ``background``, and other requests are ``normal``.
+
+    Args:
+        level: The priority of the requests.
+
+    Yields:
+        None.
+    """
+    token: contextvars.Token[Priority] = _priority.set(level)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def current_priority() -> Priority:
+    """Get the priority of the requests made in the current context.
+
+    Returns:
+        The priority set by the innermost `priority` context, or ``normal``.
+    """
+    return _priority.get()
+
+
+@dataclass(eq=False)
+class _Waiter:
+    """A request waiting for a token."""
+
+    key: str
+    rank: int
+    seq: int
+
+
+class RateLimiter(metaclass=Singleton):
+    """Share a token bucket between the Regybox requests of the process.
+
+    The bucket holds up to `burst` tokens and refills at `rate` tokens per
+    second. Only the waiter served next may take a token: the waiter with the
+    highest priority whose member was served least recently, then the one that
+    has waited the longest. Non-critical requests leave
+    `RATE_LIMIT_CRITICAL_RESERVE` tokens in the bucket for critical ones. A
+    rate of zero disables the limiter.
+    """
+
+    def __init__(self, rate: float = RATE_LIMIT, burst: float = RATE_LIMIT_BURST) -> None:
+        """Initialize a new instance of the RateLimiter class.
+
+        Args:
+            rate: The number of requests per second, or 0 for no limit.
+            burst: The number of requests that may be sent at once.
+        """
+        self.rate: float = rate
+        self.burst: float = max(1.0, burst)
+        self._tokens: float = self.burst
+        self._updated_at: float = time.monotonic()
+        self._waiters: list[_Waiter] = []
+        self._served: dict[str, int] = {}
+        self._seq: itertools.count[int] = itertools.count()
+        self._grants: itertools.count[int] = itertools.count()
+        self._lock: threading.Lock = threading.Lock()
+        self._changed: threading.Condition = threading.Condition(self._lock)
+
+    @property
+    def enabled(self) -> bool:
+        """Whether requests are rate limited."""
+        return self.rate > 0
+
+    def acquire(self, key: str) -> None:
+        """Wait for a token to send a request, blocking the thread.
+
+        Args:
+            key: The key of the member the request is made for.
+        """
+        if not self.enabled:
+            return
+        waiter: _Waiter = self._enqueue(key)
+        with self._changed:
+            try:
+                while (wait := self._try_take(waiter)) is not None:
+                    self._changed.wait(wait)
+            finally:
+                self._dequeue(waiter)
+
+    async def async_acquire(self, key: str) -> None:
+        """Wait for a token to send a request, without blocking the loop.
+
+        Args:
+            key: The key of the member the request is made for.
+        """
+        if not self.enabled:
+            return
+        waiter: _Waiter = self._enqueue(key)
+        try:
+            while True:
+                with self._lock:
+                    wait: float | None = self._try_take(waiter)
+                if wait is None:
+                    return
+                await asyncio.sleep(wait)
+        finally:
+            with self._changed:
+                self._dequeue(waiter)
+
+    def _enqueue(self, key: str) -> _Waiter:
+        waiter = _Waiter(key=key, rank=PRIORITIES.index(current_priority()), seq=next(self._seq))
+        with self._lock:
+            self._waiters.append(waiter)
+        return waiter
+
+    def _dequeue(self, waiter: _Waiter) -> None:
+        """Remove a waiter and wake the others, with the lock held."""
+        if waiter in self._waiters:
+            self._waiters.remove(waiter)
+        self._changed.notify_all()
+
+    def _try_take(self, waiter: _Waiter) -> float | None:
+        """Take a token for a waiter if it is served next, with the lock held.
+
+        Returns:
+            None if a token was taken, or the number of seconds to wait before
+            trying again.
+        """
+        now: float = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+        head: _Waiter = min(
+            self._waiters,
+            key=lambda other: (other.rank, self._served.get(other.key, -1), other.seq),
+        )
+        reserve: float = 0.0 if head.rank == 0 else RATE_LIMIT_CRITICAL_RESERVE
+        needed: float = 1.0 + min(reserve, self.burst - 1.0)
+        if head is waiter and self._tokens >= needed:
+            self._tokens -= 1.0
+            self._served[waiter.key] = next(self._grants)
+            self._waiters.remove(waiter)
+            return None
+        wait: float = max(RATE_LIMIT_MIN_WAIT_SECONDS, (needed - self._tokens) / self.rate)
+        if head is waiter:
+            LOGGER.debug(f"Rate limited; waiting {wait:.3f} seconds for a token")
+        return wait
@@ -5,31 +5,68 @@ Regybox application. It retrieves the classes for a specified date, picks a
 class based on criteria, and enrolls in the class.
 """
 
+import contextvars
+import csv
 import datetime
+import functools
+import json
 import math
+import sys
 import time
-from dataclasses import dataclass
-from typing import Literal
+from collections.abc import Iterator, Sequence
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import AbstractContextManager, nullcontext
+from dataclasses import dataclass, fields
+from typing import Literal, NoReturn
+
+import requests
 
 from regybox.cal import check_cal
-from regybox.classes import Class, get_classes, pick_class
+from regybox.classes import (
+    Class,
+    ClassSnapshot,
+    ClassT,
+    get_cached_classes,
+    get_classes,
+    get_classes_range,
+    get_slot_classes,
+    pick_class,
+)
+from regybox.clock import ClockOffset, ClockSample, ServerClock
 from regybox.common import LOGGER, TIMEZONE
+from regybox.connection import RegyboxCredentials, warm_up_connection
+from regybox.deadline import deadline
 from regybox.exceptions import (
     ClassIsOverbookedError,
     ClassNotFoundError,
     ClassNotOpenError,
+    DeadlineExceededError,
+    RegyboxBaseError,
     RegyboxTimeoutError,
     UserAlreadyEnrolledError,
 )
+from regybox.hedging import hedging
+from regybox.rate_limit import priority
 from regybox.utils.times import secs_to_str
+from regybox.watch import WATCH_BUDGET, watch_class
 
 START: datetime.datetime = datetime.datetime.now(TIMEZONE)
 DEFAULT_CALENDAR_EVENT_NAME: str = "CrossFit"
 SHORT_WAIT: int = 1
-MED_WAIT: int = 10
-LONG_WAIT: int = 60
+FINAL_WINDOW: int = 10
+VERIFY_LEAD: int = 60
+WARMUP_WINDOW: int = FINAL_WINDOW
+WARMUP_LEAD: int = 3
+FIRE_AT_OPEN_POLL_INTERVAL: float = 0.25
+FIRE_AT_OPEN_MAX_POLLS: int = 8
+FIRE_AT_OPEN_POLL_DEADLINE: float = 3.0
+ENROLL_DEADLINE: float = 30.0
 OperationName = Literal["enroll", "unenroll"]
 OperationStatus = Literal["success", "noop"]
+ListFormat = Literal["table", "json", "csv"]
+LIST_FORMATS: tuple[ListFormat, ...] = ("table", "json", "csv")
+# the action URLs are not part of a class repr and are left out of listings
+LIST_FIELDS: tuple[str, ...] = tuple(field.name for field in fields(ClassSnapshot) if field.repr)
 
 
 @dataclass(frozen=True)
@@ -41,12 +78,49 @@ class OperationResult:
     class_type: str
 
 
+@dataclass(frozen=True)
+class ClassSlot:
+    """A class start time and class type to enroll in."""
+
+    class_time: str
+    class_type: str
+
+
 @dataclass(frozen=True)
 class OperationOptions:
-    """Options controlling the requested class operation."""
+    """Options controlling the requested class operation.
+
+    The credentials select the member to act for, defaulting to the credentials
+    configured in the environment. With `hedge_requests`, class fetches close
+    to the opening are hedged, see `regybox.hedging`; the enrollment request
+    itself is never duplicated. The `fallback_slots` are tried in order after
+    the requested class, see `pick_first_class`. With `watch_waitlist`, an
+    overbooked class is watched for a spot, and a waitlist the member ends up
+    on is watched until Regybox moves them into the class, with at most
+    `watch_budget` fetches, see `regybox.watch`.
+    """
 
     operation: OperationName = "enroll"
     not_open_is_noop: bool = False
+    fire_at_open: bool = False
+    max_fetches: int | None = None
+    credentials: RegyboxCredentials | None = None
+    hedge_requests: bool = False
+    fallback_slots: tuple[ClassSlot, ...] = ()
+    watch_waitlist: bool = False
+    watch_budget: int = WATCH_BUDGET
+
+
+@dataclass
+class _FetchBudget:
+    """Count the class fetches made while waiting for enrollment to open."""
+
+    limit: int | None
+    count: int = 0
+
+    @property
+    def exhausted(self) -> bool:
+        return self.limit is not None and self.count >= self.limit
 
 
 def parse_class_types(class_type: str) -> list[str]:
@@ -58,31 +132,89 @@ def parse_class_types(class_type: str) -> list[str]:
     return [part.strip() for part in class_type.split(",") if part.strip()]
 
 
+def parse_class_slots(value: str) -> tuple[ClassSlot, ...]:
+    """Split a comma-separated input of 'HH:MM CLASS_TYPE' slots.
+
+    Returns:
+        The slots, in order.
+
+    Raises:
+        ValueError: If a slot has no class type or an invalid time.
+    """
+    slots: list[ClassSlot] = []
+    for part in value.split(","):
+        if not part.strip():
+            continue
+        class_time, _, class_type = part.strip().partition(" ")
+        class_time = class_time.zfill(5)
+        datetime.time.fromisoformat(class_time)
+        if not class_type.strip():
+            raise ValueError(f"Class slot {part.strip()!r} has no class type")
+        slots.append(ClassSlot(class_time=class_time, class_type=class_type.strip()))
+    return tuple(slots)
+
+
+def _ranked_slots(
+    class_time: str, class_types: list[str], fallback_slots: Sequence[ClassSlot]
+) -> list[ClassSlot]:
+    ranked: list[ClassSlot] = [ClassSlot(class_time, class_type) for class_type in class_types]
+    return list(dict.fromkeys([*ranked, *fallback_slots]))
+
+
 def pick_first_class(
-    classes: list[Class], *, class_time: str, class_types: list[str], class_date: str
-) -> Class:
-    """Pick the first matching class from ordered class type candidates.
+    classes: list[ClassT],
+    *,
+    class_time: str,
+    class_types: list[str],
+    class_date: str,
+    fallback_slots: Sequence[ClassSlot] = (),
+) -> ClassT:
+    """Pick the first matching class from ranked candidates.
+
+    The candidates are each class type at `class_time`, in order, followed by
+    `fallback_slots`. An overbooked candidate is passed over for the next one
+    from the same classes, so falling back costs no extra fetch, and a
+    candidate the user is already enrolled in always wins.
 
     Returns:
-        The first matching Regybox class.
+        The candidate the user is enrolled in, else the first candidate that
+        is not overbooked, else the first candidate found.
 
     Raises:
         ClassNotFoundError: If none of the candidates match.
     """
+    matches: list[ClassT] = []
     last_error: ClassNotFoundError | None = None
-    for candidate in class_types:
+    for slot in _ranked_slots(class_time, class_types, fallback_slots):
         try:
-            return pick_class(
-                classes,
-                class_time=class_time,
-                class_type=candidate,
-                class_date=class_date,
+            matches.append(
+                pick_class(
+                    classes,
+                    class_time=slot.class_time,
+                    class_type=slot.class_type,
+                    class_date=class_date,
+                )
             )
         except ClassNotFoundError as e:
             last_error = e
-    if last_error is not None:
-        raise last_error
-    raise ClassNotFoundError(class_type="", class_time=class_time, class_date=class_date)
+    if not matches:
+        if last_error is not None:
+            raise last_error
+        raise ClassNotFoundError(class_type="", class_time=class_time, class_date=class_date)
+    for match in matches:
+        if _class_bool(match, "user_is_enrolled"):
+            return match
+    for match in matches:
+        if not _class_is_overbooked(match):
+            if match is not matches[0]:
+                LOGGER.info(
+                    f"{_resolved_class_type(matches[0], class_types[0])} at"
+                    f" {_class_start(matches[0], class_time)} is overbooked; falling back to"
+                    f" {_resolved_class_type(match, class_types[0])} at"
+                    f" {_class_start(match, class_time)}"
+                )
+            return match
+    return matches[0]
 
 
 def _operation_result(
@@ -92,7 +224,9 @@ def _operation_result(
     return OperationResult(operation=operation, status=status, class_type=class_type)
 
 
-def _unenroll_class(class_: Class, resolved_class_type: str) -> OperationResult:
+def _unenroll_class(
+    class_: Class | ClassSnapshot, resolved_class_type: str, credentials: RegyboxCredentials | None
+) -> OperationResult:
     if not class_.user_is_enrolled:
         LOGGER.info("Already unenrolled from class")
         return _operation_result(
@@ -100,7 +234,7 @@ def _unenroll_class(class_: Class, resolved_class_type: str) -> OperationResult:
             status="noop",
             class_type=resolved_class_type,
         )
-    class_.unenroll()
+    class_.unenroll(credentials=credentials)
     return _operation_result(
         operation="unenroll",
         status="success",
@@ -137,39 +271,108 @@ def _closed_enrollment_result(
     )
 
 
-def _resolved_class_type(class_: Class, fallback: str) -> str:
+def _resolved_class_type(class_: Class | ClassSnapshot, fallback: str) -> str:
     raw_name = getattr(class_, "name", fallback)
     return raw_name if isinstance(raw_name, str) else fallback
 
 
-def _class_bool(class_: Class, attr: str) -> bool:
+def _class_start(class_: Class | ClassSnapshot, fallback: str) -> str:
+    raw_start = getattr(class_, "start", fallback)
+    return raw_start if isinstance(raw_start, str) else fallback
+
+
+def _class_bool(class_: Class | ClassSnapshot, attr: str) -> bool:
     value = getattr(class_, attr, False)
     return value if isinstance(value, bool) else False
 
 
-def _class_is_overbooked(class_: Class) -> bool:
+def _clock_sample(class_: Class | ClassSnapshot) -> ClockSample | None:
+    sample = getattr(class_, "clock_sample", None)
+    return sample if isinstance(sample, ClockSample) else None
+
+
+def _class_is_overbooked(class_: Class | ClassSnapshot) -> bool:
     return _class_bool(class_, "is_overbooked") and _class_bool(class_, "is_full")
 
 
-def _raise_overbooked(*, resolved_class_type: str, date: datetime.date, class_time: str) -> None:
+def _raise_overbooked(
+    *, resolved_class_type: str, date: datetime.date, class_time: str
+) -> NoReturn:
     LOGGER.info(f"{resolved_class_type} on {date.isoformat()} at {class_time} is overbooked")
     raise ClassIsOverbookedError
 
 
+def _watched_or_overbooked(
+    class_: Class, *, resolved_class_type: str, date: datetime.date, class_time: str, watch: bool
+) -> Class:
+    if not watch:
+        _raise_overbooked(
+            resolved_class_type=resolved_class_type,
+            date=date,
+            class_time=class_time,
+        )
+    return class_
+
+
+def _hedging_if(*, enabled: bool) -> AbstractContextManager[None]:
+    return hedging() if enabled else nullcontext()
+
+
+def _get_candidate_classes(
+    date: datetime.date,
+    *,
+    class_time: str,
+    class_types: list[str],
+    fallback_slots: Sequence[ClassSlot],
+    credentials: RegyboxCredentials | None,
+) -> list[Class]:
+    """Fetch the classes of a date that may match the ranked candidates.
+
+    Returns:
+        The classes of the date, filtered on the candidate times and types.
+    """
+    if not fallback_slots:
+        return get_classes(
+            date.year,
+            date.month,
+            date.day,
+            class_time=class_time,
+            class_types=class_types,
+            credentials=credentials,
+        )
+    return get_classes(
+        date.year,
+        date.month,
+        date.day,
+        class_types=list(
+            dict.fromkeys([*class_types, *(slot.class_type for slot in fallback_slots)])
+        ),
+        credentials=credentials,
+    )
+
+
 def _pick_requested_class(
     *,
     date: datetime.date,
     class_time: str,
     class_types: list[str],
     options: OperationOptions,
+    credentials: RegyboxCredentials | None,
 ) -> Class | OperationResult:
-    classes: list[Class] = get_classes(date.year, date.month, date.day)
+    classes: list[Class] = _get_candidate_classes(
+        date,
+        class_time=class_time,
+        class_types=class_types,
+        fallback_slots=options.fallback_slots,
+        credentials=credentials,
+    )
     try:
         return pick_first_class(
             classes,
             class_time=class_time,
             class_types=class_types,
             class_date=date.isoformat(),
+            fallback_slots=options.fallback_slots,
         )
     except ClassNotFoundError:
         if options.operation == "unenroll":
@@ -187,8 +390,17 @@ def _pick_unenroll_class(
     date: datetime.date,
     class_time: str,
     class_types: list[str],
+    credentials: RegyboxCredentials | None,
 ) -> Class | OperationResult:
-    classes: list[Class] = get_classes(date.year, date.month, date.day)
+    # a cached listing may be stale, and unenrolling changes the class
+    classes: list[Class] = get_classes(
+        date.year,
+        date.month,
+        date.day,
+        class_time=class_time,
+        class_types=class_types,
+        credentials=credentials,
+    )
     first_match: Class | None = None
     for class_type in class_types:
         try:
@@ -214,14 +426,64 @@ def _pick_unenroll_class(
     )
 
 
+def _watch_for_spot(
+    *,
+    resolved_class_type: str,
+    date: datetime.date,
+    class_time: str,
+    options: OperationOptions,
+    status_without_spot: OperationStatus | None,
+) -> OperationResult:
+    """Watch the class for a spot, see `regybox.watch.watch_class`.
+
+    Returns:
+        A success if the member got a spot, else `status_without_spot`. The
+        class is overbooked if there is no `status_without_spot` to return.
+    """
+    if watch_class(
+        class_date=date.isoformat(),
+        class_time=class_time,
+        class_type=resolved_class_type,
+        credentials=options.credentials,
+        budget=options.watch_budget,
+    ):
+        return _operation_result(
+            operation="enroll",
+            status="success",
+            class_type=resolved_class_type,
+        )
+    if status_without_spot is None:
+        _raise_overbooked(
+            resolved_class_type=resolved_class_type,
+            date=date,
+            class_time=class_time,
+        )
+    return _operation_result(
+        operation="enroll",
+        status=status_without_spot,
+        class_type=resolved_class_type,
+    )
+
+
 def _enroll_selected_class(
     *,
     class_: Class,
     resolved_class_type: str,
     date: datetime.date,
     class_time: str,
+    options: OperationOptions,
 ) -> OperationResult:
+    credentials: RegyboxCredentials | None = options.credentials
     if _class_bool(class_, "user_is_enrolled"):
+        if options.watch_waitlist and _class_bool(class_, "user_is_waitlisted"):
+            LOGGER.info("Already on the waitlist of the class")
+            return _watch_for_spot(
+                resolved_class_type=resolved_class_type,
+                date=date,
+                class_time=class_time,
+                options=options,
+                status_without_spot="noop",
+            )
         LOGGER.info("Already enrolled in class")
         return _operation_result(
             operation="enroll",
@@ -229,6 +491,15 @@ def _enroll_selected_class(
             class_type=resolved_class_type,
         )
     if _class_is_overbooked(class_):
+        if options.watch_waitlist:
+            LOGGER.info(f"{resolved_class_type} is overbooked; watching it for a spot")
+            return _watch_for_spot(
+                resolved_class_type=resolved_class_type,
+                date=date,
+                class_time=class_time,
+                options=options,
+                status_without_spot=None,
+            )
         _raise_overbooked(
             resolved_class_type=resolved_class_type,
             date=date,
@@ -240,7 +511,8 @@ def _enroll_selected_class(
             " waitlist enrollment"
         )
     try:
-        class_.enroll()
+        with deadline(ENROLL_DEADLINE), priority("critical"):
+            class_.enroll(credentials=credentials)
     except UserAlreadyEnrolledError:
         LOGGER.info("Already enrolled in class")
         return _operation_result(
@@ -249,6 +521,14 @@ def _enroll_selected_class(
             class_type=resolved_class_type,
         )
     LOGGER.info(f"Runtime: {(datetime.datetime.now(TIMEZONE) - START).total_seconds():.3f}")
+    if options.watch_waitlist and _class_bool(class_, "user_is_waitlisted"):
+        return _watch_for_spot(
+            resolved_class_type=resolved_class_type,
+            date=date,
+            class_time=class_time,
+            options=options,
+            status_without_spot="success",
+        )
     return _operation_result(
         operation="enroll",
         status="success",
@@ -263,78 +543,316 @@ def _wait_for_enrollable_class(
     class_types: list[str],
     timeout: int,
     options: OperationOptions,
+    budget: _FetchBudget,
+    calendar: Future[bool] | None,
 ) -> Class | OperationResult:
+    credentials: RegyboxCredentials | None = options.credentials
     start = time.monotonic()
+    near_opening: bool = False
     while (elapsed := time.monotonic() - start) < timeout:
-        picked = _pick_requested_class(
+        if budget.exhausted:
+            LOGGER.warning(f"Reached the limit of {budget.limit} class fetches")
+            break
+        budget.count += 1
+        try:
+            with (
+                deadline(timeout - elapsed),
+                _hedging_if(enabled=options.hedge_requests and near_opening),
+                priority("critical" if near_opening else "normal"),
+            ):
+                picked = _pick_requested_class(
+                    date=date,
+                    class_time=class_time,
+                    class_types=class_types,
+                    options=options,
+                    credentials=credentials,
+                )
+        except DeadlineExceededError:
+            LOGGER.warning("Fetching classes did not finish before timeout")
+            break
+        if isinstance(picked, OperationResult):
+            return picked
+        checked: Class | OperationResult | int = _check_polled_class(
+            picked,
             date=date,
             class_time=class_time,
             class_types=class_types,
             options=options,
+            remaining_timeout=max(0, math.ceil(timeout - elapsed)),
         )
-        if isinstance(picked, OperationResult):
-            return picked
-        resolved_class_type = _resolved_class_type(picked, class_types[0])
-        if picked.is_open:
-            return picked
-        # Non-full closed error cards are treated as deadline-expired/not-open.
-        # Full closed error cards are intentionally classified as overbooked,
-        # even though that can miss the rare "full and starting soon" case.
-        deadline_expired = _class_bool(picked, "enrollment_deadline_expired")
-        if not deadline_expired and _class_is_overbooked(picked):
-            _raise_overbooked(
-                resolved_class_type=resolved_class_type,
+        if not isinstance(checked, int):
+            return checked
+        time_to_enroll: int = checked
+
+        # do not wait for a class that is not in the calendar
+        _await_calendar(calendar)
+        if options.fire_at_open:
+            fired = _fire_at_open(
                 date=date,
                 class_time=class_time,
-            )
-        time_to_enroll = picked.time_to_enroll
-        remaining_timeout = max(0, math.ceil(timeout - elapsed))
-        wait_exceeds_timeout = time_to_enroll is not None and time_to_enroll > remaining_timeout
-        if deadline_expired or time_to_enroll is None or wait_exceeds_timeout:
-            closed_result = _closed_enrollment_result(
-                options=options,
-                resolved_class_type=resolved_class_type,
+                class_types=class_types,
                 time_to_enroll=time_to_enroll,
+                clock_sample=_clock_sample(picked),
+                budget=budget,
+                options=options,
             )
-            if closed_result is not None:
-                return closed_result
-            if deadline_expired or time_to_enroll is None:
-                raise ClassNotOpenError
-            raise RegyboxTimeoutError(
-                remaining_timeout,
-                time_to_enroll=secs_to_str(time_to_enroll),
-            )
+            if fired is not None:
+                return fired
+            continue
 
         wait: int = snooze(time_to_enroll)
+        near_opening = time_to_enroll - wait <= FINAL_WINDOW
         LOGGER.info(
-            f"Waiting for {resolved_class_type} on {date.isoformat()} at {class_time} to be"
-            f" available, ETA in {secs_to_str(time_to_enroll)}. Retrying in {wait} seconds."
+            f"Waiting for {_resolved_class_type(picked, class_types[0])} on {date.isoformat()}"
+            f" at {_class_start(picked, class_time)} to be available, ETA in"
+            f" {secs_to_str(time_to_enroll)}. Retrying in {wait} seconds."
         )
-        time.sleep(wait)
+        _sleep_before_fetch(wait, time_to_enroll=time_to_enroll, credentials=credentials)
+    return _timed_out_result(timeout, options=options, class_type=class_types[0])
+
+
+def _check_polled_class(
+    picked: Class,
+    *,
+    date: datetime.date,
+    class_time: str,
+    class_types: list[str],
+    options: OperationOptions,
+    remaining_timeout: int,
+) -> Class | OperationResult | int:
+    """Decide what to do with a class polled while waiting for enrollment.
+
+    Returns:
+        The class if it can be acted on now, a result if there is nothing
+        left to do, or else the number of seconds until enrollment opens.
+
+    Raises:
+        ClassNotOpenError: If enrollment will not open.
+        RegyboxTimeoutError: If enrollment opens after the timeout.
+    """
+    if picked.is_open:
+        return picked
+    resolved_class_type = _resolved_class_type(picked, class_types[0])
+    # Non-full closed error cards are treated as deadline-expired/not-open.
+    # Full closed error cards are intentionally classified as overbooked,
+    # even though that can miss the rare "full and starting soon" case.
+    deadline_expired = _class_bool(picked, "enrollment_deadline_expired")
+    if not deadline_expired and _class_is_overbooked(picked):
+        return _watched_or_overbooked(
+            picked,
+            resolved_class_type=resolved_class_type,
+            date=date,
+            class_time=_class_start(picked, class_time),
+            watch=options.watch_waitlist,
+        )
+    time_to_enroll = picked.time_to_enroll
+    wait_exceeds_timeout = time_to_enroll is not None and time_to_enroll > remaining_timeout
+    if deadline_expired or time_to_enroll is None or wait_exceeds_timeout:
+        closed_result = _closed_enrollment_result(
+            options=options,
+            resolved_class_type=resolved_class_type,
+            time_to_enroll=time_to_enroll,
+        )
+        if closed_result is not None:
+            return closed_result
+        if deadline_expired or time_to_enroll is None:
+            raise ClassNotOpenError
+        raise RegyboxTimeoutError(
+            remaining_timeout,
+            time_to_enroll=secs_to_str(time_to_enroll),
+        )
+    return time_to_enroll
+
+
+def _timed_out_result(
+    timeout: int, *, options: OperationOptions, class_type: str
+) -> OperationResult:
+    """Return the result of an enrollment that did not open before timeout.
+
+    Returns:
+        A no-op result if the options ask for one.
+
+    Raises:
+        RegyboxTimeoutError: If the options do not ask for a no-op result.
+    """
     if options.not_open_is_noop:
         LOGGER.info("Enrollment did not open before timeout; returning no-op result")
         return _operation_result(
             operation="enroll",
             status="noop",
-            class_type=class_types[0],
+            class_type=class_type,
         )
     raise RegyboxTimeoutError(timeout)
 
 
+def _fire_at_open(
+    *,
+    date: datetime.date,
+    class_time: str,
+    class_types: list[str],
+    time_to_enroll: int,
+    clock_sample: ClockSample | None,
+    budget: _FetchBudget,
+    options: OperationOptions,
+) -> Class | None:
+    """Sleep until enrollment opens, then fetch only the requested class slot.
+
+    The opening time is predicted on the server clock when possible, from the
+    countdown and the server clock sample of the page it was read from, see
+    `_seconds_until_open`. The class slot is re-polled every
+    `FIRE_AT_OPEN_POLL_INTERVAL` seconds, at most `FIRE_AT_OPEN_MAX_POLLS`
+    times, in case the predicted opening time is slightly early. Each poll
+    must finish within `FIRE_AT_OPEN_POLL_DEADLINE` seconds, so that a stalled
+    connection costs one poll rather than the opening, and is hedged if the
+    options ask for it. With fallback slots, each poll parses the candidates
+    of the whole day instead, so that an overbooked class falls back to the
+    next candidate without another fetch.
+
+    Returns:
+        The requested class once it is open or no longer needs to be waited
+        for, or None if it did not open within the bounded re-polls or the
+        fetch budget ran out.
+    """
+    credentials: RegyboxCredentials | None = options.credentials
+    wait: float = _seconds_until_open(time_to_enroll, clock_sample=clock_sample)
+    open_at: float = time.monotonic() + wait
+    LOGGER.info(f"Firing at enrollment opening, ETA in {secs_to_str(time_to_enroll)}")
+    _sleep_before_fetch(wait, time_to_enroll=wait, credentials=credentials)
+    for poll in range(1, FIRE_AT_OPEN_MAX_POLLS + 1):
+        if budget.exhausted:
+            return None
+        budget.count += 1
+        try:
+            with (
+                deadline(FIRE_AT_OPEN_POLL_DEADLINE),
+                _hedging_if(enabled=options.hedge_requests),
+                priority("critical"),
+            ):
+                classes: list[Class] = (
+                    _get_candidate_classes(
+                        date,
+                        class_time=class_time,
+                        class_types=class_types,
+                        fallback_slots=options.fallback_slots,
+                        credentials=credentials,
+                    )
+                    if options.fallback_slots
+                    else get_slot_classes(
+                        date.year,
+                        date.month,
+                        date.day,
+                        start=class_time,
+                        class_types=class_types,
+                        credentials=credentials,
+                    )
+                )
+                picked: Class | None = pick_first_class(
+                    classes,
+                    class_time=class_time,
+                    class_types=class_types,
+                    class_date=date.isoformat(),
+                    fallback_slots=options.fallback_slots,
+                )
+        except ClassNotFoundError:
+            picked = None
+        except DeadlineExceededError:
+            LOGGER.warning(
+                f"Poll {poll} did not finish within {FIRE_AT_OPEN_POLL_DEADLINE} seconds"
+            )
+            picked = None
+        if picked is not None and (
+            picked.is_open
+            or _class_bool(picked, "user_is_enrolled")
+            or _class_is_overbooked(picked)
+        ):
+            LOGGER.info(
+                f"Enrollment state changed {time.monotonic() - open_at:.3f} seconds after the"
+                f" predicted opening, after {poll} fetch(es)"
+            )
+            return picked
+        time.sleep(FIRE_AT_OPEN_POLL_INTERVAL)
+    LOGGER.warning("Enrollment did not open at the predicted time; resuming regular polling")
+    return None
+
+
+def _seconds_until_open(time_to_enroll: int, *, clock_sample: ClockSample | None) -> float:
+    """Predict how long until enrollment opens using the server clock.
+
+    The countdown shown by Regybox was computed when the classes page was
+    rendered, which the ``Date`` header of that response pins to the server
+    clock. Adding the countdown to it gives the opening time on the server
+    clock, which the server clock offset then maps to the earliest local time
+    at which enrollment may open.
+
+    Args:
+        time_to_enroll: The countdown until enrollment opens, in seconds, from
+            the most recent classes page.
+        clock_sample: The server clock sample of the response of that page,
+            see `Class.clock_sample`.
+
+    Returns:
+        The number of seconds until enrollment opens, or `time_to_enroll` if
+        the response of the page or the server clock could not be sampled.
+    """
+    clock = ServerClock()
+    estimate: ClockOffset | None = clock.estimate()
+    if clock_sample is None or estimate is None:
+        return float(time_to_enroll)
+    wait: float | None = clock.seconds_until(clock_sample.server_time + time_to_enroll)
+    if wait is None:
+        return float(time_to_enroll)
+    LOGGER.debug(
+        f"Server clock offset is {estimate.offset:+.3f}±{estimate.error:.3f} seconds from"
+        f" {estimate.samples} sample(s); enrollment opens in {wait:.3f} seconds"
+    )
+    return max(0.0, wait)
+
+
+def _sleep_before_fetch(
+    wait: float, *, time_to_enroll: float, credentials: RegyboxCredentials | None = None
+) -> None:
+    """Sleep until the next class fetch, warming up the connection if needed.
+
+    When the next fetch lands within `WARMUP_WINDOW` seconds of enrollment
+    opening, the shared session is warmed up `WARMUP_LEAD` seconds before the
+    fetch so that neither an idle-closed keep-alive connection nor a new TLS
+    handshake delays it.
+
+    Args:
+        wait: The number of seconds until the next fetch.
+        time_to_enroll: The number of seconds until enrollment opens.
+        credentials: The credentials of the member whose session is warmed up.
+    """
+    if wait <= WARMUP_LEAD or time_to_enroll - wait > WARMUP_WINDOW:
+        time.sleep(wait)
+        return
+    fetch_at: float = time.monotonic() + wait
+    time.sleep(wait - WARMUP_LEAD)
+    LOGGER.info("Warming up connection ahead of enrollment opening")
+    with priority("critical"):
+        warm_up_connection(credentials)
+    time.sleep(max(0.0, fetch_at - time.monotonic()))
+
+
 def snooze(time_left: int) -> int:
     """Helper function to determine the wait time between calls.
 
+    The parsed time until enrollment opens is trusted, so most of it is slept
+    in one stretch: a single verification fetch is made `VERIFY_LEAD` seconds
+    before the opening, another when the final `FINAL_WINDOW` seconds start,
+    and classes are only polled every `SHORT_WAIT` seconds after that.
+
     Args:
         time_left: The time remaining in seconds.
 
     Returns:
         int: The duration to wait in seconds.
     """
-    if time_left <= MED_WAIT:
+    if time_left <= FINAL_WINDOW:
         return SHORT_WAIT
-    if time_left <= LONG_WAIT:
-        return MED_WAIT
-    return LONG_WAIT
+    if time_left <= VERIFY_LEAD:
+        return time_left - FINAL_WINDOW
+    return time_left - VERIFY_LEAD
 
 
 def main(
@@ -380,19 +898,88 @@ def main(
     else:
         date = (datetime.datetime.strptime(class_date, "%Y-%m-%d").replace(tzinfo=TIMEZONE)).date()
 
+    calendar: Future[bool] | None = None
     if check_calendar:
-        calendar_event_name: str = (
-            event_name.strip()
-            if event_name and event_name.strip()
-            else DEFAULT_CALENDAR_EVENT_NAME
-        )
-        check_cal(
+        calendar = _start_calendar_check(
             date=date,
-            time=datetime.datetime.strptime(class_time, "%H:%M").replace(tzinfo=TIMEZONE).timetz(),
-            event_name=calendar_event_name,
+            class_time=class_time,
+            event_name=event_name,
             class_type=class_types[0],
         )
+    try:
+        result: OperationResult = _run_operation(
+            date=date,
+            class_time=class_time,
+            class_types=class_types,
+            timeout=timeout,
+            options=options,
+            calendar=calendar,
+        )
+    except Exception:
+        # a class that is not in the calendar is reported before anything else
+        _await_calendar(calendar)
+        raise
+    _await_calendar(calendar)
+    return result
+
 
+def _start_calendar_check(
+    *, date: datetime.date, class_time: str, event_name: str, class_type: str
+) -> Future[bool]:
+    """Check the calendar for the class in a background thread.
+
+    Downloading and parsing the calendar overlaps with setting the Regybox
+    session and the first fetch of the classes, which do not depend on it.
+
+    Returns:
+        The future of the `check_cal` call, see `_await_calendar`.
+    """
+    calendar_event_name: str = (
+        event_name.strip() if event_name and event_name.strip() else DEFAULT_CALENDAR_EVENT_NAME
+    )
+    executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="regybox-calendar")
+    try:
+        return executor.submit(
+            contextvars.copy_context().run,
+            functools.partial(
+                check_cal,
+                date=date,
+                time=datetime.datetime
+                .strptime(class_time, "%H:%M")
+                .replace(tzinfo=TIMEZONE)
+                .timetz(),
+                event_name=calendar_event_name,
+                class_type=class_type,
+            ),
+        )
+    finally:
+        executor.shutdown(wait=False)
+
+
+def _await_calendar(calendar: Future[bool] | None) -> None:
+    """Wait for the calendar check, raising the error of an unplanned class."""
+    if calendar is not None:
+        calendar.result()
+
+
+def _run_operation(
+    *,
+    date: datetime.date,
+    class_time: str,
+    class_types: list[str],
+    timeout: int,
+    options: OperationOptions,
+    calendar: Future[bool] | None,
+) -> OperationResult:
+    """Run the requested operation once the calendar check passes.
+
+    Classes are fetched while the calendar is checked, but the class is only
+    enrolled in, unenrolled from or waited for once the check passes.
+
+    Returns:
+        The operation result.
+    """
+    credentials: RegyboxCredentials | None = options.credentials
     if options.operation == "unenroll":
         LOGGER.info(
             f"Attempting to unenroll from {class_types[0]} on {date.isoformat()} at {class_time}"
@@ -401,6 +988,7 @@ def main(
             date=date,
             class_time=class_time,
             class_types=class_types,
+            credentials=credentials,
         )
         if isinstance(picked, OperationResult):
             return picked
@@ -410,41 +998,310 @@ def main(
                 f"Attempting to unenroll from {resolved_class_type} on {date.isoformat()} at"
                 f" {class_time}"
             )
-        return _unenroll_class(picked, resolved_class_type)
+        _await_calendar(calendar)
+        return _unenroll_class(picked, resolved_class_type, credentials)
 
     LOGGER.info(f"Attempting to enroll in {class_types[0]} on {date.isoformat()} at {class_time}")
-    picked = _wait_for_enrollable_class(
-        date=date,
-        class_time=class_time,
-        class_types=class_types,
-        timeout=timeout,
-        options=options,
-    )
+    budget = _FetchBudget(limit=options.max_fetches)
+    try:
+        picked = _wait_for_enrollable_class(
+            date=date,
+            class_time=class_time,
+            class_types=class_types,
+            timeout=timeout,
+            options=options,
+            budget=budget,
+            calendar=calendar,
+        )
+    finally:
+        LOGGER.info(f"Fetched classes {budget.count} time(s) while waiting for enrollment")
     if isinstance(picked, OperationResult):
         return picked
-    class_ = picked
+    _await_calendar(calendar)
+    return _enroll_picked_class(
+        picked, date=date, class_time=class_time, class_types=class_types, options=options
+    )
+
+
+def _enroll_picked_class(
+    class_: Class,
+    *,
+    date: datetime.date,
+    class_time: str,
+    class_types: list[str],
+    options: OperationOptions,
+) -> OperationResult:
     resolved_class_type = _resolved_class_type(class_, class_types[0])
-    if resolved_class_type != class_types[0]:
+    resolved_class_time: str = _class_start(class_, class_time)
+    if resolved_class_type != class_types[0] or resolved_class_time != class_time:
         LOGGER.info(
-            f"Attempting to enroll in {resolved_class_type} on {date.isoformat()} at {class_time}"
+            f"Attempting to enroll in {resolved_class_type} on {date.isoformat()} at"
+            f" {resolved_class_time}"
         )
     return _enroll_selected_class(
         class_=class_,
         resolved_class_type=resolved_class_type,
         date=date,
-        class_time=class_time,
+        class_time=resolved_class_time,
+        options=options,
     )
 
 
-def list_classes(class_date: str) -> None:
-    """List all classes for a specific date.
+@dataclass(frozen=True)
+class _DaySlot:
+    """A class of `enroll_many` and the check of its calendar event."""
+
+    class_time: str
+    class_types: list[str]
+    calendar: Future[bool] | None
+
+
+def enroll_many(
+    slots: Sequence[ClassSlot],
+    *,
+    class_date: str,
+    event_name: str = DEFAULT_CALENDAR_EVENT_NAME,
+    check_calendar: bool = True,
+    timeout: int = 900,
+    operation_options: OperationOptions | None = None,
+) -> list[OperationResult | Exception]:
+    """Enroll in several classes of one date from a single polling loop.
+
+    Each poll fetches the classes page of the date once and checks every
+    class still waiting against it, and the loop then sleeps until the
+    soonest opening among them. A class that can be enrolled in is enrolled
+    in from a worker thread, so that neither its enrollment nor watching it
+    for a spot holds up the next poll. As with `main`, nothing is enrolled
+    in before the calendar check of the class passes. Enrollment is not
+    fired at the predicted opening, see `OperationOptions.fire_at_open`.
+
+    Args:
+        slots: The classes to enroll in, whose class types may hold
+            comma-separated fallbacks.
+        class_date: The date of the classes in the format 'YYYY-MM-DD'.
+        event_name: The calendar event name to match.
+        check_calendar: Whether to check the calendar for every class.
+        timeout: Maximum number of seconds to wait for enrollment to open.
+        operation_options: Options for the enrollments.
+
+    Returns:
+        The result of every slot, in the order of the slots, or the error its
+        enrollment failed with.
+    """
+    options: OperationOptions = operation_options or OperationOptions()
+    date: datetime.date = _parse_list_date(class_date)
+    outcomes: dict[int, OperationResult | Exception] = {}
+    waiting: dict[int, _DaySlot] = {}
+    for index, slot in enumerate(slots):
+        class_time: str = slot.class_time.zfill(5)
+        class_types: list[str] = parse_class_types(slot.class_type)
+        if not class_types:
+            outcomes[index] = ValueError("class_type must include at least one class name.")
+            continue
+        calendar: Future[bool] | None = None
+        if check_calendar:
+            calendar = _start_calendar_check(
+                date=date,
+                class_time=class_time,
+                event_name=event_name,
+                class_type=class_types[0],
+            )
+        waiting[index] = _DaySlot(class_time, class_types, calendar)
+    enrollments: dict[int, Future[OperationResult]] = {}
+    with ThreadPoolExecutor(
+        max_workers=max(1, len(waiting)), thread_name_prefix="regybox-enroll"
+    ) as executor:
+        for index, outcome in _poll_day(date, waiting, timeout=timeout, options=options):
+            if isinstance(outcome, OperationResult | Exception):
+                outcomes[index] = outcome
+                continue
+            enrollments[index] = executor.submit(
+                contextvars.copy_context().run,
+                functools.partial(
+                    _enroll_picked_class,
+                    outcome,
+                    date=date,
+                    class_time=waiting[index].class_time,
+                    class_types=waiting[index].class_types,
+                    options=options,
+                ),
+            )
+    for index, enrollment in enrollments.items():
+        try:
+            outcomes[index] = enrollment.result()
+        except (RegyboxBaseError, requests.RequestException) as e:
+            outcomes[index] = e
+    return [outcomes[index] for index in range(len(slots))]
+
+
+def _calendar_error(slot: _DaySlot) -> Exception | None:
+    try:
+        _await_calendar(slot.calendar)
+    except (RegyboxBaseError, requests.RequestException) as e:
+        return e
+    return None
+
+
+def _calendar_outcome(
+    slot: _DaySlot, outcome: Class | OperationResult | Exception
+) -> Class | OperationResult | Exception:
+    return _calendar_error(slot) or outcome
+
+
+def _check_day_slot(
+    classes: list[Class],
+    slot: _DaySlot,
+    *,
+    date: datetime.date,
+    options: OperationOptions,
+    remaining_timeout: int,
+) -> Class | OperationResult | Exception | int:
+    try:
+        return _check_polled_class(
+            pick_first_class(
+                classes,
+                class_time=slot.class_time,
+                class_types=slot.class_types,
+                class_date=date.isoformat(),
+                fallback_slots=options.fallback_slots,
+            ),
+            date=date,
+            class_time=slot.class_time,
+            class_types=slot.class_types,
+            options=options,
+            remaining_timeout=remaining_timeout,
+        )
+    except RegyboxBaseError as e:
+        return e
+
+
+def _poll_day(
+    date: datetime.date, slots: dict[int, _DaySlot], *, timeout: int, options: OperationOptions
+) -> Iterator[tuple[int, Class | OperationResult | Exception]]:
+    """Poll the classes of a date until every slot is resolved.
+
+    Yields:
+        The index of each slot once it is resolved, with the class to enroll
+        in, the result if there is nothing left to do, or the error it failed
+        with. Slots are resolved as soon as their class is, and the others
+        once the timeout passes.
+    """
+    pending: dict[int, _DaySlot] = dict(slots)
+    budget = _FetchBudget(limit=options.max_fetches)
+    start: float = time.monotonic()
+    near_opening: bool = False
+    while pending and (elapsed := time.monotonic() - start) < timeout and not budget.exhausted:
+        budget.count += 1
+        try:
+            with (
+                deadline(timeout - elapsed),
+                _hedging_if(enabled=options.hedge_requests and near_opening),
+                priority("critical" if near_opening else "normal"),
+            ):
+                classes: list[Class] = get_classes(
+                    date.year, date.month, date.day, credentials=options.credentials
+                )
+        except DeadlineExceededError:
+            LOGGER.warning("Fetching classes did not finish before timeout")
+            break
+        except (RegyboxBaseError, requests.RequestException) as e:
+            for index, slot in pending.items():
+                yield index, _calendar_outcome(slot, e)
+            return
+        opens_in: list[int] = []
+        for index, slot in list(pending.items()):
+            checked: Class | OperationResult | Exception | int = _check_day_slot(
+                classes,
+                slot,
+                date=date,
+                options=options,
+                remaining_timeout=max(0, math.ceil(timeout - elapsed)),
+            )
+            if isinstance(checked, int):
+                opens_in.append(checked)
+                continue
+            del pending[index]
+            yield index, _calendar_outcome(slot, checked)
+        # do not wait for classes that are not in the calendar
+        for index, slot in list(pending.items()):
+            if (error := _calendar_error(slot)) is not None:
+                del pending[index]
+                yield index, error
+        if not pending:
+            break
+        time_to_enroll: int = min(opens_in)
+        wait: int = snooze(time_to_enroll)
+        near_opening = time_to_enroll - wait <= FINAL_WINDOW
+        LOGGER.info(
+            f"Waiting for {len(pending)} class(es) on {date.isoformat()} to be available, the"
+            f" first ETA in {secs_to_str(time_to_enroll)}. Retrying in {wait} seconds."
+        )
+        _sleep_before_fetch(wait, time_to_enroll=time_to_enroll, credentials=options.credentials)
+    if budget.exhausted and pending:
+        LOGGER.warning(f"Reached the limit of {budget.limit} class fetches")
+    LOGGER.info(f"Fetched classes {budget.count} time(s) while waiting for enrollment")
+    for index, slot in pending.items():
+        try:
+            outcome: OperationResult | Exception = _timed_out_result(
+                timeout, options=options, class_type=slot.class_types[0]
+            )
+        except RegyboxTimeoutError as e:
+            outcome = e
+        yield index, _calendar_outcome(slot, outcome)
+
+
+def _parse_list_date(value: str) -> datetime.date:
+    return datetime.datetime.strptime(value, "%Y-%m-%d").replace(tzinfo=TIMEZONE).date()
+
+
+def list_classes(
+    class_date: str, *, end_date: str | None = None, output_format: ListFormat = "table"
+) -> None:
+    """List all classes for a specific date or date range.
+
+    Tables are logged one date at a time, while JSON and CSV output is written
+    to stdout with one record per class. The action URLs are never output.
 
     Args:
         class_date: The date of the classes in the format 'YYYY-MM-DD'.
+        end_date: The last date of a range of dates to list, inclusive, in
+            the format 'YYYY-MM-DD'. The days of a range are fetched
+            concurrently, while a single date reuses a fresh cached listing,
+            see `get_cached_classes`. Listing requests have the background
+            priority, see `regybox.rate_limit`.
+        output_format: The output format, one of `LIST_FORMATS`.
     """
-    date = (datetime.datetime.strptime(class_date, "%Y-%m-%d").replace(tzinfo=TIMEZONE)).date()
-    classes: list[Class] = get_classes(date.year, date.month, date.day)
+    start: datetime.date = _parse_list_date(class_date)
+    with priority("background"):
+        if end_date is None:
+            days: dict[datetime.date, list[ClassSnapshot]] = {
+                start: get_cached_classes(start.year, start.month, start.day)
+            }
+        else:
+            days = dict(get_classes_range(start, _parse_list_date(end_date)))
+    records: list[dict[str, object]] = [
+        {name: getattr(class_, name) for name in LIST_FIELDS}
+        for date in sorted(days)
+        for class_ in days[date]
+    ]
+    if output_format == "json":
+        sys.stdout.write(json.dumps(records, ensure_ascii=False, indent=2) + "\n")
+    elif output_format == "csv":
+        writer = csv.DictWriter(sys.stdout, fieldnames=LIST_FIELDS, lineterminator="\n")
+        writer.writeheader()
+        writer.writerows(records)
+    else:
+        for date in sorted(days):
+            _log_class_table(date.isoformat(), days[date])
+
 
+def _log_class_table(class_date: str, classes: list[ClassSnapshot]) -> None:
+    """Log the classes of one date as a markdown table.
+
+    Args:
+        class_date: The date of the classes in the format 'YYYY-MM-DD'.
+        classes: The classes of the date.
+    """
     # Prepare data and calculate column widths
     table_data: list[tuple[str, str, str, str, str]] = []
     for class_ in classes:
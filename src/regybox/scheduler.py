@@ -0,0 +1,412 @@
+"""Run class operations from one long-running process.
+
+The Scheduler class sleeps until just before the predicted enrollment opening
+of each job, prepares the session and runs the operation.
+"""
+
+import contextvars
+import datetime
+import heapq
+import json
+import threading
+import time
+from collections.abc import Iterable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Literal, cast, get_args
+
+import requests
+
+from regybox.batch import BatchResult, BatchTarget, parse_batch_targets, run_target
+from regybox.cal import Calendar
+from regybox.classes import ClassSnapshot, get_classes
+from regybox.common import LOGGER, SCHEDULE_STATE, TIMEZONE
+from regybox.connection import warm_up_connection
+from regybox.exceptions import RegyboxBaseError
+from regybox.rate_limit import priority
+from regybox.regybox import (
+    DEFAULT_CALENDAR_EVENT_NAME,
+    OperationOptions,
+    parse_class_types,
+    pick_first_class,
+)
+from regybox.utils.files import write_private_file
+from regybox.utils.times import secs_to_str
+
+JobStatus = Literal["pending", "done", "failed", "expired"]
+SCHEDULE_STATE_VERSION: int = 1
+SCHEDULE_WAKE_LEAD_SECONDS: float = 120.0
+SCHEDULE_PROBE_SECONDS: float = 60 * 60
+SCHEDULE_MAX_SLEEP_SECONDS: float = 60.0
+SCHEDULE_MAX_WORKERS: int = 8
+SCHEDULE_KEEP_SECONDS: float = 24 * 60 * 60
+SCHEDULE_STATE_PATH: Path | None = Path(SCHEDULE_STATE) if SCHEDULE_STATE else None
+
+
+@dataclass
+class ScheduledJob:
+    """A class operation waiting for, or done after, its enrollment opening.
+
+    Attributes:
+        target: The class to operate on.
+        opens_at: The predicted Unix time at which enrollment opens, or None
+            while it is unknown.
+        wake_at: The Unix time at which the scheduler next handles the job.
+        status: Whether the job is still pending, or how it ended.
+    """
+
+    target: BatchTarget
+    opens_at: float | None = None
+    wake_at: float = 0.0
+    status: JobStatus = "pending"
+
+    @property
+    def key(self) -> str:
+        """The key identifying the job."""
+        return f"{self.target.class_date} {self.target.class_time} {self.target.class_type}"
+
+    @property
+    def starts_at(self) -> float:
+        """The Unix time at which the class starts."""
+        return datetime.datetime.combine(
+            datetime.date.fromisoformat(self.target.class_date),
+            datetime.time.fromisoformat(self.target.class_time),
+            tzinfo=TIMEZONE,
+        ).timestamp()
+
+
+def _parse_job(raw: object) -> ScheduledJob | None:
+    if not isinstance(raw, dict):
+        return None
+    data: dict[str, object] = cast("dict[str, object]", raw)
+    class_date, class_time, class_type = (
+        data.get(key) for key in ("class_date", "class_time", "class_type")
+    )
+    opens_at: object = data.get("opens_at")
+    wake_at: object = data.get("wake_at")
+    status: object = data.get("status")
+    if not (
+        isinstance(class_date, str)
+        and isinstance(class_time, str)
+        and isinstance(class_type, str)
+        and (opens_at is None or isinstance(opens_at, int | float))
+        and isinstance(wake_at, int | float)
+        and status in get_args(JobStatus)
+    ):
+        return None
+    try:
+        (target,) = parse_batch_targets([f"{class_date} {class_time} {class_type}"])
+    except ValueError:
+        return None
+    return ScheduledJob(
+        target=target,
+        opens_at=None if opens_at is None else float(opens_at),
+        wake_at=float(wake_at),
+        status=cast("JobStatus", status),
+    )
+
+
+class Scheduler:
+    """Run class operations shortly before their enrollment opens.
+
+    The opening of a job is predicted from the enrollment countdown of its
+    class, probed every `probe_interval` seconds until Regybox shows it. Due
+    jobs run in worker threads, so that openings close to each other do not
+    wait for one another, sharing the pooled Regybox session and the calendar.
+    The state file is only a backup of the jobs in memory: a missing,
+    unreadable or corrupt file is treated as empty, and failing to write it is
+    logged and ignored.
+    """
+
+    def __init__(
+        self,
+        *,
+        state_path: Path | None = SCHEDULE_STATE_PATH,
+        event_name: str | None = DEFAULT_CALENDAR_EVENT_NAME,
+        check_calendar: bool = True,
+        timeout: int = 900,
+        operation_options: OperationOptions | None = None,
+        wake_lead: float = SCHEDULE_WAKE_LEAD_SECONDS,
+        probe_interval: float = SCHEDULE_PROBE_SECONDS,
+    ) -> None:
+        """Initialize a new instance of the Scheduler class.
+
+        The pending jobs of the state file are scheduled again.
+
+        Args:
+            state_path: The path of the state file, or None to keep the jobs
+                in memory only.
+            event_name: The calendar event name to match for every job.
+            check_calendar: Whether to check the calendar for every job.
+            timeout: Maximum number of seconds each job waits for enrollment
+                to open once it runs.
+            operation_options: Options for the operation of every job.
+            wake_lead: The number of seconds before the opening at which a
+                job runs.
+            probe_interval: The number of seconds between probes of a class
+                that shows no enrollment countdown yet.
+        """
+        self.state_path: Path | None = state_path
+        self.event_name: str | None = event_name
+        self.check_calendar: bool = check_calendar
+        self.timeout: int = timeout
+        self.options: OperationOptions = operation_options or OperationOptions()
+        self.wake_lead: float = wake_lead
+        self.probe_interval: float = probe_interval
+        self._jobs: dict[str, ScheduledJob] = {}
+        self._queue: list[tuple[float, str]] = []
+        self._running: set[str] = set()
+        self._lock: threading.Lock = threading.Lock()
+        self._executor: ThreadPoolExecutor = ThreadPoolExecutor(
+            max_workers=SCHEDULE_MAX_WORKERS, thread_name_prefix="regybox-scheduler"
+        )
+        with self._lock:
+            for job in self._read():
+                self._jobs[job.key] = job
+                if job.status == "pending":
+                    heapq.heappush(self._queue, (job.wake_at, job.key))
+        if self._queue:
+            LOGGER.info(f"Resuming {len(self._queue)} pending job(s) from {self.state_path}")
+
+    @property
+    def jobs(self) -> list[ScheduledJob]:
+        """The known jobs, ordered by the time they are next handled."""
+        with self._lock:
+            return sorted(self._jobs.values(), key=lambda job: job.wake_at)
+
+    def add(self, targets: Iterable[BatchTarget]) -> int:
+        """Schedule the targets that are not scheduled yet.
+
+        Targets that already have a job, whatever its status, and targets of
+        classes that already started are ignored.
+
+        Args:
+            targets: The classes to operate on.
+
+        Returns:
+            The number of jobs added.
+        """
+        now: float = time.time()
+        added: int = 0
+        with self._lock:
+            for target in targets:
+                job = ScheduledJob(target=target, wake_at=now)
+                if job.key in self._jobs or job.starts_at <= now:
+                    continue
+                self._jobs[job.key] = job
+                heapq.heappush(self._queue, (job.wake_at, job.key))
+                added += 1
+            if added:
+                self._save()
+        if added:
+            LOGGER.info(f"Scheduled {added} new job(s)")
+        return added
+
+    def run_pending(self) -> float:
+        """Start the jobs that are due, each in a worker thread.
+
+        Returns:
+            The number of seconds until the next job is due.
+        """
+        now: float = time.time()
+        due: list[ScheduledJob] = []
+        with self._lock:
+            while self._queue and self._queue[0][0] <= now:
+                wake_at, key = heapq.heappop(self._queue)
+                job: ScheduledJob | None = self._jobs.get(key)
+                # rescheduled jobs leave their previous queue entries behind
+                if job is None or job.status != "pending" or job.wake_at != wake_at:
+                    continue
+                if key not in self._running:
+                    self._running.add(key)
+                    due.append(job)
+            next_wake: float | None = self._queue[0][0] if self._queue else None
+        for job in due:
+            self._executor.submit(contextvars.copy_context().run, self._handle, job)
+        if next_wake is None:
+            return SCHEDULE_MAX_SLEEP_SECONDS
+        return max(0.0, next_wake - time.time())
+
+    def close(self) -> None:
+        """Wait for the running jobs to finish and release the workers."""
+        self._executor.shutdown(wait=True)
+
+    def _handle(self, job: ScheduledJob) -> None:
+        try:
+            self._run(job)
+        except Exception:  # noqa: BLE001
+            # the executor would keep the error in a future nobody reads
+            LOGGER.exception(f"{job.key} failed unexpectedly")
+            self._finish(job, "failed")
+        finally:
+            with self._lock:
+                self._running.discard(job.key)
+
+    def _run(self, job: ScheduledJob) -> None:
+        if job.starts_at <= time.time():
+            LOGGER.warning(f"{job.key} started before its job ran")
+            self._finish(job, "expired")
+            return
+        needs_probe: bool = job.opens_at is None and self.options.operation == "enroll"
+        if needs_probe and not self._probe(job):
+            return
+        self._prepare()
+        result: BatchResult = run_target(
+            job.target,
+            event_name=self.event_name,
+            check_calendar=self.check_calendar,
+            timeout=self.timeout,
+            operation_options=self.options,
+        )
+        if result.result is not None:
+            LOGGER.info(f"{job.key}: {result.result.operation} {result.result.status}")
+        self._finish(job, "failed" if result.error is not None else "done")
+
+    def _probe(self, job: ScheduledJob) -> bool:
+        """Predict the enrollment opening of a job from its class countdown.
+
+        Returns:
+            Whether the job should run now, as its opening is close or its
+            class no longer needs to be waited for.
+        """
+        target: BatchTarget = job.target
+        date = datetime.date.fromisoformat(target.class_date)
+        now: float = time.time()
+        try:
+            with priority("background"):
+                classes: list[ClassSnapshot] = get_classes(
+                    date.year,
+                    date.month,
+                    date.day,
+                    credentials=self.options.credentials,
+                    snapshots=True,
+                )
+            picked: ClassSnapshot = pick_first_class(
+                classes,
+                class_time=target.class_time,
+                class_types=parse_class_types(target.class_type),
+                class_date=target.class_date,
+            )
+        except (RegyboxBaseError, requests.RequestException) as e:
+            LOGGER.warning(f"Unable to probe {job.key}, retrying later: {e}")
+            self._reschedule(job, wake_at=now + self.probe_interval)
+            return False
+        if picked.time_to_enroll is None:
+            if picked.is_open or picked.user_is_enrolled or picked.is_overbooked:
+                return True
+            LOGGER.info(f"{job.key} shows no enrollment countdown yet")
+            self._reschedule(job, wake_at=now + self.probe_interval)
+            return False
+        opens_at: float = now + picked.time_to_enroll
+        if opens_at - self.wake_lead <= now:
+            return True
+        LOGGER.info(
+            f"Enrollment in {job.key} opens in {secs_to_str(picked.time_to_enroll)};"
+            f" waking {self.wake_lead:.0f} seconds before"
+        )
+        self._reschedule(job, wake_at=opens_at - self.wake_lead, opens_at=opens_at)
+        return False
+
+    def _prepare(self) -> None:
+        """Refresh the calendar and warm up the session before a job runs."""
+        if self.check_calendar:
+            try:
+                Calendar().refresh()
+            except (RegyboxBaseError, requests.RequestException) as e:
+                LOGGER.warning(f"Unable to refresh the calendar, using the previous one: {e}")
+        with priority("critical"):
+            warm_up_connection(self.options.credentials)
+
+    def _reschedule(
+        self, job: ScheduledJob, *, wake_at: float, opens_at: float | None = None
+    ) -> None:
+        with self._lock:
+            job.wake_at = wake_at
+            job.opens_at = opens_at
+            heapq.heappush(self._queue, (wake_at, job.key))
+            self._save()
+
+    def _finish(self, job: ScheduledJob, status: JobStatus) -> None:
+        with self._lock:
+            job.status = status
+            self._save()
+
+    def _read(self) -> list[ScheduledJob]:
+        if self.state_path is None:
+            return []
+        try:
+            data: object = json.loads(self.state_path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return []
+        except (OSError, ValueError):
+            LOGGER.warning(f"Ignoring unreadable scheduler state at {self.state_path}")
+            return []
+        if not isinstance(data, dict):
+            return []
+        state: dict[str, object] = cast("dict[str, object]", data)
+        raw_jobs: object = state.get("jobs")
+        if state.get("version") != SCHEDULE_STATE_VERSION or not isinstance(raw_jobs, list):
+            return []
+        jobs: list[ScheduledJob | None] = [
+            _parse_job(raw_job) for raw_job in cast("list[object]", raw_jobs)
+        ]
+        return [job for job in jobs if job is not None]
+
+    def _save(self) -> None:
+        # finished jobs are kept for a day so that they are not scheduled again
+        keep_after: float = time.time() - SCHEDULE_KEEP_SECONDS
+        for key in [key for key, job in self._jobs.items() if job.starts_at < keep_after]:
+            del self._jobs[key]
+        if self.state_path is None:
+            return
+        payload: str = json.dumps({
+            "version": SCHEDULE_STATE_VERSION,
+            "jobs": [
+                {
+                    "class_date": job.target.class_date,
+                    "class_time": job.target.class_time,
+                    "class_type": job.target.class_type,
+                    "opens_at": job.opens_at,
+                    "wake_at": job.wake_at,
+                    "status": job.status,
+                }
+                for job in self._jobs.values()
+            ],
+        })
+        try:
+            write_private_file(self.state_path, payload)
+        except OSError:
+            LOGGER.warning(f"Unable to write scheduler state at {self.state_path}", exc_info=True)
+
+
+def serve(targets_path: Path, scheduler: Scheduler, *, stop: threading.Event) -> None:
+    """Run a scheduler until it is stopped, following a targets file.
+
+    The targets file, in the format read by `parse_batch_targets`, is read
+    again whenever it changes, so targets can be added without restarting.
+
+    Args:
+        targets_path: The path of the targets file.
+        scheduler: The scheduler running the jobs.
+        stop: The event that stops the scheduler once set. Running jobs are
+            waited for.
+    """
+    loaded_mtime: float | None = None
+    try:
+        while not stop.is_set():
+            try:
+                mtime: float | None = targets_path.stat().st_mtime
+            except OSError:
+                mtime = None
+            if mtime is not None and mtime != loaded_mtime:
+                loaded_mtime = mtime
+                try:
+                    scheduler.add(
+                        parse_batch_targets(targets_path.read_text(encoding="utf-8").splitlines())
+                    )
+                except (OSError, ValueError) as e:
+                    LOGGER.error(f"Invalid targets file, keeping the scheduled jobs: {e}")
+            stop.wait(min(scheduler.run_pending(), SCHEDULE_MAX_SLEEP_SECONDS))
+    finally:
+        scheduler.close()
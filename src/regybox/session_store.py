@@ -0,0 +1,178 @@
+"""Persist Regybox sessions across runs.
+
+The SessionStore class keeps the cookies of each member session in an owner-
+only JSON file, so that later runs reuse the session.
+"""
+
+import json
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TypedDict, cast
+
+from regybox.common import LOGGER, SESSION_STORE
+from regybox.utils.files import write_private_file
+
+SESSION_STORE_MAX_AGE_SECONDS: int = 12 * 60 * 60
+SESSION_STORE_VERSION: int = 1
+
+
+class StoredCookie(TypedDict):
+    """A cookie of a stored session."""
+
+    name: str
+    value: str
+    domain: str
+    path: str
+
+
+@dataclass(frozen=True)
+class StoredSession:
+    """A session read from or written to the session store.
+
+    Attributes:
+        cookies: The cookie jar of the session.
+        validated_at: The Unix time at which the session was last set.
+    """
+
+    cookies: list[StoredCookie]
+    validated_at: float
+
+
+def _as_dict(raw: object) -> dict[str, object] | None:
+    return cast("dict[str, object]", raw) if isinstance(raw, dict) else None
+
+
+def _parse_cookie(raw: object) -> StoredCookie | None:
+    data: dict[str, object] | None = _as_dict(raw)
+    if data is None:
+        return None
+    name, value, domain, path = (data.get(key) for key in ("name", "value", "domain", "path"))
+    if not (
+        isinstance(name, str)
+        and isinstance(value, str)
+        and isinstance(domain, str)
+        and isinstance(path, str)
+    ):
+        return None
+    return StoredCookie(name=name, value=value, domain=domain, path=path)
+
+
+def _parse_session(raw: object) -> StoredSession | None:
+    data: dict[str, object] | None = _as_dict(raw)
+    if data is None:
+        return None
+    validated_at: object = data.get("validated_at")
+    raw_cookies: object = data.get("cookies")
+    if not isinstance(validated_at, int | float) or not isinstance(raw_cookies, list):
+        return None
+    cookies: list[StoredCookie | None] = [
+        _parse_cookie(raw_cookie) for raw_cookie in cast("list[object]", raw_cookies)
+    ]
+    valid_cookies: list[StoredCookie] = [cookie for cookie in cookies if cookie is not None]
+    if len(valid_cookies) != len(cookies):
+        return None
+    return StoredSession(cookies=valid_cookies, validated_at=float(validated_at))
+
+
+class SessionStore:
+    """Store Regybox session cookies in a JSON file.
+
+    Sessions are stored under a key identifying the member credentials and
+    expire `max_age` seconds after they were validated. A missing, unreadable
+    or corrupt file is treated as empty, and failing to write it is logged and
+    ignored, since the store only saves a round trip.
+    """
+
+    def __init__(self, path: Path, *, max_age: float = SESSION_STORE_MAX_AGE_SECONDS) -> None:
+        """Initialize a new instance of the SessionStore class.
+
+        Args:
+            path: The path of the JSON file.
+            max_age: The number of seconds a stored session is reused for.
+        """
+        self.path: Path = path
+        self.max_age: float = max_age
+        self._lock: threading.Lock = threading.Lock()
+
+    def load(self, key: str) -> StoredSession | None:
+        """Load a stored session that has not expired.
+
+        Args:
+            key: The key of the member credentials.
+
+        Returns:
+            The stored session, or None if there is no valid one.
+        """
+        with self._lock:
+            session: StoredSession | None = self._read().get(key)
+        if session is None or time.time() - session.validated_at > self.max_age:
+            return None
+        return session
+
+    def save(self, key: str, session: StoredSession) -> None:
+        """Store a session, replacing any previous one with the same key.
+
+        Args:
+            key: The key of the member credentials.
+            session: The session to store.
+        """
+        with self._lock:
+            sessions: dict[str, StoredSession] = self._read()
+            sessions[key] = session
+            self._write(sessions)
+
+    def discard(self, key: str) -> None:
+        """Remove a stored session, if any.
+
+        Args:
+            key: The key of the member credentials.
+        """
+        with self._lock:
+            sessions: dict[str, StoredSession] = self._read()
+            if sessions.pop(key, None) is not None:
+                self._write(sessions)
+
+    def _read(self) -> dict[str, StoredSession]:
+        try:
+            data: object = json.loads(self.path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError):
+            LOGGER.warning(f"Ignoring unreadable session store at {self.path}")
+            return {}
+        store: dict[str, object] | None = _as_dict(data)
+        if store is None or store.get("version") != SESSION_STORE_VERSION:
+            return {}
+        raw_sessions: dict[str, object] | None = _as_dict(store.get("sessions"))
+        if raw_sessions is None:
+            return {}
+        sessions: dict[str, StoredSession] = {}
+        for key, raw_session in raw_sessions.items():
+            session: StoredSession | None = _parse_session(raw_session)
+            if session is not None:
+                sessions[key] = session
+        return sessions
+
+    def _write(self, sessions: dict[str, StoredSession]) -> None:
+        payload: str = json.dumps({
+            "version": SESSION_STORE_VERSION,
+            "sessions": {
+                key: {"cookies": session.cookies, "validated_at": session.validated_at}
+                for key, session in sessions.items()
+            },
+        })
+        try:
+            write_private_file(self.path, payload)
+        except OSError:
+            LOGGER.warning(f"Unable to write session store at {self.path}", exc_info=True)
+
+
+def get_session_store() -> SessionStore | None:
+    """Get the session store configured with ``REGYBOX_SESSION_STORE``.
+
+    Returns:
+        The session store, or None if it is disabled.
+    """
+    return SessionStore(Path(SESSION_STORE)) if SESSION_STORE else None
@@ -0,0 +1,124 @@
+"""Coalesce identical concurrent Regybox requests.
+
+Inside a SingleFlight group, concurrent calls with the same key share the
+result of the first one, which can also be reused for a short window.
+"""
+
+import threading
+from collections.abc import Callable, Hashable
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from time import monotonic
+from typing import Generic, TypeVar
+
+from regybox.common import LOGGER
+from regybox.deadline import remaining_seconds
+from regybox.exceptions import DeadlineExceededError
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class _Flight(Generic[V]):  # noqa: UP046
+    """A call in flight, or its result while it is fresh."""
+
+    def __init__(self, *, fresh_for: float) -> None:
+        self.future: Future[V] = Future()
+        self.done_at: float | None = None
+        self.fresh_for: float = fresh_for
+
+    def is_fresh(self, fresh_for: float) -> bool:
+        return self.done_at is not None and monotonic() - self.done_at < fresh_for
+
+
+class SingleFlight(Generic[K, V]):  # noqa: UP046
+    """A group of calls in which concurrent calls with the same key share one.
+
+    The first call for a key runs, and calls made with the same key while it
+    runs wait for its result. With a freshness window, calls made shortly after
+    it returned get the same result without running.
+    """
+
+    def __init__(self, *, fresh_for: float = 0.0) -> None:
+        """Initialize a new instance of the SingleFlight class.
+
+        Args:
+            fresh_for: The number of seconds a result is reused for after it
+                was returned, or 0 to only share calls in flight.
+        """
+        self.fresh_for: float = fresh_for
+        self._flights: dict[K, _Flight[V]] = {}
+        self._lock: threading.Lock = threading.Lock()
+
+    def do(self, key: K, call: Callable[[], V], *, fresh_for: float | None = None) -> V:
+        """Run a call, or share the result of an identical one.
+
+        A call waiting on another one is bounded by its own deadline, see
+        `regybox.deadline`.
+
+        Args:
+            key: The key identifying identical calls.
+            call: The call to run if no identical call is in flight or fresh.
+            fresh_for: The freshness window of this call, if longer than the
+                one of the group. It applies both to the results this call
+                reuses and to how long its own result is kept.
+
+        Returns:
+            The result of the call, or of the identical call it shared.
+
+        Raises:
+            DeadlineExceededError: If the deadline passes while waiting for
+                an identical call.
+        """
+        window: float = max(self.fresh_for, fresh_for or 0.0)
+        with self._lock:
+            current: _Flight[V] | None = self._flights.get(key)
+            shared: bool = current is not None and (
+                not current.future.done() or current.is_fresh(window)
+            )
+            if current is None or not shared:
+                self._prune()
+                current = self._flights[key] = _Flight(fresh_for=window)
+            flight: _Flight[V] = current
+        if shared:
+            LOGGER.debug(f"Sharing the result of an identical request for {key!r}")
+            remaining: float | None = remaining_seconds()
+            try:
+                return flight.future.result(
+                    timeout=None if remaining is None else max(0.0, remaining)
+                )
+            except FutureTimeoutError:
+                raise DeadlineExceededError(0.0) from None
+        try:
+            result: V = call()
+        except BaseException as e:
+            self._forget(key, flight)
+            flight.future.set_exception(e)
+            raise
+        flight.done_at = monotonic()
+        flight.future.set_result(result)
+        if window <= 0:
+            self._forget(key, flight)
+        return result
+
+    def forget(self, key: K) -> None:
+        """Stop sharing the result of a call, so that the next call runs.
+
+        Args:
+            key: The key identifying the call.
+        """
+        with self._lock:
+            self._flights.pop(key, None)
+
+    def _forget(self, key: K, flight: _Flight[V]) -> None:
+        with self._lock:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+
+    def _prune(self) -> None:
+        for key in [
+            key
+            for key, flight in self._flights.items()
+            if flight.future.done() and not flight.is_fresh(flight.fresh_for)
+        ]:
+            del self._flights[key]
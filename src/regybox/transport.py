@@ -0,0 +1,397 @@
+"""Select the transport used for Regybox traffic.
+
+Regybox traffic goes over a shared HTTP/2 connection when the ``http2`` extra
+is installed, or over HTTP/1.1 otherwise, see `get_transport`.
+"""
+
+import contextvars
+import functools
+import http.client
+import importlib.util
+import time
+from collections.abc import Generator, Mapping
+from contextlib import contextmanager
+from dataclasses import dataclass
+from http.cookiejar import CookieJar
+from typing import TYPE_CHECKING, Literal, cast
+
+import httpx
+import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.cookies import MockRequest, MockResponse
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+from urllib3.exceptions import MaxRetryError, ResponseError
+from urllib3.response import HTTPResponse
+from urllib3.util.retry import Retry
+
+from regybox.common import TRANSPORT
+
+if TYPE_CHECKING:
+    from urllib.request import Request
+
+Transport = Literal["http2", "http1"]
+TRANSPORTS: tuple[Transport, ...] = ("http2", "http1")
+RequestTimeout = float | tuple[float | None, float | None] | None
+HOP_BY_HOP_HEADERS: frozenset[str] = frozenset({
+    "connection",
+    "keep-alive",
+    "proxy-connection",
+    "transfer-encoding",
+    "upgrade",
+})
+
+_over_http1: contextvars.ContextVar[bool] = contextvars.ContextVar(
+    "regybox_over_http1", default=False
+)
+
+
+def available_transports() -> list[Transport]:
+    """List the installed transports, preferred first.
+
+    Returns:
+        The names of the transports that can be used.
+    """
+    return [
+        transport
+        for transport in TRANSPORTS
+        if transport != "http2" or importlib.util.find_spec("h2") is not None
+    ]
+
+
+def get_transport(transport: str | None = None) -> Transport:
+    """Resolve the transport to use for Regybox traffic.
+
+    Args:
+        transport: The requested transport. If None or empty, the
+            ``REGYBOX_TRANSPORT`` environment variable is used, falling back
+            to the preferred installed transport.
+
+    Returns:
+        The name of the transport.
+
+    Raises:
+        ValueError: If the requested transport is unknown or not installed.
+    """
+    requested: str = transport or TRANSPORT
+    available: list[Transport] = available_transports()
+    if not requested:
+        return available[0]
+    if requested not in available:
+        raise ValueError(
+            f"Unknown or unavailable transport {requested!r}; expected one of"
+            f" {', '.join(available)}"
+        )
+    return requested
+
+
+@functools.cache
+def get_http2_client() -> httpx.Client:
+    """Get the HTTP/2 client shared by every session in the process.
+
+    The client only holds connections: it never sends cookies of its own, so
+    that sessions of different members can share its connections.
+
+    Returns:
+        The shared HTTP/2 client.
+    """
+    return httpx.Client(http2=True, follow_redirects=False)
+
+
+@contextmanager
+def over_http1() -> Generator[None]:
+    """Send the requests made inside the context over HTTP/1.1.
+
+    An `Http2Adapter` sends them over its own pool of HTTP/1.1 connections,
+    since a request multiplexed onto the shared HTTP/2 connection is held up
+    by whatever holds up that connection.
+
+    Yields:
+        None.
+    """
+    token: contextvars.Token[bool] = _over_http1.set(True)
+    try:
+        yield
+    finally:
+        _over_http1.reset(token)
+
+
+@contextmanager
+def _as_requests_errors(request: requests.PreparedRequest | None = None) -> Generator[None]:
+    """Raise the httpx transport errors of the context as `requests` errors.
+
+    Args:
+        request: The prepared request the errors relate to.
+
+    Yields:
+        None.
+
+    Raises:
+        requests.ConnectTimeout: If connecting timed out.
+        requests.ReadTimeout: If reading or writing timed out.
+        requests.ConnectionError: If the connection failed otherwise.
+    """
+    try:
+        yield
+    except httpx.ConnectTimeout as e:
+        raise requests.ConnectTimeout(e, request=request) from e
+    except httpx.TimeoutException as e:
+        raise requests.ReadTimeout(e, request=request) from e
+    except httpx.TransportError as e:
+        raise requests.ConnectionError(e, request=request) from e
+
+
+def _as_bytes(value: bytes | str) -> bytes:
+    return value.encode("latin-1") if isinstance(value, str) else value
+
+
+def _as_httpx_timeout(timeout: RequestTimeout) -> httpx.Timeout:
+    if isinstance(timeout, tuple):
+        connect, read = timeout
+        return httpx.Timeout(read, connect=connect)
+    return httpx.Timeout(timeout)
+
+
+@dataclass(frozen=True)
+class _CookieSource:
+    """Expose response headers the way `requests` extracts cookies from."""
+
+    msg: http.client.HTTPMessage
+
+
+def _extract_cookies(
+    jar: CookieJar, request: requests.PreparedRequest, message: http.client.HTTPMessage
+) -> None:
+    """Store the cookies set by a response, like `requests` does.
+
+    This is `requests.cookies.extract_cookies_to_jar`, which is untyped.
+    """
+    jar.extract_cookies(
+        cast("http.client.HTTPResponse", MockResponse(message)),
+        cast("Request", MockRequest(request)),
+    )
+
+
+class _StreamedBody:
+    """Read the body of an httpx response as the raw body of `requests`.
+
+    The body is decoded, as with urllib3 ``decode_content``, and transport
+    errors raised while reading it are raised as `requests` errors.
+    """
+
+    def __init__(self, res: httpx.Response) -> None:
+        """Initialize a new instance of the _StreamedBody class.
+
+        Args:
+            res: A streamed httpx response.
+        """
+        self.status: int = res.status_code
+        self.reason: str = res.reason_phrase
+        message = http.client.HTTPMessage()
+        for name, value in res.headers.multi_items():
+            message[name] = value
+        self.message: http.client.HTTPMessage = message
+        self._original_response: _CookieSource = _CookieSource(message)
+        self._res: httpx.Response = res
+        self._chunks = res.iter_bytes()
+        self._buffer: bytearray = bytearray()
+
+    def read(self, amt: int | None = None) -> bytes:
+        """Read up to `amt` bytes of the decoded body.
+
+        Args:
+            amt: The number of bytes to read. Defaults to the whole body.
+
+        Returns:
+            The bytes read, which are empty once the body is read.
+        """
+        with _as_requests_errors():
+            while amt is None or len(self._buffer) < amt:
+                chunk: bytes | None = next(self._chunks, None)
+                if chunk is None:
+                    break
+                self._buffer += chunk
+        size: int = len(self._buffer) if amt is None else amt
+        data: bytes = bytes(self._buffer[:size])
+        del self._buffer[:size]
+        return data
+
+    def close(self) -> None:
+        """Close the response and release its stream."""
+        self._res.close()
+
+
+class Http2Adapter(BaseAdapter):
+    """A `requests` transport adapter that sends requests over HTTP/2.
+
+    Requests are sent with an `httpx.Client`, which multiplexes concurrent
+    requests over one connection per host. Cookies and redirects are still
+    handled by `requests.Session`, and transient failures are retried with
+    `max_retries`, like `requests.adapters.HTTPAdapter`. TLS and proxy settings
+    are those of the client.
+
+    Inside an `over_http1` context, requests are sent with an HTTPAdapter of
+    this adapter instead, over HTTP/1.1 connections of their own.
+    """
+
+    def __init__(self, client: httpx.Client, *, max_retries: Retry) -> None:
+        """Initialize a new instance of the Http2Adapter class.
+
+        Args:
+            client: The client to send requests with, which may be shared
+                with other adapters and is not closed by this one.
+            max_retries: The retry policy for transient failures.
+        """
+        super().__init__()
+        self.client: httpx.Client = client
+        self.max_retries: Retry = max_retries
+        self.http1: HTTPAdapter = HTTPAdapter(max_retries=max_retries)
+
+    def send(
+        self,
+        request: requests.PreparedRequest,
+        stream: bool = False,  # noqa: FBT001, FBT002
+        timeout: RequestTimeout = None,
+        verify: bool | str = True,  # noqa: FBT001, FBT002
+        cert: bytes | str | tuple[bytes | str, bytes | str] | None = None,
+        proxies: Mapping[str, str] | None = None,
+    ) -> requests.Response:
+        """Send a prepared request, retrying transient failures.
+
+        Args:
+            request: The prepared request to send.
+            stream: Whether to leave the body to be read while iterating.
+            timeout: The timeout of each attempt, in seconds, or a tuple of
+                connect and read timeouts.
+            verify: Only used over HTTP/1.1, TLS is otherwise verified by
+                the client.
+            cert: Only used over HTTP/1.1, client certificates are otherwise
+                set on the client.
+            proxies: Only used over HTTP/1.1, proxies are otherwise set on
+                the client.
+
+        Returns:
+            The response to the request.
+
+        Raises:
+            requests.RequestException: If the connection keeps failing after
+                all retries.
+            requests.ConnectionError: If a status retry does not fit in the
+                deadline, like `requests.adapters.HTTPAdapter`.
+            requests.exceptions.RetryError: If the status retries are
+                exhausted, like `requests.adapters.HTTPAdapter` does unless
+                the retry policy disables ``raise_on_status``.
+        """
+        if _over_http1.get():
+            return self.http1.send(
+                request,
+                stream=stream,
+                # urllib3 also takes a None connect or read timeout
+                timeout=cast("float | tuple[float, float] | None", timeout),
+                verify=verify,
+                cert=cert,
+                proxies=proxies,
+            )
+        method: str = request.method or "GET"
+        url: str = request.url or ""
+        retry: Retry = self.max_retries
+        while True:
+            try:
+                with _as_requests_errors(request):
+                    res: httpx.Response = self.client.send(
+                        self._build_request(request, timeout), stream=True
+                    )
+            except requests.RequestException as e:
+                try:
+                    retry = retry.increment(method=method, url=url, error=e)
+                except MaxRetryError:
+                    raise e from None
+                time.sleep(retry.get_backoff_time())
+                continue
+            if retry.is_retry(method, res.status_code, "Retry-After" in res.headers):
+                raw = HTTPResponse(
+                    headers=dict(res.headers), status=res.status_code, preload_content=False
+                )
+                try:
+                    retry = retry.increment(method=method, url=url, response=raw)
+                except MaxRetryError as e:
+                    if retry.raise_on_status:
+                        res.close()
+                        if isinstance(e.reason, ResponseError):
+                            raise requests.exceptions.RetryError(e, request=request) from None
+                        raise requests.ConnectionError(e, request=request) from None
+                else:
+                    retry_after: float | None = (
+                        retry.get_retry_after(raw) if retry.respect_retry_after_header else None
+                    )
+                    res.close()
+                    time.sleep(
+                        retry_after if retry_after is not None else retry.get_backoff_time()
+                    )
+                    continue
+            response: requests.Response = self.build_response(request, res)
+            if not stream:
+                _ = response.content
+            return response
+
+    @staticmethod
+    def build_response(
+        request: requests.PreparedRequest, res: httpx.Response
+    ) -> requests.Response:
+        """Build a `requests` response from a streamed httpx response.
+
+        Args:
+            request: The prepared request that was sent.
+            res: The streamed httpx response.
+
+        Returns:
+            The response, whose body is read from the httpx stream.
+        """
+        response = requests.Response()
+        response.status_code = res.status_code
+        response.headers = CaseInsensitiveDict(dict(res.headers))
+        response.encoding = get_encoding_from_headers(response.headers)
+        body = _StreamedBody(res)
+        response.raw = body
+        response.reason = res.reason_phrase
+        response.url = request.url or ""
+        _extract_cookies(response.cookies, request, body.message)
+        response.request = request
+        return response
+
+    def close(self) -> None:
+        """Close the HTTP/1.1 connections, leaving the shared client open."""
+        self.http1.close()
+
+    @staticmethod
+    def _build_request(
+        request: requests.PreparedRequest, timeout: RequestTimeout
+    ) -> httpx.Request:
+        body = request.body
+        return httpx.Request(
+            request.method or "GET",
+            request.url or "",
+            headers=[
+                (_as_bytes(name), _as_bytes(value))
+                for name, value in request.headers.items()
+                if name.lower() not in HOP_BY_HOP_HEADERS
+            ],
+            content=None if body is None else _as_bytes(body),
+            extensions={"timeout": _as_httpx_timeout(timeout).as_dict()},
+        )
+
+
+def get_adapter(max_retries: Retry, transport: str | None = None) -> BaseAdapter:
+    """Build the `requests` adapter for the selected transport.
+
+    Args:
+        max_retries: The retry policy for transient failures.
+        transport: The requested transport, see `get_transport`.
+
+    Returns:
+        An adapter sending requests over HTTP/2 through the shared client, or
+        over urllib3 HTTP/1.1 connections.
+    """
+    if get_transport(transport) == "http2":
+        return Http2Adapter(get_http2_client(), max_retries=max_retries)
+    return HTTPAdapter(max_retries=max_retries)
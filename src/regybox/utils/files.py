@@ -0,0 +1,31 @@
+"""Provide utility functions for file operations."""
+
+import contextlib
+import os
+from pathlib import Path
+
+
+def write_private_file(path: Path, text: str) -> None:
+    """Atomically write a text file that only its owner can read.
+
+    The text is written to a temporary file next to the target, which then
+    replaces it, so that readers never see a partially written file.
+
+    Args:
+        path: The path of the file.
+        text: The text to write.
+
+    Raises:
+        OSError: If the file cannot be written.
+    """
+    tmp_path: Path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    try:
+        path.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+        fd: int = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w", encoding="utf-8") as file_:
+            file_.write(text)
+        tmp_path.replace(path)
+    except OSError:
+        with contextlib.suppress(OSError):
+            tmp_path.unlink(missing_ok=True)
+        raise
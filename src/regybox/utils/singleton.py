@@ -2,6 +2,7 @@
 
 from __future__ import annotations
 
+import threading
 from typing import ClassVar, TypeVar, cast
 
 T = TypeVar("T", bound=object)
@@ -19,10 +20,12 @@ class Singleton(type):
         only one instance. It overrides the __call__ method to check if an
         instance of the class already exists and returns it if available,
         otherwise it creates a new instance and stores it in the dictionary of
-        instances.
+        instances. Instances are created under a lock, so that threads
+        racing to create the same singleton share one instance.
     """
 
     _instances: ClassVar[dict[type[object], object]] = {}
+    _lock: ClassVar[threading.RLock] = threading.RLock()
 
     def __call__(cls: type[T], *args: object, **kwargs: object) -> T:
         """Method for creating or retrieving the instance of the class.
@@ -31,5 +34,7 @@ class Singleton(type):
             The instance of the class.
         """
         if cls not in Singleton._instances:
-            Singleton._instances[cls] = type.__call__(cls, *args, **kwargs)
+            with Singleton._lock:
+                if cls not in Singleton._instances:
+                    Singleton._instances[cls] = type.__call__(cls, *args, **kwargs)
         return cast("T", Singleton._instances[cls])
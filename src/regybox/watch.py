@@ -0,0 +1,160 @@
+"""Watch a full class for a free spot until it starts.
+
+The watch_class function polls one class, more often when cancellations
+cluster, and enrolls in it once it has a spot.
+"""
+
+import datetime
+import time
+
+import requests
+
+from regybox.classes import Class, get_class_at
+from regybox.common import CANCELLATION_DEADLINE_MINUTES, LOGGER, TIMEZONE
+from regybox.connection import RegyboxCredentials
+from regybox.deadline import deadline
+from regybox.exceptions import ClassNotFoundError, NoClassesFoundError, RegyboxBaseError
+from regybox.rate_limit import priority
+from regybox.utils.times import secs_to_str
+
+WATCH_BUDGET: int = 60
+WATCH_MIN_INTERVAL_SECONDS: float = 30.0
+WATCH_MAX_INTERVAL_SECONDS: float = 30 * 60
+WATCH_HOT_WINDOW_SECONDS: float = 15 * 60
+WATCH_POLL_DEADLINE: float = 30.0
+WATCH_ENROLL_DEADLINE: float = 30.0
+CANCELLATION_DEADLINE_SECONDS: float = CANCELLATION_DEADLINE_MINUTES * 60
+
+
+def watch_interval(
+    *, seconds_to_start: float, seconds_to_deadline: float, polls_left: int
+) -> float:
+    """Compute the number of seconds until the next poll of a watched class.
+
+    Args:
+        seconds_to_start: The number of seconds until the class starts.
+        seconds_to_deadline: The number of seconds until the cancellation
+            deadline, negative once it has passed.
+        polls_left: The number of polls left in the budget of the class.
+
+    Returns:
+        `WATCH_MIN_INTERVAL_SECONDS` within a window where cancellations
+        cluster. Otherwise, the time until the next window spread over half of
+        the polls left, within the interval bounds and never past the start of
+        that window.
+    """
+    windows: list[tuple[float, float]] = [
+        (seconds_to_deadline - WATCH_HOT_WINDOW_SECONDS, seconds_to_deadline),
+        (seconds_to_start - WATCH_HOT_WINDOW_SECONDS, seconds_to_start),
+    ]
+    if any(start <= 0 < end for start, end in windows):
+        return WATCH_MIN_INTERVAL_SECONDS
+    next_window: float = min(
+        (start for start, _ in windows if start > 0), default=max(0.0, seconds_to_start)
+    )
+    spread: float = next_window / max(1, polls_left // 2)
+    return min(
+        next_window,
+        max(WATCH_MIN_INTERVAL_SECONDS, min(WATCH_MAX_INTERVAL_SECONDS, spread)),
+    )
+
+
+def _has_free_spot(class_: Class) -> bool:
+    return (
+        class_.max_capacity is not None
+        and class_.cur_capacity < class_.max_capacity
+        and class_.is_open
+        and class_.enroll_url is not None
+        and not class_.user_is_enrolled
+    )
+
+
+def _fetch_class(
+    date: datetime.date,
+    *,
+    class_time: str,
+    class_type: str,
+    credentials: RegyboxCredentials | None,
+) -> Class | None:
+    try:
+        return get_class_at(date, class_time, [class_type], credentials=credentials)
+    except (ClassNotFoundError, NoClassesFoundError):
+        return None
+
+
+def watch_class(
+    *,
+    class_date: str,
+    class_time: str,
+    class_type: str,
+    credentials: RegyboxCredentials | None = None,
+    budget: int = WATCH_BUDGET,
+    cancellation_deadline: float = CANCELLATION_DEADLINE_SECONDS,
+) -> bool:
+    """Watch a class until it starts and enroll in it once it has a spot.
+
+    A member on the waitlist cannot enroll in the class again, so a free spot
+    is left to Regybox, which moves the first member of the waitlist into the
+    class; the watch ends once the member is moved in. Polls that fail are
+    logged and count against the budget.
+
+    Args:
+        class_date: The date of the class in the format 'YYYY-MM-DD'.
+        class_time: The start time of the class in the format 'HH:MM'.
+        class_type: The class type.
+        credentials: The credentials of the member to enroll. Defaults to the
+            credentials configured in the environment.
+        budget: The maximum number of polls of the class.
+        cancellation_deadline: The number of seconds before the class starts
+            until which members can cancel without a penalty.
+
+    Returns:
+        Whether the member got a spot in the class, rather than staying on the
+        waitlist or being left out.
+    """
+    date: datetime.date = datetime.date.fromisoformat(class_date)
+    starts_at: float = datetime.datetime.combine(
+        date, datetime.time.fromisoformat(class_time), tzinfo=TIMEZONE
+    ).timestamp()
+    for poll in range(1, budget + 1):
+        seconds_to_start: float = starts_at - time.time()
+        wait: float = watch_interval(
+            seconds_to_start=seconds_to_start,
+            seconds_to_deadline=seconds_to_start - cancellation_deadline,
+            polls_left=budget - poll + 1,
+        )
+        if wait >= seconds_to_start:
+            LOGGER.info(f"{class_type} on {class_date} at {class_time} starts without a spot")
+            return False
+        LOGGER.info(
+            f"Watching {class_type} on {class_date} at {class_time} for a spot; poll {poll} of"
+            f" {budget} in {secs_to_str(round(wait))}"
+        )
+        time.sleep(wait)
+        try:
+            with deadline(WATCH_POLL_DEADLINE):
+                class_: Class | None = _fetch_class(
+                    date, class_time=class_time, class_type=class_type, credentials=credentials
+                )
+        except (RegyboxBaseError, requests.RequestException) as e:
+            LOGGER.warning(f"Unable to fetch {class_type}, watching it on: {e}")
+            continue
+        if class_ is None:
+            LOGGER.warning(f"{class_type} on {class_date} at {class_time} is no longer listed")
+            return False
+        if class_.user_is_enrolled and not class_.user_is_waitlisted:
+            LOGGER.info("Moved from the waitlist into the class")
+            return True
+        if not _has_free_spot(class_):
+            continue
+        LOGGER.info(f"{class_type} has {class_.cur_capacity}/{class_.max_capacity}; enrolling")
+        try:
+            with deadline(WATCH_ENROLL_DEADLINE), priority("critical"):
+                class_.enroll(credentials=credentials)
+        except (RegyboxBaseError, requests.RequestException) as e:
+            LOGGER.warning(f"Unable to enroll in {class_type}, watching it on: {e}")
+            continue
+        if not class_.user_is_waitlisted:
+            return True
+    LOGGER.warning(f"Reached the limit of {budget} polls while watching {class_type}")
+    return False
@@ -1,9 +1,13 @@
 """Test configuration for the Regybox package."""
 
+from collections.abc import Iterator
 from typing import Final
 
 import pytest
 
+from regybox.class_cache import ClassCache
+from regybox.utils.singleton import Singleton
+
 # taken from https://raw.githubusercontent.com/collective/icalendar/v5.0.11/src/icalendar/tests/calendars/timezone_rdate.ics
 CALENDAR_FIXTURE: Final[str] = """BEGIN:VCALENDAR
 VERSION:2.0
@@ -76,6 +80,7 @@ class _StaticResponse:
 
     def __init__(self, content: str) -> None:
         self.content = content.encode("utf-8")
+        self.status_code = 200
 
     def raise_for_status(self) -> None:
         """Mirror the requests API without performing any checks."""
@@ -89,3 +94,11 @@ def _mock_get(url: str, timeout: int = 10, **_: object) -> _StaticResponse:
 @pytest.fixture
 def mock_requests_get(monkeypatch: pytest.MonkeyPatch) -> None:
     monkeypatch.setattr("requests.get", _mock_get)
+
+
+@pytest.fixture(autouse=True)
+def reset_class_cache() -> Iterator[None]:
+    """Give each test an empty in-memory class cache."""
+    Singleton._instances.pop(ClassCache, None)
+    yield
+    Singleton._instances.pop(ClassCache, None)
@@ -0,0 +1,145 @@
+"""Tests for the batch module."""
+
+import threading
+from unittest.mock import patch
+
+import pytest
+import requests
+
+from regybox.batch import (
+    BATCH_SHARED_PAGE_SECONDS,
+    BatchTarget,
+    parse_batch_targets,
+    run_batch,
+    run_target,
+)
+from regybox.classes import _shared_pages_fresh_for
+from regybox.exceptions import ClassNotOpenError
+from regybox.regybox import (
+    DEFAULT_CALENDAR_EVENT_NAME,
+    ClassSlot,
+    OperationOptions,
+    OperationResult,
+)
+
+
+def test_parse_batch_targets_skips_comments_and_blank_lines() -> None:
+    targets = parse_batch_targets([
+        "# this week\n",
+        "2026-03-10 06:30 WOD Rato\n",
+        "\n",
+        "2026-03-12 7:00 Open Box, WOD Rato\n",
+    ])
+
+    assert targets == [
+        BatchTarget("2026-03-10", "06:30", "WOD Rato"),
+        BatchTarget("2026-03-12", "07:00", "Open Box, WOD Rato"),
+    ]
+
+
+@pytest.mark.parametrize(
+    "line", ["2026-03-10 06:30", "2026-13-10 06:30 WOD", "2026-03-10 25:00 WOD"]
+)
+def test_parse_batch_targets_rejects_invalid_lines(line: str) -> None:
+    with pytest.raises(ValueError, match="Line 2"):
+        parse_batch_targets(["2026-03-10 06:30 WOD Rato", line])
+
+
+def test_run_batch_polls_each_date_once_for_its_enroll_targets() -> None:
+    targets = [
+        BatchTarget("2026-03-10", "06:30", "WOD Rato"),
+        BatchTarget("2026-03-11", "06:30", "Open Box"),
+        BatchTarget("2026-03-10", "07:30", "WOD Rato"),
+    ]
+    not_open = ClassNotOpenError()
+
+    def fake_enroll_many(
+        slots: list[ClassSlot], **kwargs: object
+    ) -> list[OperationResult | Exception]:
+        if kwargs["class_date"] == "2026-03-11":
+            raise requests.ConnectionError("calendar unreachable")
+        outcomes: list[OperationResult | Exception] = [
+            OperationResult("enroll", "success", "WOD Rato"),
+            not_open,
+        ]
+        return outcomes[: len(slots)]
+
+    with patch("regybox.batch.enroll_many", side_effect=fake_enroll_many) as mock_enroll_many:
+        results = run_batch(targets, event_name=None, timeout=30)
+
+    assert [result.target for result in results] == targets
+    assert results[0].result == OperationResult("enroll", "success", "WOD Rato")
+    assert isinstance(results[1].error, requests.ConnectionError)
+    assert results[2].error is not_open
+    assert mock_enroll_many.call_count == 2
+    mock_enroll_many.assert_any_call(
+        [ClassSlot("06:30", "WOD Rato"), ClassSlot("07:30", "WOD Rato")],
+        class_date="2026-03-10",
+        event_name=DEFAULT_CALENDAR_EVENT_NAME,
+        check_calendar=True,
+        timeout=30,
+        operation_options=OperationOptions(),
+    )
+
+
+def test_run_target_keeps_a_request_error() -> None:
+    target = BatchTarget("2026-03-10", "06:30", "WOD Rato")
+    error = requests.exceptions.RetryError("too many 503 error responses")
+
+    with patch("regybox.batch.main", side_effect=error):
+        result = run_target(target)
+
+    assert result.result is None
+    assert result.error is error
+
+
+def test_run_batch_runs_targets_concurrently_and_keeps_their_order() -> None:
+    targets = [
+        BatchTarget("2026-03-10", "06:30", "WOD Rato"),
+        BatchTarget("2026-03-10", "07:30", "WOD Rato"),
+        BatchTarget("2026-03-11", "06:30", "Open Box"),
+    ]
+    options = OperationOptions(operation="unenroll")
+    all_started = threading.Barrier(len(targets), timeout=5)
+    shared_windows: list[float | None] = []
+
+    def fake_main(**kwargs: object) -> OperationResult:
+        all_started.wait()
+        shared_windows.append(_shared_pages_fresh_for.get())
+        if kwargs["class_time"] == "07:30":
+            raise ClassNotOpenError
+        return OperationResult(
+            operation="unenroll", status="success", class_type=str(kwargs["class_type"])
+        )
+
+    with patch("regybox.batch.main", side_effect=fake_main) as mock_main:
+        results = run_batch(targets, event_name=None, timeout=30, operation_options=options)
+
+    assert [result.target for result in results] == targets
+    assert results[0].result == OperationResult("unenroll", "success", "WOD Rato")
+    assert results[1].result is None
+    assert isinstance(results[1].error, ClassNotOpenError)
+    assert results[2].result == OperationResult("unenroll", "success", "Open Box")
+    assert shared_windows == [BATCH_SHARED_PAGE_SECONDS] * len(targets)
+    assert _shared_pages_fresh_for.get() is None
+    mock_main.assert_any_call(
+        class_date="2026-03-11",
+        class_time="06:30",
+        class_type="Open Box",
+        event_name=DEFAULT_CALENDAR_EVENT_NAME,
+        check_calendar=True,
+        timeout=30,
+        operation_options=options,
+    )
+
+
+def test_run_batch_rejects_non_positive_max_workers() -> None:
+    with pytest.raises(ValueError, match="max_workers"):
+        run_batch([BatchTarget("2026-03-10", "06:30", "WOD Rato")], max_workers=0)
+
+
+def test_run_batch_without_targets_does_nothing() -> None:
+    with patch("regybox.batch.main") as mock_main:
+        assert run_batch([]) == []
+
+    mock_main.assert_not_called()
@@ -1,7 +1,9 @@
 import datetime
+from unittest.mock import Mock
 from zoneinfo import ZoneInfo
 
 import pytest
+import requests
 
 from regybox.cal import Calendar, check_cal
 from regybox.common import TIMEZONE
@@ -86,3 +88,21 @@ def test_check_cal_returns_true_when_no_calendar_url(monkeypatch: pytest.MonkeyP
     finally:
         if Calendar in Singleton._instances:
             del Singleton._instances[Calendar]
+
+
+def test_refresh_downloads_the_calendar_again(
+    mock_requests_get: pytest.MonkeyPatch,  # noqa: ARG001
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    get = Mock(wraps=requests.get)
+    monkeypatch.setattr("requests.get", get)
+    Singleton._instances.pop(Calendar, None)
+    try:
+        calendar = Calendar()
+        assert Calendar() is calendar
+        calendar.refresh()
+    finally:
+        Singleton._instances.pop(Calendar, None)
+
+    assert get.call_count == 2
+    assert calendar.find(when=datetime.date(2012, 2, 13)) is not None
@@ -0,0 +1,226 @@
+"""Tests for the circuit_breaker module."""
+
+import asyncio
+import threading
+from collections.abc import Iterator
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import override
+from unittest.mock import patch
+
+import httpx
+import pytest
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util import Retry
+
+from regybox.cal import SERVICE_NAME as CALENDAR_SERVICE_NAME
+from regybox.cal import Calendar
+from regybox.circuit_breaker import CircuitBreaker, CircuitBreakers, get_circuit_breaker
+from regybox.connection import (
+    RETRY_TOTAL,
+    SERVICE_NAME,
+    AsyncRegyboxSession,
+    RegyboxSession,
+    get_default_credentials,
+)
+from regybox.exceptions import ServiceUnavailableError
+from regybox.utils.singleton import Singleton
+
+
+@pytest.fixture(name="breaker")
+def fixture_breaker() -> CircuitBreaker:
+    return CircuitBreaker("Regybox", threshold=2, reset_timeout=30)
+
+
+@pytest.fixture(name="breakers")
+def fixture_breakers() -> Iterator[CircuitBreakers]:
+    Singleton._instances.pop(CircuitBreakers, None)
+    yield CircuitBreakers()
+    Singleton._instances.pop(CircuitBreakers, None)
+
+
+def test_breaker_opens_after_consecutive_failures(breaker: CircuitBreaker) -> None:
+    breaker.record_failure()
+    breaker.record_status(200)
+    breaker.record_failure()
+    breaker.before_request()
+    assert breaker.state == "closed"
+
+    breaker.record_status(503)
+
+    assert breaker.state == "open"
+    with pytest.raises(ServiceUnavailableError) as exc_info:
+        breaker.before_request()
+    assert exc_info.value.to_user_payload()["user_title"] == "Regybox is unavailable"
+    assert 0 < exc_info.value.retry_in <= 30
+
+
+def test_breaker_lets_a_single_probe_through(breaker: CircuitBreaker) -> None:
+    with patch("regybox.circuit_breaker.time.monotonic", return_value=1000.0):
+        breaker.record_failure()
+        breaker.record_failure()
+    with patch("regybox.circuit_breaker.time.monotonic", return_value=1030.0):
+        breaker.before_request()
+        assert breaker.state == "half_open"
+        with pytest.raises(ServiceUnavailableError):
+            breaker.before_request()
+
+        breaker.record_failure()
+        assert breaker.state == "open"
+        with pytest.raises(ServiceUnavailableError):
+            breaker.before_request()
+    with patch("regybox.circuit_breaker.time.monotonic", return_value=1060.0):
+        breaker.before_request()
+        breaker.record_success()
+
+    assert breaker.state == "closed"
+    assert breaker.failures == 0
+    breaker.before_request()
+
+
+def test_breaker_replaces_a_probe_that_never_reports(breaker: CircuitBreaker) -> None:
+    with patch("regybox.circuit_breaker.time.monotonic", return_value=1000.0):
+        breaker.record_failure()
+        breaker.record_failure()
+    with patch("regybox.circuit_breaker.time.monotonic", return_value=1030.0):
+        breaker.before_request()
+    with patch("regybox.circuit_breaker.time.monotonic", return_value=1060.0):
+        breaker.before_request()
+
+    assert breaker.state == "half_open"
+
+
+def test_disabled_breaker_never_opens() -> None:
+    breaker = CircuitBreaker("Regybox", threshold=0)
+
+    for _ in range(100):
+        breaker.record_failure()
+    breaker.before_request()
+
+    assert breaker.state == "closed"
+
+
+def test_breakers_are_shared_per_service(breakers: CircuitBreakers) -> None:
+    assert get_circuit_breaker("Regybox") is breakers.get("Regybox")
+    assert get_circuit_breaker("the calendar") is not get_circuit_breaker("Regybox")
+
+
+def test_regybox_session_records_outcomes_and_fails_fast(breakers: CircuitBreakers) -> None:
+    breakers._breakers[SERVICE_NAME] = breaker = CircuitBreaker(SERVICE_NAME, threshold=2)
+    session: RegyboxSession = object.__new__(RegyboxSession)
+    session.credentials = get_default_credentials()
+    unavailable = requests.Response()
+    unavailable.status_code = 503
+
+    with patch.object(
+        requests.Session, "send", side_effect=[unavailable, requests.ConnectionError]
+    ) as send:
+        assert RegyboxSession.send(session, requests.PreparedRequest()) is unavailable
+        with pytest.raises(requests.ConnectionError):
+            RegyboxSession.send(session, requests.PreparedRequest())
+        with pytest.raises(ServiceUnavailableError):
+            RegyboxSession.send(session, requests.PreparedRequest())
+
+    assert breaker.state == "open"
+    assert send.call_count == 2
+
+
+class _UnavailableHandler(BaseHTTPRequestHandler):
+    requests_seen: int = 0
+
+    def do_GET(self) -> None:
+        type(self).requests_seen += 1
+        self.send_response(503)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    @override
+    def log_message(self, format: str, *args: object) -> None:
+        del format, args
+
+
+@pytest.fixture(name="unavailable_url")
+def fixture_unavailable_url() -> Iterator[str]:
+    _UnavailableHandler.requests_seen = 0
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _UnavailableHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}/aulas.php"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_regybox_session_records_exhausted_status_retries(
+    breakers: CircuitBreakers, unavailable_url: str
+) -> None:
+    breakers._breakers[SERVICE_NAME] = breaker = CircuitBreaker(SERVICE_NAME, threshold=2)
+    session = RegyboxSession()
+    session.mount(
+        "http://",
+        HTTPAdapter(max_retries=Retry(total=1, status_forcelist=[503], backoff_factor=0)),
+    )
+
+    for _ in range(2):
+        with pytest.raises(requests.exceptions.RetryError):
+            session.get(unavailable_url, timeout=5)
+    with pytest.raises(ServiceUnavailableError):
+        session.get(unavailable_url, timeout=5)
+
+    assert breaker.state == "open"
+    assert _UnavailableHandler.requests_seen == 4
+
+
+def test_async_session_records_one_failure_per_exhausted_request(
+    breakers: CircuitBreakers,
+) -> None:
+    breakers._breakers[SERVICE_NAME] = breaker = CircuitBreaker(SERVICE_NAME, threshold=2)
+    requests_seen: list[httpx.Request] = []
+
+    def unavailable(request: httpx.Request) -> httpx.Response:
+        requests_seen.append(request)
+        return httpx.Response(503)
+
+    async def fetch() -> int:
+        session = AsyncRegyboxSession(transport=httpx.MockTransport(unavailable))
+        try:
+            res: httpx.Response = await session.get(
+                "https://www.regybox.pt/app/app_nova/php/aulas/aulas.php"
+            )
+        finally:
+            await session.aclose()
+        return res.status_code
+
+    with patch("regybox.connection.asyncio.sleep"):
+        assert asyncio.run(fetch()) == 503
+        assert breaker.failures == 1
+        assert len(requests_seen) == RETRY_TOTAL + 1
+
+        assert asyncio.run(fetch()) == 503
+        with pytest.raises(ServiceUnavailableError):
+            asyncio.run(fetch())
+
+    assert breaker.state == "open"
+    assert len(requests_seen) == 2 * (RETRY_TOTAL + 1)
+
+
+def test_calendar_fetch_fails_fast_once_the_breaker_opens(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    breaker = CircuitBreaker("the calendar", threshold=1)
+    monkeypatch.setattr("regybox.cal.get_circuit_breaker", {CALENDAR_SERVICE_NAME: breaker}.get)
+    Singleton._instances.pop(Calendar, None)
+    try:
+        with (
+            patch("regybox.cal.requests.get", side_effect=requests.ConnectionError) as get,
+            pytest.raises(requests.ConnectionError),
+        ):
+            Calendar()
+        with pytest.raises(ServiceUnavailableError) as exc_info:
+            Calendar()
+    finally:
+        Singleton._instances.pop(Calendar, None)
+
+    get.assert_called_once()
+    assert exc_info.value.to_user_payload()["user_title"] == "The calendar is unavailable"
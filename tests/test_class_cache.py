@@ -0,0 +1,102 @@
+"""Tests for the class_cache module."""
+
+import json
+import stat
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from regybox.class_cache import CLASS_CACHE_VERSION, ClassCache
+from regybox.utils.singleton import Singleton
+
+RECORDS: list[dict[str, object]] = [{"name": "WOD Rato", "start": "06:30"}]
+
+
+@pytest.fixture(name="file_cache")
+def fixture_file_cache(tmp_path: Path) -> ClassCache:
+    with patch("regybox.class_cache.CLASS_CACHE", str(tmp_path / "regybox" / "classes.json")):
+        return ClassCache()
+
+
+def test_memory_cache_round_trip() -> None:
+    cache = ClassCache()
+    assert cache.path is None
+
+    with patch("regybox.class_cache.time.time", return_value=1000.0):
+        cache.put("user:key", "2024-07-01", RECORDS, ttl=60)
+        assert cache.get("user:key", "2024-07-01") == RECORDS
+        assert cache.get("user:key", "2024-07-02") is None
+        assert cache.get("other:key", "2024-07-01") is None
+
+
+def test_get_ignores_expired_listings() -> None:
+    cache = ClassCache()
+    with patch("regybox.class_cache.time.time", return_value=1000.0):
+        cache.put("user:key", "2024-07-01", RECORDS, ttl=60)
+
+    with patch("regybox.class_cache.time.time", return_value=1060.0):
+        assert cache.get("user:key", "2024-07-01") is None
+
+
+def test_invalidate_removes_only_the_given_listing(file_cache: ClassCache) -> None:
+    file_cache.put("user:key", "2024-07-01", RECORDS, ttl=60)
+    file_cache.put("user:key", "2024-07-02", RECORDS, ttl=60)
+
+    file_cache.invalidate("user:key", "2024-07-01")
+    file_cache.invalidate("missing:key", "2024-07-01")
+
+    assert file_cache.get("user:key", "2024-07-01") is None
+    assert file_cache.get("user:key", "2024-07-02") == RECORDS
+    assert file_cache.path is not None
+    stored = json.loads(file_cache.path.read_text(encoding="utf-8"))
+    assert list(stored["listings"]) == ["user:key|2024-07-02"]
+
+
+def test_file_cache_is_shared_by_later_runs(file_cache: ClassCache) -> None:
+    file_cache.put("user:key", "2024-07-01", RECORDS, ttl=60)
+    assert file_cache.path is not None
+
+    Singleton._instances.pop(ClassCache, None)
+    with patch("regybox.class_cache.CLASS_CACHE", str(file_cache.path)):
+        later_run = ClassCache()
+
+    assert later_run.get("user:key", "2024-07-01") == RECORDS
+    assert stat.S_IMODE(file_cache.path.stat().st_mode) == 0o600
+    assert not list(file_cache.path.parent.glob("*.tmp"))
+
+
+@pytest.mark.parametrize(
+    "content",
+    [
+        "not json",
+        json.dumps([]),
+        json.dumps({"version": CLASS_CACHE_VERSION + 1, "listings": {}}),
+        json.dumps({"version": CLASS_CACHE_VERSION, "listings": []}),
+        json.dumps({"version": CLASS_CACHE_VERSION, "listings": {"user:key|2024-07-01": []}}),
+        json.dumps({
+            "version": CLASS_CACHE_VERSION,
+            "listings": {"user:key|2024-07-01": {"classes": [], "expires_at": "soon"}},
+        }),
+        json.dumps({
+            "version": CLASS_CACHE_VERSION,
+            "listings": {"user:key|2024-07-01": {"classes": ["WOD"], "expires_at": 1e12}},
+        }),
+    ],
+)
+def test_get_treats_invalid_files_as_empty(file_cache: ClassCache, content: str) -> None:
+    assert file_cache.path is not None
+    file_cache.path.parent.mkdir(parents=True)
+    file_cache.path.write_text(content, encoding="utf-8")
+
+    assert file_cache.get("user:key", "2024-07-01") is None
+
+
+def test_put_logs_and_ignores_write_errors(
+    file_cache: ClassCache, caplog: pytest.LogCaptureFixture
+) -> None:
+    with patch("regybox.class_cache.write_private_file", side_effect=OSError("read-only")):
+        file_cache.put("user:key", "2024-07-01", RECORDS, ttl=60)
+
+    assert file_cache.get("user:key", "2024-07-01") == RECORDS
+    assert "Unable to write class cache" in caplog.text
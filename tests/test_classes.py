@@ -1,7 +1,14 @@
+import asyncio
+import dataclasses
+import datetime
+import json
 import logging
 import re
+import threading
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
 from importlib import resources
-from unittest.mock import patch
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 from bs4 import BeautifulSoup
@@ -10,18 +17,36 @@ from bs4.element import PageElement, Tag
 from regybox.classes import (
     EMPTY_CLASS_RETRY_BACKOFF_FACTOR,
     EMPTY_CLASS_RETRY_TOTAL,
+    RANGE_EMPTY_CLASS_RETRY_TOTAL,
     Class,
+    ClassSnapshot,
+    _block_may_match,
     _get_classes_tags_with_retry,
+    _get_classes_timestamp,
+    _get_listing_ttl,
+    _scan_class_block,
+    async_get_classes,
+    get_cached_classes,
+    get_class_at,
     get_classes,
+    get_classes_range,
     get_classes_tags,
+    get_slot_classes,
     parse_capacity_value,
     pick_class,
+    sharing_classes_pages,
 )
+from regybox.clock import ServerClock
+from regybox.common import TIMEZONE
+from regybox.connection import RegyboxCredentials
+from regybox.deadline import deadline
 from regybox.exceptions import (
     ClassNotFoundError,
     NoClassesFoundError,
     UnparseableError,
 )
+from regybox.parsing import parse_class_blocks
+from regybox.utils.singleton import Singleton
 
 from . import html_examples
 
@@ -42,6 +67,49 @@ def extract_class_from_html(html: str, *, filename: str = "<inline>") -> Class:
     return Class(element)
 
 
+CLASS_FIXTURES: list[str] = sorted(
+    path.name for path in resources.files(html_examples).iterdir() if path.name.endswith(".html")
+)
+
+
+@pytest.mark.parametrize("filename", CLASS_FIXTURES)
+def test_scan_class_block_matches_find_searches(filename: str) -> None:
+    html: str = resources.files(html_examples).joinpath(filename).read_text()
+    element: PageElement = BeautifulSoup(html, "html.parser").contents[0]
+    assert isinstance(element, Tag)
+
+    block = _scan_class_block(element)
+
+    padding_7px = re.compile(r"padding-top:\s*7px")
+    assert block.name is element.find("div", attrs={"align": "left", "class": "col-50"})
+    assert block.details is element.find("div", attrs={"align": "right", "class": "col-50"})
+    assert block.time_ is element.find("div", attrs={"align": "left", "class": "col"})
+    assert block.capacity is element.find("div", attrs={"align": "center", "class": "col"})
+    assert block.error is element.find("span", attrs={"class": "erro_color"})
+    assert block.waitlist_preloader is element.find(
+        "div", attrs={"class": re.compile(r"preloader\s*color-orange")}
+    )
+    assert block.open_elsewhere is element.find(
+        "div", attrs={"class": "letra_10", "style": padding_7px}
+    )
+    assert block.enrolled_marker is element.find(
+        "div",
+        attrs={"align": "right", "class": "ok_color", "style": re.compile(r"padding-top:\s*1px")},
+    )
+    assert block.timer is element.find("input", attrs={"class": "timers"})
+    assert list(map(id, block.buttons)) == list(map(id, element.find_all("button")))
+    assert list(map(id, block.states)) == list(
+        map(id, element.find_all("div", attrs={"align": "right", "class": "col"}))
+    )
+    for state in block.states:
+        assert block.first_within(state, block.error_spans) is state.find(
+            "span", attrs={"class": "erro_color"}
+        )
+        assert block.first_within(state, block.padding_7px_divs) is state.find(
+            "div", attrs={"style": padding_7px}
+        )
+
+
 def test_bad_html() -> None:
     with pytest.raises(UnparseableError):
         extract_class("bad_class.html")
@@ -500,6 +568,53 @@ def test_get_classes_tags_empty_retry_budget_can_be_overridden() -> None:
     assert sum(call.args[0] for call in mock_sleep.call_args_list) < 1
 
 
+def test_get_classes_tags_stops_empty_retries_that_miss_the_deadline() -> None:
+    with (
+        patch(
+            "regybox.classes.get_classes_html", return_value="<html><body></body></html>"
+        ) as mock_get,
+        patch("regybox.classes.time.sleep") as mock_sleep,
+        patch("regybox.deadline.monotonic", return_value=100.0),
+        deadline(0.55),
+    ):
+        classes = _get_classes_tags_with_retry(
+            1234567890000, retry_total=5, retry_backoff_factor=0.1
+        )
+
+    assert classes == []
+    assert mock_get.call_count == 4
+    assert [call.args[0] for call in mock_sleep.call_args_list] == pytest.approx([0.1, 0.2, 0.4])
+
+
+def test_concurrent_fetches_of_the_same_page_share_one_request() -> None:
+    open_html = resources.files(html_examples).joinpath("open.html").read_text()
+    other = RegyboxCredentials(user="other", phpsessid="othersession")
+    followers_waiting = threading.Semaphore(0)
+    fetches: list[RegyboxCredentials | None] = []
+
+    def follower_waits() -> None:
+        followers_waiting.release()
+
+    def fetch(_timestamp: int, *, credentials: RegyboxCredentials | None = None) -> str:
+        fetches.append(credentials)
+        if credentials is None:
+            for _ in range(2):
+                followers_waiting.acquire(timeout=5)
+        return open_html
+
+    with (
+        patch("regybox.classes.get_classes_html", side_effect=fetch),
+        patch("regybox.singleflight.remaining_seconds", side_effect=follower_waits),
+        ThreadPoolExecutor(max_workers=3) as executor,
+    ):
+        shared = [executor.submit(get_classes, 2024, 7, 1) for _ in range(3)]
+        results = [future.result() for future in shared]
+        assert len(get_classes(2024, 7, 1, credentials=other)) == 1
+
+    assert fetches == [None, other]
+    assert [[class_.name for class_ in classes] for classes in results] == [["WOD Rato"]] * 3
+
+
 def test_get_classes_returns_list_of_classes() -> None:
     """get_classes returns Class instances from get_classes_tags."""
     open_html = resources.files(html_examples).joinpath("open.html").read_text()
@@ -507,3 +622,314 @@ def test_get_classes_returns_list_of_classes() -> None:
         classes = get_classes(2024, 7, 1)
     assert len(classes) == 1
     assert classes[0].name == "WOD Rato"
+
+
+def test_get_classes_keeps_the_clock_sample_of_its_page() -> None:
+    open_html = resources.files(html_examples).joinpath("open.html").read_text()
+    elapsed = datetime.timedelta(milliseconds=100)
+    Singleton._instances.pop(ServerClock, None)
+
+    def fetch(_timestamp: int, **_: object) -> str:
+        ServerClock().record_response("Wed, 03 Jul 2024 09:46:41 GMT", elapsed)
+        return open_html
+
+    try:
+        with (
+            patch("regybox.classes.get_classes_html", side_effect=fetch) as mock_fetch,
+            sharing_classes_pages(60),
+        ):
+            first = get_classes(2024, 7, 1)
+            # another request of the process must not be taken for the page
+            ServerClock().record_response("Wed, 03 Jul 2024 09:50:00 GMT", elapsed)
+            shared = get_classes(2024, 7, 1)
+    finally:
+        Singleton._instances.pop(ServerClock, None)
+
+    assert mock_fetch.call_count == 1
+    for classes in (first, shared):
+        sample = classes[0].clock_sample
+        assert sample is not None
+        assert sample.server_time == 1720000001
+
+
+def test_async_get_classes_retries_empty_response_and_parses_classes() -> None:
+    open_html = resources.files(html_examples).joinpath("open.html").read_text()
+    session = MagicMock()
+    session.get_classes_html = AsyncMock(side_effect=["<html><body></body></html>", open_html])
+
+    with patch("regybox.classes.asyncio.sleep", new_callable=AsyncMock) as mock_sleep:
+        classes = asyncio.run(async_get_classes(2024, 7, 1, session=session))
+
+    assert [class_.name for class_ in classes] == ["WOD Rato"]
+    assert session.get_classes_html.await_count == 2
+    mock_sleep.assert_awaited_once_with(EMPTY_CLASS_RETRY_BACKOFF_FACTOR)
+
+
+def test_async_get_classes_raises_when_no_classes_after_retries() -> None:
+    session = MagicMock()
+    session.get_classes_html = AsyncMock(return_value="<html><body></body></html>")
+
+    with (
+        patch("regybox.classes.asyncio.sleep", new_callable=AsyncMock),
+        pytest.raises(NoClassesFoundError),
+    ):
+        asyncio.run(async_get_classes(2024, 7, 1, session=session))
+
+    assert session.get_classes_html.await_count == EMPTY_CLASS_RETRY_TOTAL + 1
+
+
+def test_async_enroll_and_unenroll_reuse_response_parsing() -> None:
+    open_class: Class = extract_class("open.html")
+    registered_class: Class = extract_class("registered.html")
+    session = MagicMock()
+    session.get_url_html = AsyncMock(
+        return_value=(
+            "<html><body><script>"
+            'parent.msg_toast_icon("InscriÃ§Ã£o efetuada com sucesso", "ok");'
+            "</script></body></html>"
+        )
+    )
+
+    assert asyncio.run(open_class.async_enroll(session)) == "Inscrição efetuada com sucesso"
+    assert open_class.user_is_enrolled is True
+    session.get_url_html.assert_awaited_once_with(open_class.enroll_url)
+
+    session.get_url_html.reset_mock()
+    assert (
+        asyncio.run(registered_class.async_unenroll(session)) == "Inscrição efetuada com sucesso"
+    )
+    assert registered_class.user_is_enrolled is False
+    session.get_url_html.assert_awaited_once_with(registered_class.unenroll_url)
+
+
+def test_get_slot_classes_parses_only_the_requested_slot() -> None:
+    open_html = resources.files(html_examples).joinpath("open.html").read_text()
+    not_yet_open_html = resources.files(html_examples).joinpath("not_yet_open.html").read_text()
+    combined_html = f"<div id='page'>{open_html}\n{not_yet_open_html}</div>"
+
+    with (
+        patch("regybox.classes.get_classes_html", return_value=combined_html) as mock_get,
+        patch("regybox.classes.Class", wraps=Class) as mock_class,
+    ):
+        classes = get_slot_classes(2024, 7, 1, start="07:30")
+
+    mock_get.assert_called_once()
+    assert mock_class.call_count == 1
+    assert [(class_.start, class_.is_open) for class_ in classes] == [("07:30", False)]
+
+    with patch("regybox.classes.get_classes_html", return_value=combined_html):
+        classes = get_slot_classes(2024, 7, 1, start="06:30")
+    assert [(class_.start, bool(class_.enroll_url)) for class_ in classes] == [("06:30", True)]
+
+    with patch("regybox.classes.get_classes_html", return_value=combined_html):
+        assert get_slot_classes(2024, 7, 1, start="09:00") == []
+
+
+@pytest.mark.parametrize("filename", [name for name in CLASS_FIXTURES if name != "bad_class.html"])
+def test_block_may_match_never_rejects_the_parsed_class(filename: str) -> None:
+    class_: Class = extract_class(filename)
+    tag: Tag = class_._tag
+
+    assert _block_may_match(tag, class_time=class_.start, class_types=[class_.name.lower()])
+    assert _block_may_match(tag, class_time=None, class_types=None)
+    assert not _block_may_match(tag, class_time="23:59", class_types=None)
+    assert not _block_may_match(tag, class_time=None, class_types=["Not A Class"])
+
+
+def _two_slot_tags() -> list[Tag]:
+    open_html = resources.files(html_examples).joinpath("open.html").read_text()
+    not_yet_open_html = resources.files(html_examples).joinpath("not_yet_open.html").read_text()
+    return parse_class_blocks(f"{open_html}\n{not_yet_open_html}")
+
+
+def test_get_classes_only_parses_blocks_that_can_match() -> None:
+    with (
+        patch("regybox.classes.get_classes_tags", return_value=_two_slot_tags()),
+        patch("regybox.classes.Class", wraps=Class) as mock_class,
+    ):
+        classes = get_classes(2024, 7, 1, class_time="07:30", class_types=["WOD Rato"])
+
+    assert mock_class.call_count == 1
+    assert [class_.start for class_ in classes] == ["07:30"]
+
+
+def test_get_class_at_picks_first_matching_class_type() -> None:
+    with patch("regybox.classes.get_classes_tags", return_value=_two_slot_tags()):
+        class_ = get_class_at(datetime.date(2024, 7, 1), "06:30", ["Open Box", "WOD Rato"])
+
+    assert (class_.name, class_.start, class_.is_open) == ("WOD Rato", "06:30", True)
+
+
+def test_get_class_at_raises_when_no_class_matches() -> None:
+    with (
+        patch("regybox.classes.get_classes_tags", return_value=_two_slot_tags()),
+        pytest.raises(ClassNotFoundError),
+    ):
+        get_class_at(datetime.date(2024, 7, 1), "06:30", ["Open Box"])
+
+
+@pytest.mark.parametrize("filename", [name for name in CLASS_FIXTURES if name != "bad_class.html"])
+def test_snapshot_copies_every_parsed_field(filename: str) -> None:
+    class_: Class = extract_class(filename)
+
+    snapshot: ClassSnapshot = class_.snapshot()
+
+    for field in dataclasses.fields(ClassSnapshot):
+        assert getattr(snapshot, field.name) == getattr(class_, field.name)
+    assert not hasattr(snapshot, "__dict__")
+    assert not hasattr(snapshot, "_tag")
+    assert ClassSnapshot.from_dict(json.loads(json.dumps(snapshot.to_dict()))) == snapshot
+
+
+def test_snapshot_is_immutable_and_hashable() -> None:
+    snapshot: ClassSnapshot = extract_class("open.html").snapshot()
+
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        snapshot.is_open = False  # pyright: ignore[reportAttributeAccessIssue]
+    assert len({snapshot, extract_class("open.html").snapshot()}) == 1
+    assert snapshot != extract_class("registered.html").snapshot()
+
+
+def test_get_classes_can_return_snapshots() -> None:
+    open_html = resources.files(html_examples).joinpath("open.html").read_text()
+    with patch("regybox.classes.get_classes_html", return_value=open_html):
+        classes = get_classes(2024, 7, 1, snapshots=True)
+
+    assert classes == [extract_class("open.html").snapshot()]
+    assert (
+        pick_class(classes, class_time="06:30", class_type="WOD Rato", class_date=classes[0].date)
+        is classes[0]
+    )
+
+
+def test_snapshot_enroll_and_unenroll_do_not_change_the_snapshot() -> None:
+    open_snapshot: ClassSnapshot = extract_class("open.html").snapshot()
+    registered_snapshot: ClassSnapshot = extract_class("registered.html").snapshot()
+    response_html = (
+        "<html><body><script>"
+        'parent.msg_toast_icon("Inscrito com sucesso", "ok");'
+        "</script></body></html>"
+    )
+    session = MagicMock()
+    session.get_url_html = AsyncMock(return_value=response_html)
+
+    with patch("regybox.classes.get_url_html", return_value=response_html) as mock_get:
+        assert open_snapshot.enroll() == "Inscrito com sucesso"
+        assert registered_snapshot.unenroll() == "Inscrito com sucesso"
+    assert asyncio.run(open_snapshot.async_enroll(session)) == "Inscrito com sucesso"
+    assert asyncio.run(registered_snapshot.async_unenroll(session)) == "Inscrito com sucesso"
+
+    assert [call.args[0] for call in mock_get.call_args_list] == [
+        open_snapshot.enroll_url,
+        registered_snapshot.unenroll_url,
+    ]
+    assert open_snapshot.user_is_enrolled is False
+    assert registered_snapshot.user_is_enrolled is True
+    with pytest.raises(ValueError, match="Unenroll URL is not set"):
+        open_snapshot.unenroll()
+
+
+def test_get_cached_classes_reuses_fresh_listings() -> None:
+    open_html = resources.files(html_examples).joinpath("open.html").read_text()
+    with patch("regybox.classes.get_classes_html", return_value=open_html) as mock_get:
+        first = get_cached_classes(2024, 7, 1)
+        second = get_cached_classes(2024, 7, 1)
+        get_cached_classes(2024, 7, 1, credentials=RegyboxCredentials("other", "session"))
+
+    assert first == second == [extract_class("open.html").snapshot()]
+    assert mock_get.call_count == 2
+
+
+def test_enroll_and_unenroll_invalidate_the_cached_listing() -> None:
+    open_html = resources.files(html_examples).joinpath("open.html").read_text()
+    open_class: Class = extract_class("open.html")
+    registered_class: Class = extract_class("registered.html")
+    enroll_html = (
+        "<html><body><script>"
+        'parent.msg_toast_icon("Inscrito com sucesso", "ok");'
+        "</script></body></html>"
+    )
+    unenroll_html = (
+        '<html><body><script>parent.msg_toast_icon("Cancelado", "ok");</script></body></html>'
+    )
+    with (
+        patch("regybox.classes.get_classes_html", return_value=open_html) as mock_get,
+        patch("regybox.classes.get_url_html", side_effect=[enroll_html, unenroll_html]),
+    ):
+        get_cached_classes(2024, 7, 1)
+        open_class.enroll()
+        get_cached_classes(2024, 7, 1)
+        get_cached_classes(2024, 5, 9)
+        registered_class.unenroll()
+        get_cached_classes(2024, 5, 9)
+
+    assert mock_get.call_count == 4
+
+
+def test_failed_enroll_still_invalidates_the_cached_listing() -> None:
+    open_html = resources.files(html_examples).joinpath("open.html").read_text()
+    open_snapshot: ClassSnapshot = extract_class("open.html").snapshot()
+    with (
+        patch("regybox.classes.get_classes_html", return_value=open_html) as mock_get,
+        patch("regybox.classes.get_url_html", side_effect=ConnectionError),
+    ):
+        get_cached_classes(2024, 7, 1)
+        with pytest.raises(ConnectionError):
+            open_snapshot.enroll()
+        get_cached_classes(2024, 7, 1)
+
+    assert mock_get.call_count == 2
+
+
+def test_listing_ttl_shrinks_close_to_the_next_class() -> None:
+    snapshot: ClassSnapshot = extract_class("open.html").snapshot()
+    start = datetime.datetime.combine(
+        datetime.date.fromisoformat(snapshot.date),
+        datetime.time.fromisoformat(snapshot.start),
+        tzinfo=TIMEZONE,
+    )
+
+    assert _get_listing_ttl([snapshot], now=start + datetime.timedelta(hours=1)) == 300
+    assert _get_listing_ttl([snapshot], now=start - datetime.timedelta(days=7)) == 300
+    assert _get_listing_ttl([snapshot], now=start - datetime.timedelta(hours=1)) == 36
+    assert _get_listing_ttl([snapshot], now=start - datetime.timedelta(seconds=10)) == 5
+
+
+def test_get_classes_range_fetches_days_concurrently() -> None:
+    open_html = resources.files(html_examples).joinpath("open.html").read_text()
+    start, empty_day = datetime.date(2024, 7, 1), datetime.date(2024, 7, 3)
+    empty_timestamp: int = _get_classes_timestamp(2024, 7, 3)
+    # the first fetch of each day only returns once all three are in flight
+    barrier = threading.Barrier(3, timeout=5)
+    first_fetches: set[int] = set()
+    lock = threading.Lock()
+
+    def fetch(timestamp: int, **_: object) -> Iterator[str]:
+        with lock:
+            is_first_fetch = timestamp not in first_fetches
+            first_fetches.add(timestamp)
+        if is_first_fetch:
+            barrier.wait()
+        html = "" if timestamp == empty_timestamp else open_html
+        return iter([html[i : i + 1000] for i in range(0, len(html), 1000)])
+
+    with (
+        patch("regybox.classes.stream_classes_html", side_effect=fetch) as mock_fetch,
+        patch("regybox.classes.time.sleep"),
+    ):
+        days = dict(get_classes_range(start, empty_day))
+
+    assert sorted(days) == [start, datetime.date(2024, 7, 2), empty_day]
+    assert days[empty_day] == []
+    assert [class_.name for class_ in days[start]] == ["WOD Rato"]
+    assert all(isinstance(class_, ClassSnapshot) for class_ in days[start])
+    assert mock_fetch.call_count == 3 + RANGE_EMPTY_CLASS_RETRY_TOTAL
+
+
+def test_get_classes_range_rejects_invalid_ranges() -> None:
+    with pytest.raises(ValueError, match="ends before it starts"):
+        next(get_classes_range(datetime.date(2024, 7, 2), datetime.date(2024, 7, 1)))
+    with pytest.raises(ValueError, match="max_workers"):
+        next(
+            get_classes_range(datetime.date(2024, 7, 1), datetime.date(2024, 7, 1), max_workers=0)
+        )
@@ -0,0 +1,176 @@
+"""Tests for the clock module."""
+
+import asyncio
+import datetime
+from collections.abc import Iterator
+from unittest.mock import patch
+
+import httpx
+import pytest
+import requests
+
+from regybox.clock import (
+    CLOCK_MAX_SAMPLES,
+    ClockSample,
+    ServerClock,
+    capture_sample,
+    capturing_sample,
+)
+from regybox.connection import AsyncRegyboxSession, RegyboxSession, get_default_credentials
+from regybox.utils.singleton import Singleton
+
+
+@pytest.fixture(name="clock")
+def fixture_clock() -> Iterator[ServerClock]:
+    Singleton._instances.pop(ServerClock, None)
+    yield ServerClock()
+    Singleton._instances.pop(ServerClock, None)
+
+
+def test_estimate_is_none_without_samples(clock: ServerClock) -> None:
+    assert clock.estimate() is None
+    assert clock.last_sample is None
+    assert clock.seconds_until(1000) is None
+
+
+def test_estimate_intersects_sample_bounds(clock: ServerClock) -> None:
+    # The server is 2.3 seconds ahead; each sample narrows the offset interval.
+    clock.add_sample(ClockSample(server_time=1001, sent_at=999.65, received_at=999.75))
+    clock.add_sample(ClockSample(server_time=1003, sent_at=1000.7, received_at=1000.8))
+
+    estimate = clock.estimate()
+
+    assert estimate is not None
+    assert estimate.samples == 2
+    assert estimate.offset == pytest.approx(2.275)
+    assert estimate.error == pytest.approx(0.075)
+    assert 2.3 - estimate.error <= estimate.offset <= 2.3 + estimate.error
+
+
+def test_estimate_falls_back_to_latest_sample_when_inconsistent(clock: ServerClock) -> None:
+    clock.add_sample(ClockSample(server_time=1000, sent_at=999.9, received_at=1000.0))
+    clock.add_sample(ClockSample(server_time=2000, sent_at=999.9, received_at=1000.0))
+
+    estimate = clock.estimate()
+
+    assert estimate is not None
+    assert estimate.samples == 1
+    assert estimate.offset == pytest.approx(1000.55)
+
+
+def test_clock_keeps_only_recent_samples(clock: ServerClock) -> None:
+    for second in range(CLOCK_MAX_SAMPLES + 5):
+        clock.add_sample(ClockSample(server_time=second, sent_at=second, received_at=second))
+
+    estimate = clock.estimate()
+
+    assert estimate is not None
+    assert estimate.samples == CLOCK_MAX_SAMPLES
+    assert clock.last_sample == ClockSample(
+        server_time=CLOCK_MAX_SAMPLES + 4,
+        sent_at=CLOCK_MAX_SAMPLES + 4,
+        received_at=CLOCK_MAX_SAMPLES + 4,
+    )
+
+
+def test_record_response_parses_date_header(clock: ServerClock) -> None:
+    with patch("regybox.clock.time.time", return_value=1720000000.5):
+        clock.record_response(
+            "Wed, 03 Jul 2024 09:46:41 GMT", datetime.timedelta(milliseconds=200)
+        )
+
+    assert clock.last_sample == ClockSample(
+        server_time=1720000001, sent_at=1720000000.3, received_at=1720000000.5
+    )
+
+
+@pytest.mark.parametrize(
+    ("date_header", "elapsed"),
+    [
+        (None, datetime.timedelta(seconds=1)),
+        ("not a date", datetime.timedelta(seconds=1)),
+        ("Wed, 03 Jul 2024 09:46:41 GMT", None),
+    ],
+)
+def test_record_response_ignores_invalid_samples(
+    clock: ServerClock, date_header: object, elapsed: object
+) -> None:
+    clock.record_response(date_header, elapsed)
+
+    assert clock.last_sample is None
+
+
+def test_capturing_sample_keeps_the_sample_of_its_own_response(clock: ServerClock) -> None:
+    elapsed = datetime.timedelta(milliseconds=100)
+
+    with capturing_sample() as outer:
+        clock.record_response("Wed, 03 Jul 2024 09:46:41 GMT", elapsed)
+        with capturing_sample() as inner:
+            clock.record_response("Wed, 03 Jul 2024 09:46:45 GMT", elapsed)
+    clock.record_response("Wed, 03 Jul 2024 09:46:50 GMT", elapsed)
+
+    assert outer.sample is not None
+    assert outer.sample.server_time == 1720000001
+    assert inner.sample is not None
+    assert inner.sample.server_time == 1720000005
+    assert clock.last_sample is not None
+    assert clock.last_sample.server_time == 1720000010
+
+
+def test_capture_sample_hands_a_sample_on_and_forgets_undated_responses(
+    clock: ServerClock,
+) -> None:
+    sample = ClockSample(server_time=1000, sent_at=999.6, received_at=999.8)
+    capture_sample(sample)
+
+    with capturing_sample() as captured:
+        capture_sample(sample)
+        assert captured.sample is sample
+        clock.record_response(None, datetime.timedelta(milliseconds=100))
+
+    assert captured.sample is None
+
+
+def test_seconds_until_uses_earliest_consistent_time(clock: ServerClock) -> None:
+    clock.add_sample(ClockSample(server_time=1002, sent_at=999.6, received_at=999.8))
+
+    with patch("regybox.clock.time.time", return_value=1000):
+        wait = clock.seconds_until(1010)
+
+    # The offset is in [2.2, 3.4], so server time 1010 is 1006.6 locally.
+    assert wait == pytest.approx(6.6)
+
+
+def test_regybox_session_samples_server_clock(clock: ServerClock) -> None:
+    response = requests.Response()
+    response.headers["Date"] = "Wed, 03 Jul 2024 09:46:41 GMT"
+    response.elapsed = datetime.timedelta(milliseconds=100)
+    session: RegyboxSession = object.__new__(RegyboxSession)
+    session.credentials = get_default_credentials()
+
+    with patch.object(requests.Session, "send", return_value=response) as send:
+        assert RegyboxSession.send(session, requests.PreparedRequest(), timeout=5) is response
+
+    send.assert_called_once()
+    sample = clock.last_sample
+    assert sample is not None
+    assert sample.server_time == 1720000001
+    assert sample.received_at - sample.sent_at == pytest.approx(0.1)
+
+
+def test_async_session_samples_server_clock(clock: ServerClock) -> None:
+    def handler(_request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, headers={"Date": "Wed, 03 Jul 2024 09:46:41 GMT"})
+
+    async def fetch() -> None:
+        session = AsyncRegyboxSession(transport=httpx.MockTransport(handler))
+        try:
+            await session.get("https://www.regybox.pt/app/app_nova/php/aulas/aulas.php")
+        finally:
+            await session.aclose()
+
+    asyncio.run(fetch())
+
+    sample = clock.last_sample
+    assert sample is not None
+    assert sample.server_time == 1720000001
@@ -0,0 +1,83 @@
+"""Tests for the common module."""
+
+import os
+import subprocess  # noqa: S404
+import sys
+from pathlib import Path
+
+# the test environment turns these off, see [tool.pytest_env]
+DEFAULT_OVERRIDES: tuple[str, ...] = (
+    "REGYBOX_SESSION_STORE",
+    "REGYBOX_CLASS_CACHE",
+    "REGYBOX_SCHEDULE_STATE",
+    "REGYBOX_RATE_LIMIT",
+    "REGYBOX_RATE_LIMIT_BURST",
+    "REGYBOX_CIRCUIT_BREAKER_THRESHOLD",
+)
+
+SHIPPED_DEFAULTS_SCRIPT: str = """
+from importlib import resources
+from unittest.mock import patch
+
+import httpx
+
+from regybox.batch import BatchTarget
+from regybox.circuit_breaker import get_circuit_breaker
+from regybox.classes import get_cached_classes
+from regybox.common import CACHE_DIR
+from regybox.connection import SERVICE_NAME
+from regybox.rate_limit import RateLimiter
+from regybox.scheduler import Scheduler
+from regybox.transport import Http2Adapter
+from tests import html_examples
+
+open_html = resources.files(html_examples).joinpath("open.html").read_text()
+paths = []
+
+
+def handler(request):
+    paths.append(request.url.path.rsplit("/", 1)[-1])
+    return httpx.Response(200, text="ok" if paths[-1] == "set_session.php" else open_html)
+
+
+client = httpx.Client(transport=httpx.MockTransport(handler))
+with patch(
+    "regybox.connection.get_adapter",
+    side_effect=lambda retry: Http2Adapter(client, max_retries=retry),
+):
+    first = get_cached_classes(2024, 7, 1)
+    second = get_cached_classes(2024, 7, 1)
+assert first == second, (first, second)
+assert paths == ["set_session.php", "aulas.php"], paths
+assert (CACHE_DIR / "sessions.json").is_file()
+assert (CACHE_DIR / "classes.json").is_file()
+assert RateLimiter().rate == 5
+assert get_circuit_breaker(SERVICE_NAME).threshold == 5
+assert get_circuit_breaker(SERVICE_NAME).state == "closed"
+scheduler = Scheduler()
+scheduler.add([BatchTarget("2099-03-10", "06:30", "WOD Rato")])
+scheduler.close()
+assert scheduler.state_path == CACHE_DIR / "schedule.json"
+assert scheduler.state_path.is_file()
+print(CACHE_DIR)
+"""
+
+
+def test_classes_are_listed_with_the_shipped_defaults(tmp_path: Path) -> None:
+    env: dict[str, str] = {
+        name: value for name, value in os.environ.items() if name not in DEFAULT_OVERRIDES
+    }
+    env["XDG_CACHE_HOME"] = str(tmp_path)
+
+    result = subprocess.run(  # noqa: S603
+        [sys.executable, "-c", SHIPPED_DEFAULTS_SCRIPT],
+        capture_output=True,
+        check=False,
+        cwd=Path(__file__).parent.parent,
+        env=env,
+        text=True,
+        timeout=60,
+    )
+
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == str(tmp_path / "regybox")
@@ -1,9 +1,18 @@
 """Tests for the connection module."""
 
+import asyncio
+import io
+import threading
+from collections.abc import Iterator
+from http.cookiejar import CookieJar
+from pathlib import Path
 from unittest.mock import MagicMock, patch
+from urllib.request import Request
 
+import httpx
 import pytest
 import requests
+from urllib3.exceptions import MaxRetryError
 from urllib3.util.retry import Retry
 
 from regybox.connection import (
@@ -11,14 +20,48 @@ from regybox.connection import (
     HEADERS,
     RETRY_BACKOFF_FACTOR,
     RETRY_TOTAL,
+    WARMUP_TIMEOUT_SECONDS,
+    AsyncRegyboxSession,
+    CredentialsCookiePolicy,
+    RegyboxCredentials,
     RegyboxSession,
+    SessionPool,
     get_classes_html,
     get_classes_params,
+    get_default_credentials,
+    get_retry_policy,
     get_url_html,
+    iter_response_text,
+    set_cookie,
+    stream_classes_html,
+    stream_url_html,
+    warm_up_connection,
 )
-from regybox.exceptions import RegyboxLoginError
+from regybox.deadline import deadline
+from regybox.exceptions import DeadlineExceededError, RegyboxLoginError
+from regybox.hedging import hedging
+from regybox.session_store import SessionStore
+from regybox.transport import _over_http1
 from regybox.utils.singleton import Singleton
 
+CREDENTIALS = RegyboxCredentials(user="testuser", phpsessid="testsession")
+LOGIN_HTML = "<script>location='https://www.regybox.pt/app/app_nova/login.php'</script>"
+
+
+def _html_response(html: str, *, encoding: str | None = "utf-8") -> requests.Response:
+    response = requests.Response()
+    response.status_code = 200
+    response.encoding = encoding
+    response.raw = io.BytesIO(html.encode(encoding or "utf-8"))
+    return response
+
+
+@pytest.fixture(name="pool")
+def fixture_pool() -> Iterator[SessionPool]:
+    Singleton._instances.pop(SessionPool, None)
+    yield SessionPool()
+    Singleton._instances.pop(SessionPool, None)
+
 
 def test_get_classes_params() -> None:
     """get_classes_params returns expected dict for a timestamp and user."""
@@ -31,37 +74,90 @@ def test_get_classes_params() -> None:
 
 def test_get_url_html_raises_on_login_redirect() -> None:
     """get_url_html raises RegyboxLoginError when response contains login."""
-    mock_response = MagicMock()
-    mock_response.raise_for_status = MagicMock()
-    mock_response.text = "https://www.regybox.pt/app/app_nova/login.php"
     mock_session = MagicMock()
-    mock_session.get.return_value = mock_response
+    mock_session.get.side_effect = [_html_response(LOGIN_HTML), _html_response(LOGIN_HTML)]
     with (
-        patch("regybox.connection.RegyboxSession", return_value=mock_session),
+        patch("regybox.connection.get_session", return_value=mock_session),
         pytest.raises(RegyboxLoginError),
     ):
         get_url_html("https://example.com/page")
+    assert mock_session.get.call_count == 2
 
 
 def test_get_url_html_returns_text_on_success() -> None:
     """get_url_html returns response text when no login redirect."""
-    mock_response = MagicMock()
-    mock_response.raise_for_status = MagicMock()
-    mock_response.text = "<html>classes</html>"
-    with patch("regybox.connection.RegyboxSession") as mock_session_cls:
+    mock_response = _html_response("<html>classes</html>")
+    with patch("regybox.connection.get_session") as mock_get_session:
         mock_session = MagicMock()
         mock_session.get.return_value = mock_response
-        mock_session_cls.return_value = mock_session
-        result = get_url_html("https://example.com/page")
+        mock_get_session.return_value = mock_session
+        result = get_url_html("https://example.com/page", credentials=CREDENTIALS)
     assert result == "<html>classes</html>"
+    mock_get_session.assert_called_once_with(CREDENTIALS)
     mock_session.get.assert_called_once_with(
         "https://example.com/page",
         headers=HEADERS,
         params={},
         timeout=DEFAULT_TIMEOUT_SECONDS,
+        stream=True,
     )
 
 
+def test_iter_response_text_decodes_split_characters() -> None:
+    with patch("regybox.connection.STREAM_CHUNK_SIZE", 1):
+        chunks = list(iter_response_text(_html_response("<p>Inscrição</p>")))
+
+    assert "".join(chunks) == "<p>Inscrição</p>"
+    assert len(chunks) > 1
+
+
+class _CountingReader(io.BytesIO):
+    reads: int = 0
+
+    def read(self, size: int | None = -1) -> bytes:
+        self.reads += 1
+        return super().read(size)
+
+
+def test_iter_response_text_stops_reading_at_login_marker() -> None:
+    raw = _CountingReader((LOGIN_HTML + "<html>" + "x" * 100_000 + "</html>").encode())
+    response = _html_response("")
+    response.raw = raw
+    with patch("regybox.connection.STREAM_CHUNK_SIZE", 7), pytest.raises(RegyboxLoginError):
+        list(iter_response_text(response))
+
+    assert raw.reads * 7 <= len(LOGIN_HTML)
+    assert raw.closed
+
+
+def test_stream_url_html_yields_chunks_as_they_are_read() -> None:
+    mock_session = MagicMock()
+    mock_session.get.return_value = _html_response("é" * 10, encoding="latin-1")
+    with (
+        patch("regybox.connection.STREAM_CHUNK_SIZE", 4),
+        patch("regybox.connection.get_session", return_value=mock_session),
+    ):
+        chunks = list(stream_classes_html(1234567890000, credentials=CREDENTIALS))
+
+    assert chunks == ["éééé", "éééé", "éé"]
+    assert mock_session.get.call_args.kwargs["params"]["valor1"] == "1234567890000"
+
+
+def test_stream_url_html_raises_on_login_marker_after_yielding() -> None:
+    mock_session = MagicMock()
+    mock_session.get.return_value = _html_response("<html>" + LOGIN_HTML)
+    with (
+        patch("regybox.connection.STREAM_CHUNK_SIZE", 4),
+        patch("regybox.connection.get_session", return_value=mock_session),
+    ):
+        chunks = stream_url_html("https://example.com/page")
+        assert next(chunks) == "<htm"
+        with pytest.raises(RegyboxLoginError):
+            list(chunks)
+
+    mock_session.reset_session.assert_not_called()
+
+
 def test_get_classes_html_calls_get_url_html_with_params() -> None:
     """get_classes_html calls get_url_html with aulas.php and params."""
     with patch(
@@ -75,29 +171,160 @@ def test_get_classes_html_calls_get_url_html_with_params() -> None:
     assert call_kw["params"]["z"] == "testuser"
 
 
-def test_regybox_session_initializes_mounts_and_session(monkeypatch: pytest.MonkeyPatch) -> None:
-    def fake_session_init(_self: requests.Session) -> None:
-        return None
+def test_get_classes_html_hedges_slow_fetches() -> None:
+    release = threading.Event()
+    calls: list[dict[str, str] | None] = []
+    over_http1: list[bool] = []
+
+    def fetch(_url: str, *, params: dict[str, str] | None = None, **_: object) -> str:
+        calls.append(params)
+        over_http1.append(_over_http1.get())
+        if len(calls) == 1:
+            release.wait(5)
+            return "slow"
+        return "hedged"
+
+    try:
+        with patch("regybox.connection.get_url_html", side_effect=fetch), hedging(delay=0.01):
+            assert get_classes_html(1234567890000, credentials=CREDENTIALS) == "hedged"
+    finally:
+        release.set()
 
-    monkeypatch.setattr(requests.Session, "__init__", fake_session_init)
+    assert len(calls) == 2
+    assert calls[0] == calls[1] == get_classes_params(1234567890000, user="testuser")
+    # the hedged fetch does not share the HTTP/2 connection of the slow one
+    assert over_http1 == [False, True]
+
+
+def test_regybox_session_initializes_mounts_and_sets_session_lazily(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
     mount = MagicMock()
     set_session = MagicMock()
     monkeypatch.setattr(RegyboxSession, "mount", mount)
     monkeypatch.setattr(RegyboxSession, "set_session", set_session)
-    if RegyboxSession in Singleton._instances:
-        del Singleton._instances[RegyboxSession]
-    try:
-        RegyboxSession(user="testuser")
-    finally:
-        if RegyboxSession in Singleton._instances:
-            del Singleton._instances[RegyboxSession]
 
-    assert mount.call_count == 2
-    assert mount.call_args_list[0].args[0] == "http://"
-    assert mount.call_args_list[1].args[0] == "https://"
+    session = RegyboxSession(CREDENTIALS)
+
+    assert mount.call_args_list[-2].args[0] == "http://"
+    assert mount.call_args_list[-1].args[0] == "https://"
+    set_session.assert_not_called()
+    session.ensure_session()
+    session.ensure_session()
     set_session.assert_called_once_with(user="testuser")
 
 
+def test_regybox_session_builds_cookie_header_from_its_credentials() -> None:
+    session = RegyboxSession(CREDENTIALS)
+    other = RegyboxSession(RegyboxCredentials(user="other", phpsessid="othersession"))
+
+    def cookie_header(session: RegyboxSession, url: str) -> str | bytes | None:
+        return session.prepare_request(requests.Request("GET", url)).headers.get("Cookie")
+
+    assert cookie_header(session, "https://www.regybox.pt/app/app_nova/page.php") == (
+        "PHPSESSID=testsession; regybox_boxes=%2Atestuser; regybox_user=testuser"
+    )
+    assert cookie_header(other, "https://www.regybox.pt/app/app_nova/page.php") == (
+        "PHPSESSID=othersession; regybox_boxes=%2Aother; regybox_user=other"
+    )
+    assert cookie_header(session, "https://example.com/page.php") is None
+    assert "Cookie" not in HEADERS
+    assert "testsession" not in repr(CREDENTIALS)
+
+
+def test_session_pool_keeps_one_session_per_member(
+    pool: SessionPool, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    set_session = MagicMock()
+    monkeypatch.setattr(RegyboxSession, "set_session", set_session)
+    other_credentials = RegyboxCredentials(user="other", phpsessid="othersession")
+
+    session = pool.get(CREDENTIALS)
+    assert pool.get(CREDENTIALS) is session
+    other = pool.get(other_credentials)
+
+    assert other is not session
+    assert other.user == "other"
+    assert len(pool) == 2
+    assert [call.kwargs["user"] for call in set_session.call_args_list] == ["testuser", "other"]
+
+    pool.discard(CREDENTIALS)
+    assert len(pool) == 1
+    assert pool.get(CREDENTIALS) is not session
+    pool.close()
+    assert len(pool) == 0
+
+
+def test_responses_cannot_replace_the_credential_cookies() -> None:
+    jar = CookieJar()
+    for name in ("PHPSESSID", "regybox_user", "server_cookie"):
+        set_cookie(jar, name, "from-response", domain="www.regybox.pt")
+    request = Request("https://www.regybox.pt/app/app_nova/set_session.php")
+
+    policy = CredentialsCookiePolicy(CREDENTIALS)
+
+    assert {cookie.name: policy.set_ok(cookie, request) for cookie in jar} == {
+        "PHPSESSID": False,
+        "regybox_user": False,
+        "server_cookie": True,
+    }
+    assert isinstance(RegyboxSession(CREDENTIALS).cookies.get_policy(), CredentialsCookiePolicy)
+
+
+def test_regybox_session_reuses_stored_session(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    def set_session(session: RegyboxSession, *, user: str) -> None:
+        del user
+        set_cookie(session.cookies, "server_cookie", "negotiated", domain="www.regybox.pt")
+
+    monkeypatch.setattr(RegyboxSession, "set_session", set_session)
+    store = SessionStore(tmp_path / "sessions.json")
+    first = RegyboxSession(CREDENTIALS, store=store)
+    first.ensure_session()
+
+    with patch.object(RegyboxSession, "set_session") as mock_set_session:
+        second = RegyboxSession(CREDENTIALS, store=store)
+        second.ensure_session()
+        mock_set_session.assert_not_called()
+        assert second.cookies.get("server_cookie") == "negotiated"
+
+        second.reset_session()
+        assert store.load(CREDENTIALS.key) is None
+        second.ensure_session()
+        mock_set_session.assert_called_once_with(user="testuser")
+
+    other_credentials = RegyboxCredentials(user="testuser", phpsessid="newsession")
+    assert store.load(other_credentials.key) is None
+
+
+def test_get_url_html_sets_session_again_on_login_redirect() -> None:
+    mock_session = MagicMock()
+    mock_session.get.side_effect = [
+        _html_response(LOGIN_HTML),
+        _html_response("<html>classes</html>"),
+    ]
+
+    with patch("regybox.connection.get_session", return_value=mock_session):
+        assert get_url_html("https://example.com/page") == "<html>classes</html>"
+
+    mock_session.reset_session.assert_called_once_with()
+    mock_session.ensure_session.assert_called_once_with()
+    assert mock_session.get.call_count == 2
+
+
+def test_get_url_html_uses_the_default_credentials(
+    pool: SessionPool, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(RegyboxSession, "set_session", MagicMock())
+    response = _html_response("<html>classes</html>")
+    with patch.object(RegyboxSession, "get", return_value=response):
+        assert get_url_html("https://example.com/page") == "<html>classes</html>"
+
+    assert len(pool) == 1
+    assert pool.get(get_default_credentials()).user == get_default_credentials().user
+
+
 def test_regybox_session_set_session_calls_get(monkeypatch: pytest.MonkeyPatch) -> None:
     response = MagicMock()
     response.raise_for_status = MagicMock()
@@ -116,25 +343,48 @@ def test_regybox_session_set_session_calls_get(monkeypatch: pytest.MonkeyPatch)
     response.raise_for_status.assert_called_once_with()
 
 
-def test_regybox_session_retry_adapter_retries_transient_statuses(
+def test_regybox_session_warm_up_sets_session_with_short_timeout(
     monkeypatch: pytest.MonkeyPatch,
 ) -> None:
-    def fake_session_init(_self: requests.Session) -> None:
-        return None
+    response = MagicMock()
+    session: RegyboxSession = object.__new__(RegyboxSession)
+    session.user = "testuser"
+    get = MagicMock(return_value=response)
+    monkeypatch.setattr(session, "get", get)
+
+    session.warm_up()
+
+    get.assert_called_once_with(
+        "https://www.regybox.pt/app/app_nova/set_session.php",
+        headers=HEADERS,
+        params=RegyboxSession.get_session_params(user="testuser"),
+        timeout=WARMUP_TIMEOUT_SECONDS,
+    )
+    response.raise_for_status.assert_called_once_with()
+
 
-    monkeypatch.setattr(requests.Session, "__init__", fake_session_init)
+def test_warm_up_connection_reports_failures() -> None:
+    mock_session = MagicMock()
+    mock_session.get.side_effect = requests.ConnectionError("connection reset")
+    mock_session.warm_up = lambda: RegyboxSession.warm_up(mock_session)
+    with patch("regybox.connection.get_session", return_value=mock_session):
+        assert warm_up_connection() is False
+
+    mock_session.get.side_effect = None
+    with patch("regybox.connection.get_session", return_value=mock_session) as mock_get_session:
+        assert warm_up_connection(CREDENTIALS) is True
+    mock_get_session.assert_called_once_with(CREDENTIALS)
+
+
+def test_regybox_session_retry_adapter_retries_transient_statuses(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
     mount = MagicMock()
     monkeypatch.setattr(RegyboxSession, "mount", mount)
-    monkeypatch.setattr(RegyboxSession, "set_session", MagicMock())
-    if RegyboxSession in Singleton._instances:
-        del Singleton._instances[RegyboxSession]
-    try:
-        RegyboxSession(user="testuser")
-    finally:
-        if RegyboxSession in Singleton._instances:
-            del Singleton._instances[RegyboxSession]
 
-    adapter = mount.call_args_list[1].args[1]
+    RegyboxSession(CREDENTIALS)
+
+    adapter = mount.call_args_list[-1].args[1]
     retries = adapter.max_retries
     assert retries.total == RETRY_TOTAL
     assert retries.connect == RETRY_TOTAL
@@ -162,3 +412,169 @@ def test_retry_client_backoff_budget_stays_under_one_minute() -> None:
         backoff_times.append(retry.get_backoff_time())
 
     assert sum(backoff_times) < 60
+
+
+def test_retry_policy_stops_when_retry_does_not_fit_in_deadline() -> None:
+    retry = get_retry_policy().increment(method="GET", url="https://example.com")
+
+    with patch("regybox.deadline.monotonic", return_value=100.0), deadline(0.25):
+        retry = retry.increment(method="GET", url="https://example.com")
+        assert retry.get_backoff_time() == pytest.approx(0.1)
+        with pytest.raises(MaxRetryError) as exc_info:
+            retry.increment(method="GET", url="https://example.com")
+
+    assert isinstance(exc_info.value.reason, DeadlineExceededError)
+
+
+def test_get_url_html_shrinks_attempt_timeouts_until_deadline() -> None:
+    mock_session = MagicMock()
+    with (
+        patch("regybox.deadline.monotonic", return_value=100.0) as monotonic,
+        patch("regybox.connection.get_session", return_value=mock_session),
+        patch("regybox.connection.time.sleep"),
+    ):
+
+        def stall(*_: object, **__: object) -> None:
+            monotonic.return_value += 2
+            raise requests.ReadTimeout
+
+        mock_session.get.side_effect = stall
+        with deadline(5), pytest.raises(DeadlineExceededError):
+            get_url_html("https://example.com/page")
+
+    timeouts = [call.kwargs["timeout"] for call in mock_session.get.call_args_list]
+    assert timeouts == [pytest.approx(5), pytest.approx(3), pytest.approx(1)]
+
+
+def test_get_url_html_retries_failed_attempts_within_deadline() -> None:
+    response = _html_response("<html>classes</html>")
+    mock_session = MagicMock()
+    mock_session.get.side_effect = [requests.ConnectionError("connection reset"), response]
+    with (
+        patch("regybox.connection.get_session", return_value=mock_session),
+        patch("regybox.connection.time.sleep"),
+        deadline(60),
+    ):
+        assert get_url_html("https://example.com/page") == "<html>classes</html>"
+
+    assert mock_session.get.call_count == 2
+    assert all(
+        call.kwargs["timeout"] <= DEFAULT_TIMEOUT_SECONDS
+        for call in mock_session.get.call_args_list
+    )
+
+
+def test_get_url_html_does_not_retry_failures_without_deadline() -> None:
+    mock_session = MagicMock()
+    mock_session.get.side_effect = requests.ConnectionError("connection reset")
+    with (
+        patch("regybox.connection.get_session", return_value=mock_session),
+        pytest.raises(requests.ConnectionError),
+    ):
+        get_url_html("https://example.com/page")
+
+    mock_session.get.assert_called_once()
+
+
+def _run_async_session(
+    handler: httpx.MockTransport, *, action: str = "classes"
+) -> tuple[str, list[httpx.Request]]:
+    requests_seen: list[httpx.Request] = []
+
+    def record(request: httpx.Request) -> httpx.Response:
+        requests_seen.append(request)
+        return handler.handle_request(request)
+
+    async def run() -> str:
+        async with AsyncRegyboxSession(
+            credentials=CREDENTIALS, transport=httpx.MockTransport(record)
+        ) as session:
+            if action == "classes":
+                return await session.get_classes_html(1234567890000)
+            return await session.get_url_html("https://www.regybox.pt/app/app_nova/page.php")
+
+    return asyncio.run(run()), requests_seen
+
+
+def test_async_session_sets_session_and_fetches_classes() -> None:
+    html, requests_seen = _run_async_session(
+        httpx.MockTransport(lambda _: httpx.Response(200, text="<html>classes</html>"))
+    )
+
+    assert html == "<html>classes</html>"
+    assert [request.url.path for request in requests_seen] == [
+        "/app/app_nova/set_session.php",
+        "/app/app_nova/php/aulas/aulas.php",
+    ]
+    assert requests_seen[0].url.params["z"] == "testuser"
+    assert requests_seen[1].url.params["valor1"] == "1234567890000"
+    assert requests_seen[1].url.params["z"] == "testuser"
+    assert requests_seen[1].headers["Cookie"] == (
+        "PHPSESSID=testsession; regybox_boxes=%2Atestuser; regybox_user=testuser"
+    )
+
+
+def test_async_session_raises_on_login_redirect() -> None:
+    with pytest.raises(RegyboxLoginError):
+        _run_async_session(
+            httpx.MockTransport(
+                lambda _: httpx.Response(200, text="https://www.regybox.pt/app/app_nova/login.php")
+            ),
+            action="page",
+        )
+
+
+def test_async_session_retries_transient_statuses_and_errors() -> None:
+    responses: list[httpx.Response | httpx.TransportError] = [
+        httpx.Response(200),
+        httpx.ConnectError("connection reset"),
+        httpx.Response(503, headers={"Retry-After": "0"}),
+        httpx.Response(502),
+        httpx.Response(200, text="<html>ok</html>"),
+    ]
+
+    def handler(_: httpx.Request) -> httpx.Response:
+        response = responses.pop(0)
+        if isinstance(response, httpx.TransportError):
+            raise response
+        return response
+
+    with patch("regybox.connection.asyncio.sleep") as mock_sleep:
+        html, requests_seen = _run_async_session(httpx.MockTransport(handler), action="page")
+
+    assert html == "<html>ok</html>"
+    assert len(requests_seen) == 5
+    assert mock_sleep.call_count == 3
+    assert mock_sleep.call_args_list[1].args == (0,)
+
+
+def test_async_session_gives_up_after_retry_budget() -> None:
+    def unavailable(_: httpx.Request) -> httpx.Response:
+        return httpx.Response(503)
+
+    def unreachable(_: httpx.Request) -> httpx.Response:
+        raise httpx.ConnectError("connection refused")
+
+    with (
+        patch("regybox.connection.asyncio.sleep"),
+        pytest.raises(httpx.HTTPStatusError),
+    ):
+        _run_async_session(httpx.MockTransport(unavailable))
+    with (
+        patch("regybox.connection.asyncio.sleep"),
+        pytest.raises(httpx.ConnectError),
+    ):
+        _run_async_session(httpx.MockTransport(unreachable))
+
+
+def test_async_session_gives_up_when_retry_does_not_fit_in_deadline() -> None:
+    def unreachable(_: httpx.Request) -> httpx.Response:
+        raise httpx.ConnectError("connection refused")
+
+    with (
+        patch("regybox.deadline.monotonic", return_value=100.0),
+        patch("regybox.connection.asyncio.sleep"),
+        deadline(0.15),
+        pytest.raises(DeadlineExceededError),
+    ):
+        _run_async_session(httpx.MockTransport(unreachable))
@@ -0,0 +1,58 @@
+"""Tests for the deadline module."""
+
+from unittest.mock import patch
+
+import pytest
+
+from regybox.deadline import (
+    DEADLINE_MIN_ATTEMPT_SECONDS,
+    attempt_timeout,
+    deadline,
+    fits_in_deadline,
+    remaining_seconds,
+)
+from regybox.exceptions import DeadlineExceededError
+
+
+def test_no_deadline_keeps_default_timeout_and_retries() -> None:
+    assert remaining_seconds() is None
+    assert fits_in_deadline(1000)
+    with attempt_timeout(15) as timeout:
+        assert timeout == 15
+
+
+def test_deadline_reports_remaining_budget() -> None:
+    with patch("regybox.deadline.monotonic", return_value=100.0) as monotonic, deadline(10):
+        monotonic.return_value = 104.0
+        assert remaining_seconds() == pytest.approx(6)
+    assert remaining_seconds() is None
+
+
+def test_nested_deadline_never_extends_enclosing_one() -> None:
+    with patch("regybox.deadline.monotonic", return_value=100.0), deadline(5):
+        with deadline(60):
+            assert remaining_seconds() == pytest.approx(5)
+        with deadline(2):
+            assert remaining_seconds() == pytest.approx(2)
+        assert remaining_seconds() == pytest.approx(5)
+
+
+def test_attempt_timeout_shrinks_to_remaining_budget() -> None:
+    with patch("regybox.deadline.monotonic", return_value=100.0) as monotonic, deadline(20):
+        with attempt_timeout(15) as timeout:
+            assert timeout == 15
+        monotonic.return_value = 117.5
+        with attempt_timeout(15) as timeout:
+            assert timeout == pytest.approx(2.5)
+        monotonic.return_value = 120.0 - DEADLINE_MIN_ATTEMPT_SECONDS / 2
+        with pytest.raises(DeadlineExceededError), attempt_timeout(15):
+            pytest.fail("the attempt should not start")
+
+
+def test_retry_must_fit_the_attempt_timeout_in_progress() -> None:
+    with patch("regybox.deadline.monotonic", return_value=100.0), deadline(10):
+        assert fits_in_deadline(9)
+        assert not fits_in_deadline(10)
+        with attempt_timeout(4):
+            assert fits_in_deadline(6)
+            assert not fits_in_deadline(6.5)
@@ -6,10 +6,12 @@ from regybox.exceptions import (
     ClassIsOverbookedError,
     ClassNotFoundError,
     ClassNotOpenError,
+    DeadlineExceededError,
     NoClassesFoundError,
     RegyboxBaseError,
     RegyboxLoginError,
     RegyboxTimeoutError,
+    ServiceUnavailableError,
     UnparseableError,
     UnplannedClassError,
     UserAlreadyEnrolledError,
@@ -30,6 +32,12 @@ from regybox.exceptions import (
             "timeout_waiting_for_enrollment",
             "Enrollment window opens later than expected",
         ),
+        (DeadlineExceededError(0.5), "deadline_exceeded", "Regybox did not answer in time"),
+        (
+            ServiceUnavailableError("Regybox", retry_in=30),
+            "service_unavailable",
+            "Regybox is unavailable",
+        ),
         (
             UnplannedClassError(
                 class_type="WOD Rato",
@@ -0,0 +1,103 @@
+"""Tests for the hedging module."""
+
+import threading
+from collections.abc import Iterator
+
+import pytest
+
+from regybox.deadline import deadline, remaining_seconds
+from regybox.hedging import (
+    HEDGE_DEFAULT_DELAY_SECONDS,
+    HEDGE_MIN_DELAY_SECONDS,
+    HEDGE_MIN_SAMPLES,
+    LATENCY_MAX_SAMPLES,
+    LatencyTracker,
+    hedge_delay,
+    hedged,
+    hedging,
+)
+from regybox.utils.singleton import Singleton
+
+
+@pytest.fixture(name="tracker")
+def fixture_tracker() -> Iterator[LatencyTracker]:
+    Singleton._instances.pop(LatencyTracker, None)
+    yield LatencyTracker()
+    Singleton._instances.pop(LatencyTracker, None)
+
+
+def test_latency_quantile_needs_enough_samples(tracker: LatencyTracker) -> None:
+    for _ in range(HEDGE_MIN_SAMPLES - 1):
+        tracker.record(0.2)
+
+    assert tracker.quantile(0.9) is None
+
+
+def test_latency_quantile_uses_recent_samples(tracker: LatencyTracker) -> None:
+    for _ in range(LATENCY_MAX_SAMPLES):
+        tracker.record(5.0)
+    for latency in range(1, 11):
+        for _ in range(LATENCY_MAX_SAMPLES // 10):
+            tracker.record(latency / 10)
+
+    assert tracker.quantile(0.9) == pytest.approx(1.0)
+    assert tracker.quantile(0.5) == pytest.approx(0.6)
+
+
+def test_hedge_delay_follows_the_latency_quantile(tracker: LatencyTracker) -> None:
+    assert hedge_delay() is None
+    with hedging():
+        assert hedge_delay() == pytest.approx(HEDGE_DEFAULT_DELAY_SECONDS)
+        for latency in range(1, 11):
+            tracker.record(latency / 10)
+        assert hedge_delay() == pytest.approx(1.0)
+        with hedging(delay=0):
+            assert hedge_delay() == pytest.approx(HEDGE_MIN_DELAY_SECONDS)
+        with hedging(delay=0.3):
+            assert hedge_delay() == pytest.approx(0.3)
+    assert hedge_delay() is None
+
+
+def test_hedged_does_not_duplicate_fast_calls() -> None:
+    calls: list[int] = []
+
+    def fetch() -> str:
+        calls.append(1)
+        return "fast"
+
+    assert hedged(fetch, delay=5) == "fast"
+    assert len(calls) == 1
+
+
+def test_hedged_uses_the_first_response_of_a_slow_call() -> None:
+    release = threading.Event()
+    budgets: list[float | None] = []
+
+    def fetch() -> str:
+        budgets.append(remaining_seconds())
+        if len(budgets) == 1:
+            release.wait(5)
+            return "slow"
+        return "hedged"
+
+    try:
+        with deadline(60):
+            assert hedged(fetch, delay=0.01) == "hedged"
+    finally:
+        release.set()
+
+    assert len(budgets) == 2
+    assert all(budget is not None and 0 < budget <= 60 for budget in budgets)
+
+
+def test_hedged_raises_the_first_error_when_both_calls_fail() -> None:
+    errors = iter([ValueError("first"), ValueError("second")])
+    started = threading.Barrier(2, timeout=5)
+
+    def fetch() -> str:
+        error = next(errors)
+        started.wait()
+        raise error
+
+    with pytest.raises(ValueError, match="first"):
+        hedged(fetch, delay=0.2)
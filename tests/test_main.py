@@ -3,13 +3,15 @@
 import json
 import logging
 import sys
+from pathlib import Path
 from unittest.mock import patch
 
 import pytest
 
 from regybox import __main__ as cli
+from regybox.batch import BatchResult, BatchTarget
 from regybox.exceptions import REGYBOX_USER_ERROR_PREFIX, RegyboxLoginError
-from regybox.regybox import OperationOptions
+from regybox.regybox import ClassSlot, OperationOptions, OperationResult
 
 
 def test_run_calls_main_with_parsed_args(monkeypatch: pytest.MonkeyPatch) -> None:
@@ -114,6 +116,86 @@ def test_run_passes_unenroll_operation_and_not_open_noop(
     )
 
 
+def test_run_passes_fire_at_open(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(
+        sys,
+        "argv",
+        ["regybox", "2026-03-10", "06:30", "WOD Rato", "--fire-at-open"],
+    )
+    with patch("regybox.__main__.main") as mock_main:
+        cli.run()
+
+    assert mock_main.call_args.kwargs["operation_options"] == OperationOptions(
+        operation="enroll", not_open_is_noop=False, fire_at_open=True
+    )
+
+
+def test_run_passes_hedge_requests(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(
+        sys,
+        "argv",
+        ["regybox", "2026-03-10", "06:30", "WOD Rato", "--fire-at-open", "--hedge-requests"],
+    )
+    with patch("regybox.__main__.main") as mock_main:
+        cli.run()
+
+    assert mock_main.call_args.kwargs["operation_options"] == OperationOptions(
+        operation="enroll", not_open_is_noop=False, fire_at_open=True, hedge_requests=True
+    )
+
+
+def test_run_passes_fallback_slots(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(
+        sys,
+        "argv",
+        ["regybox", "2026-03-10", "06:30", "WOD Rato", "--fallback-slots", "7:30 WOD, 18:30 Open"],
+    )
+    with patch("regybox.__main__.main") as mock_main:
+        cli.run()
+
+    assert mock_main.call_args.kwargs["operation_options"] == OperationOptions(
+        fallback_slots=(ClassSlot("07:30", "WOD"), ClassSlot("18:30", "Open"))
+    )
+
+
+def test_run_passes_watch_waitlist(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(
+        sys,
+        "argv",
+        ["regybox", "2026-03-10", "06:30", "WOD Rato", "--watch-waitlist", "--watch-budget", "20"],
+    )
+    with patch("regybox.__main__.main") as mock_main:
+        cli.run()
+
+    assert mock_main.call_args.kwargs["operation_options"] == OperationOptions(
+        watch_waitlist=True, watch_budget=20
+    )
+
+
+def test_run_passes_max_fetches(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(
+        sys,
+        "argv",
+        ["regybox", "2026-03-10", "06:30", "WOD Rato", "--max-fetches", "12"],
+    )
+    with patch("regybox.__main__.main") as mock_main:
+        cli.run()
+
+    assert mock_main.call_args.kwargs["operation_options"] == OperationOptions(max_fetches=12)
+
+
+def test_run_exits_on_non_positive_max_fetches(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(
+        sys,
+        "argv",
+        ["regybox", "2026-03-10", "06:30", "WOD Rato", "--max-fetches", "0"],
+    )
+    with pytest.raises(SystemExit) as exc_info:
+        cli.run()
+
+    assert exc_info.value.code == 1
+
+
 def test_run_exits_on_non_positive_timeout(monkeypatch: pytest.MonkeyPatch) -> None:
     monkeypatch.setattr(
         sys,
@@ -164,7 +246,21 @@ def test_run_list_calls_list_classes(monkeypatch: pytest.MonkeyPatch) -> None:
     with patch("regybox.__main__.list_classes") as mock_list_classes:
         cli.run_list()
 
-    mock_list_classes.assert_called_once_with(class_date="2026-03-10")
+    mock_list_classes.assert_called_once_with(
+        class_date="2026-03-10", end_date=None, output_format="table"
+    )
+
+
+def test_run_list_passes_range_and_format(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(
+        sys, "argv", ["list", "2026-03-10", "--range", "2026-03-23", "--format", "json"]
+    )
+    with patch("regybox.__main__.list_classes") as mock_list_classes:
+        cli.run_list()
+
+    mock_list_classes.assert_called_once_with(
+        class_date="2026-03-10", end_date="2026-03-23", output_format="json"
+    )
 
 
 def test_run_list_exits_on_value_error(monkeypatch: pytest.MonkeyPatch) -> None:
@@ -174,3 +270,87 @@ def test_run_list_exits_on_value_error(monkeypatch: pytest.MonkeyPatch) -> None:
         cli.run_list()
 
     assert exc_info.value.code == 1
+
+
+def test_run_batch_runs_the_targets_file(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+    targets_file = tmp_path / "targets.txt"
+    targets_file.write_text("2026-03-10 06:30 WOD Rato\n2026-03-11 07:30 Open Box\n")
+    monkeypatch.setattr(
+        sys, "argv", ["batch", str(targets_file), "--timeout-seconds", "12", "--fire-at-open"]
+    )
+    targets = [
+        BatchTarget("2026-03-10", "06:30", "WOD Rato"),
+        BatchTarget("2026-03-11", "07:30", "Open Box"),
+    ]
+    with patch(
+        "regybox.__main__.run_batch_targets",
+        return_value=[
+            BatchResult(target, OperationResult("enroll", "success", target.class_type))
+            for target in targets
+        ],
+    ) as mock_run_batch:
+        cli.run_batch()
+
+    mock_run_batch.assert_called_once_with(
+        targets,
+        event_name=None,
+        timeout=12,
+        operation_options=OperationOptions(fire_at_open=True),
+    )
+
+
+def test_run_batch_exits_when_a_target_fails(
+    monkeypatch: pytest.MonkeyPatch,
+    caplog: pytest.LogCaptureFixture,
+    tmp_path: Path,
+) -> None:
+    targets_file = tmp_path / "targets.txt"
+    targets_file.write_text("2026-03-10 06:30 WOD Rato\n")
+    monkeypatch.setattr(sys, "argv", ["batch", str(targets_file)])
+    target = BatchTarget("2026-03-10", "06:30", "WOD Rato")
+    with (
+        caplog.at_level(logging.ERROR),
+        patch(
+            "regybox.__main__.run_batch_targets",
+            return_value=[BatchResult(target, error=RegyboxLoginError())],
+        ),
+        pytest.raises(SystemExit) as exc_info,
+    ):
+        cli.run_batch()
+
+    assert exc_info.value.code == 1
+    assert REGYBOX_USER_ERROR_PREFIX in caplog.text
+
+
+def test_run_batch_exits_on_invalid_targets_file(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> None:
+    targets_file = tmp_path / "targets.txt"
+    targets_file.write_text("2026-03-10 WOD\n")
+    monkeypatch.setattr(sys, "argv", ["batch", str(targets_file)])
+    with (
+        patch("regybox.__main__.run_batch_targets") as mock_run_batch,
+        pytest.raises(SystemExit) as exc_info,
+    ):
+        cli.run_batch()
+
+    assert exc_info.value.code == 1
+    mock_run_batch.assert_not_called()
+
+
+def test_run_serve_runs_the_scheduler(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+    targets_file = tmp_path / "targets.txt"
+    monkeypatch.setattr(
+        sys, "argv", ["serve", str(targets_file), "--timeout-seconds", "300", "--fire-at-open"]
+    )
+    with (
+        patch("regybox.__main__.signal.signal"),
+        patch("regybox.__main__.Scheduler") as mock_scheduler,
+        patch("regybox.__main__.serve") as mock_serve,
+    ):
+        cli.run_serve()
+
+    mock_scheduler.assert_called_once_with(
+        event_name=None, timeout=300, operation_options=OperationOptions(fire_at_open=True)
+    )
+    assert mock_serve.call_args.args == (targets_file, mock_scheduler.return_value)
@@ -0,0 +1,116 @@
+"""Tests for the parsing module."""
+
+from dataclasses import fields
+from importlib import resources
+
+import pytest
+
+from regybox.classes import Class
+from regybox.parsing import (
+    HTML_BACKENDS,
+    available_html_backends,
+    get_html_backend,
+    parse_class_blocks,
+)
+
+from . import html_examples
+
+CLASS_FIXTURES: list[str] = sorted(
+    path.name
+    for path in resources.files(html_examples).iterdir()
+    if path.name.endswith(".html") and path.name != "bad_class.html"
+)
+PAGE_HTML: str = (
+    "<html><head><script>var row = '<div class=\"filtro0\">';</script></head><body>"
+    '<div class="page"><!-- classes --><p>Segunda-feira<br>1 de Julho'
+    + "".join(resources.files(html_examples).joinpath(name).read_text() for name in CLASS_FIXTURES)
+    + "</div><script>load_script('php/aulas/aulas.php');</script></body></html>"
+)
+
+
+def _class_fields(class_: Class) -> dict[str, object]:
+    return {field.name: getattr(class_, field.name) for field in fields(Class) if field.init}
+
+
+@pytest.fixture(params=HTML_BACKENDS)
+def backend(request: pytest.FixtureRequest) -> str:
+    name: str = request.param
+    if name not in available_html_backends():
+        pytest.skip(f"{name} is not installed")
+    return name
+
+
+@pytest.mark.parametrize("filename", CLASS_FIXTURES)
+def test_backends_parse_fixtures_like_html_parser(backend: str, filename: str) -> None:
+    html: str = resources.files(html_examples).joinpath(filename).read_text()
+
+    expected = parse_class_blocks(html, backend="html.parser")
+    blocks = parse_class_blocks(html, backend=backend)
+
+    assert len(blocks) == len(expected) == 1
+    assert str(blocks[0]) == str(expected[0])
+    assert _class_fields(Class(blocks[0])) == _class_fields(Class(expected[0]))
+
+
+def test_backends_parse_only_class_blocks_from_a_full_page(backend: str) -> None:
+    expected = parse_class_blocks(PAGE_HTML, backend="html.parser")
+    blocks = parse_class_blocks(PAGE_HTML, backend=backend)
+
+    assert len(blocks) == len(CLASS_FIXTURES)
+    assert [str(block) for block in blocks] == [str(block) for block in expected]
+    assert [_class_fields(Class(block)) for block in blocks] == [
+        _class_fields(Class(block)) for block in expected
+    ]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 4096])
+def test_backends_parse_a_page_in_chunks(backend: str, chunk_size: int) -> None:
+    chunks = (PAGE_HTML[i : i + chunk_size] for i in range(0, len(PAGE_HTML), chunk_size))
+
+    blocks = parse_class_blocks(chunks, backend=backend)
+
+    assert [str(block) for block in blocks] == [
+        str(block) for block in parse_class_blocks(PAGE_HTML, backend=backend)
+    ]
+
+
+def test_backends_ignore_pages_without_classes(backend: str) -> None:
+    assert parse_class_blocks("<div class='empty'>Sem aulas</div>", backend=backend) == []
+
+
+def test_default_backend_is_the_fastest_installed(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr("regybox.parsing.HTML_BACKEND", "")
+
+    assert get_html_backend() == available_html_backends()[0]
+    assert available_html_backends()[-2:] == ["stream", "html.parser"]
+
+
+def test_backend_can_be_selected_from_the_environment(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr("regybox.parsing.HTML_BACKEND", "stream")
+
+    assert get_html_backend() == "stream"
+    assert get_html_backend("html.parser") == "html.parser"
+
+
+def test_unavailable_backend_raises(monkeypatch: pytest.MonkeyPatch) -> None:
+    def find_spec(_name: str) -> None:
+        return None
+
+    monkeypatch.setattr("regybox.parsing.importlib.util.find_spec", find_spec)
+
+    assert available_html_backends() == ["stream", "html.parser"]
+    with pytest.raises(ValueError, match="lxml"):
+        get_html_backend("lxml")
+
+
+def test_stream_backend_builds_the_same_tags_as_html_parser() -> None:
+    html: str = (
+        '<p>Aulas</p><div class="filtro0" id="feed_time_slot1"><!-- slot --><br/>'
+        "<p>WOD<span/> &amp; Open<input class='timers' value='5'></p></div><div>Fim</div>"
+    )
+
+    blocks = parse_class_blocks(html, backend="stream")
+
+    assert [str(block) for block in blocks] == [
+        str(block) for block in parse_class_blocks(html, backend="html.parser")
+    ]
@@ -0,0 +1,178 @@
+"""Tests for the rate_limit module."""
+
+import asyncio
+import threading
+import time
+from collections.abc import Iterator
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import override
+from unittest.mock import patch
+
+import pytest
+import requests
+
+from regybox.connection import (
+    RETRY_TOTAL,
+    RegyboxCredentials,
+    RegyboxSession,
+    get_retry_policy,
+)
+from regybox.rate_limit import (
+    RATE_LIMIT_CRITICAL_RESERVE,
+    Priority,
+    RateLimiter,
+    _Waiter,
+    current_priority,
+    priority,
+)
+from regybox.utils.singleton import Singleton
+
+
+@pytest.fixture(name="limiter")
+def fixture_limiter() -> Iterator[RateLimiter]:
+    Singleton._instances.pop(RateLimiter, None)
+    yield RateLimiter(rate=10, burst=10)
+    Singleton._instances.pop(RateLimiter, None)
+
+
+def _enqueue(limiter: RateLimiter, key: str, level: Priority = "normal") -> _Waiter:
+    with priority(level):
+        return limiter._enqueue(key)
+
+
+def test_priority_is_set_for_the_context() -> None:
+    assert current_priority() == "normal"
+    with priority("critical"):
+        assert current_priority() == "critical"
+        with priority("background"):
+            assert current_priority() == "background"
+        assert current_priority() == "critical"
+    assert current_priority() == "normal"
+
+
+def test_disabled_limiter_never_waits(limiter: RateLimiter) -> None:
+    limiter.rate = 0
+
+    for _ in range(100):
+        limiter.acquire("user:key")
+    asyncio.run(limiter.async_acquire("user:key"))
+
+    assert not limiter.enabled
+    assert limiter._tokens == limiter.burst
+
+
+def test_acquire_waits_for_the_bucket_to_refill(limiter: RateLimiter) -> None:
+    limiter._tokens = 1
+
+    start = time.monotonic()
+    with priority("critical"):
+        limiter.acquire("user:key")
+        limiter.acquire("user:key")
+
+    assert time.monotonic() - start >= 0.05
+    assert not limiter._waiters
+
+
+def test_critical_waiters_are_served_first(limiter: RateLimiter) -> None:
+    background = _enqueue(limiter, "user:key", "background")
+    normal = _enqueue(limiter, "user:key")
+    critical = _enqueue(limiter, "user:key", "critical")
+
+    with patch("regybox.rate_limit.time.monotonic", return_value=limiter._updated_at):
+        assert limiter._try_take(background) is not None
+        assert limiter._try_take(normal) is not None
+        assert limiter._try_take(critical) is None
+        assert limiter._try_take(background) is not None
+        assert limiter._try_take(normal) is None
+        assert limiter._try_take(background) is None
+
+
+def test_non_critical_requests_leave_the_reserve(limiter: RateLimiter) -> None:
+    limiter._tokens = RATE_LIMIT_CRITICAL_RESERVE + 0.5
+    normal = _enqueue(limiter, "user:key")
+
+    with patch("regybox.rate_limit.time.monotonic", return_value=limiter._updated_at):
+        assert limiter._try_take(normal) == pytest.approx(0.05)
+        critical = _enqueue(limiter, "user:key", "critical")
+        assert limiter._try_take(critical) is None
+
+
+def test_members_are_served_round_robin(limiter: RateLimiter) -> None:
+    with patch("regybox.rate_limit.time.monotonic", return_value=limiter._updated_at):
+        assert limiter._try_take(_enqueue(limiter, "busy:key")) is None
+        busy = _enqueue(limiter, "busy:key")
+        quiet = _enqueue(limiter, "quiet:key")
+
+        assert limiter._try_take(busy) is not None
+        assert limiter._try_take(quiet) is None
+        assert limiter._try_take(busy) is None
+
+
+def test_async_acquire_waits_without_blocking_the_loop(limiter: RateLimiter) -> None:
+    limiter._tokens = RATE_LIMIT_CRITICAL_RESERVE + 1
+
+    async def run() -> list[str]:
+        done: list[str] = []
+
+        async def acquire(key: str) -> None:
+            await limiter.async_acquire(key)
+            done.append(key)
+
+        await asyncio.gather(acquire("first:key"), acquire("second:key"))
+        return done
+
+    assert asyncio.run(run()) == ["first:key", "second:key"]
+    assert not limiter._waiters
+
+
+def test_regybox_session_waits_for_the_limiter() -> None:
+    credentials = RegyboxCredentials(user="testuser", phpsessid="testsession")
+    session: RegyboxSession = object.__new__(RegyboxSession)
+    session.credentials = credentials
+
+    with (
+        patch.object(requests.Session, "send", return_value=requests.Response()),
+        patch.object(RateLimiter, "acquire") as acquire,
+    ):
+        RegyboxSession.send(session, requests.PreparedRequest(), timeout=5)
+
+    acquire.assert_called_once_with(credentials.key)
+
+
+class _UnavailableHandler(BaseHTTPRequestHandler):
+    requests_seen: int = 0
+
+    def do_GET(self) -> None:
+        type(self).requests_seen += 1
+        self.send_response(503)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    @override
+    def log_message(self, format: str, *args: object) -> None:
+        del format, args
+
+
+def test_every_retry_waits_for_the_limiter() -> None:
+    _UnavailableHandler.requests_seen = 0
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _UnavailableHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    credentials = RegyboxCredentials(user="testuser", phpsessid="testsession")
+    session = RegyboxSession(credentials)
+    try:
+        with (
+            patch("urllib3.util.retry.time.sleep"),
+            patch.object(RateLimiter, "acquire") as acquire,
+            pytest.raises(requests.exceptions.RetryError),
+        ):
+            session.get(f"http://127.0.0.1:{server.server_address[1]}/aulas.php", timeout=5)
+    finally:
+        session.close()
+        server.shutdown()
+        server.server_close()
+
+    assert _UnavailableHandler.requests_seen == RETRY_TOTAL + 1
+    assert acquire.call_count == RETRY_TOTAL + 1
+    acquire.assert_called_with(credentials.key)
+    assert get_retry_policy().rate_limit_key is None
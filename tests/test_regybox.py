@@ -1,9 +1,13 @@
+import csv
 import datetime
+import io
+import json
 import logging
+import threading
 import tomllib
 from importlib import resources
 from pathlib import Path
-from typing import TYPE_CHECKING, Any
+from typing import Any
 from unittest.mock import MagicMock, patch
 
 import pytest
@@ -11,23 +15,40 @@ from hypothesis import given
 from hypothesis.strategies import integers
 
 from regybox import __version__
+from regybox.classes import ClassSnapshot
+from regybox.clock import ClockOffset, ClockSample
 from regybox.common import LOGGER
+from regybox.connection import RegyboxCredentials
+from regybox.deadline import remaining_seconds
 from regybox.exceptions import (
     ClassIsOverbookedError,
     ClassNotFoundError,
     ClassNotOpenError,
+    DeadlineExceededError,
     NoClassesFoundError,
     RegyboxTimeoutError,
+    UnplannedClassError,
     UserAlreadyEnrolledError,
 )
+from regybox.hedging import hedge_delay
 from regybox.regybox import (
-    LONG_WAIT,
-    MED_WAIT,
+    ENROLL_DEADLINE,
+    FINAL_WINDOW,
+    FIRE_AT_OPEN_MAX_POLLS,
+    FIRE_AT_OPEN_POLL_DEADLINE,
+    FIRE_AT_OPEN_POLL_INTERVAL,
+    LIST_FIELDS,
     SHORT_WAIT,
+    VERIFY_LEAD,
+    WARMUP_LEAD,
+    ClassSlot,
     OperationOptions,
     OperationResult,
+    _seconds_until_open,
+    enroll_many,
     list_classes,
     main,
+    parse_class_slots,
     parse_class_types,
     pick_first_class,
     snooze,
@@ -36,8 +57,17 @@ from regybox.utils.times import secs_to_str
 
 from . import html_examples
 
-if TYPE_CHECKING:
-    import io
+OPEN_CLASS_SNAPSHOT = ClassSnapshot(
+    name="WOD Rato",
+    details="Rato",
+    date="2024-07-01",
+    start="06:30",
+    end="07:20",
+    max_capacity=15,
+    cur_capacity=4,
+    is_open=True,
+    enroll_url="https://www.regybox.pt/app/app_nova/php/aulas/marca_aulas.php?id=1",
+)
 
 
 def test_secs_to_str() -> None:
@@ -55,16 +85,17 @@ def test_version() -> None:
 
 
 def test_times() -> None:
-    assert SHORT_WAIT < MED_WAIT
-    assert MED_WAIT < LONG_WAIT
+    assert SHORT_WAIT < FINAL_WINDOW
+    assert FINAL_WINDOW < VERIFY_LEAD
 
 
 @given(time=integers())
 def test_wait(time: int) -> None:
     assert snooze(time) >= SHORT_WAIT
-    assert snooze(time) <= LONG_WAIT
     if time > SHORT_WAIT:
         assert snooze(time) < time
+    if time > FINAL_WINDOW:
+        assert time - snooze(time) in {FINAL_WINDOW, VERIFY_LEAD}
 
 
 def test_list_classes(caplog: pytest.LogCaptureFixture) -> None:
@@ -121,6 +152,51 @@ def test_list_classes_no_classes(caplog: pytest.LogCaptureFixture) -> None:
         list_classes("2024-07-01")
 
 
+def test_list_classes_range_as_json(capsys: pytest.CaptureFixture[str]) -> None:
+    days: list[tuple[datetime.date, list[ClassSnapshot]]] = [
+        (datetime.date(2024, 7, 2), []),
+        (datetime.date(2024, 7, 1), [OPEN_CLASS_SNAPSHOT]),
+    ]
+
+    with patch("regybox.regybox.get_classes_range", return_value=iter(days)) as mock_range:
+        list_classes("2024-07-01", end_date="2024-07-02", output_format="json")
+
+    mock_range.assert_called_once_with(datetime.date(2024, 7, 1), datetime.date(2024, 7, 2))
+    records = json.loads(capsys.readouterr().out)
+    assert [(record["date"], record["name"]) for record in records] == [("2024-07-01", "WOD Rato")]
+    assert "enroll_url" not in records[0]
+
+
+def test_list_classes_as_csv(capsys: pytest.CaptureFixture[str]) -> None:
+    with patch("regybox.regybox.get_cached_classes", return_value=[OPEN_CLASS_SNAPSHOT]):
+        list_classes("2024-07-01", output_format="csv")
+
+    rows = list(csv.DictReader(io.StringIO(capsys.readouterr().out)))
+    assert list(rows[0]) == list(LIST_FIELDS)
+    assert (rows[0]["name"], rows[0]["start"], rows[0]["max_capacity"]) == (
+        "WOD Rato",
+        "06:30",
+        "15",
+    )
+
+
+def test_list_classes_range_logs_one_table_per_date(caplog: pytest.LogCaptureFixture) -> None:
+    days: list[tuple[datetime.date, list[ClassSnapshot]]] = [
+        (datetime.date(2024, 7, 2), [OPEN_CLASS_SNAPSHOT]),
+        (datetime.date(2024, 7, 1), []),
+    ]
+
+    with (
+        caplog.at_level(logging.INFO),
+        patch("regybox.regybox.get_classes_range", return_value=iter(days)),
+    ):
+        list_classes("2024-07-01", end_date="2024-07-02")
+
+    assert caplog.text.index("Classes for 2024-07-01: No classes found.") < caplog.text.index(
+        "Classes for 2024-07-02:"
+    )
+
+
 def test_main_enrolls_when_class_open(
     caplog: pytest.LogCaptureFixture,
 ) -> None:
@@ -147,6 +223,26 @@ def test_main_enrolls_when_class_open(
     assert "Attempting to enroll in WOD Rato on 2026-03-10 at 06:30" in caplog.text
 
 
+def test_main_acts_for_the_member_in_the_options() -> None:
+    credentials = RegyboxCredentials(user="member", phpsessid="secret")
+    mock_class: MagicMock = MagicMock()
+    mock_class.is_open = True
+    with (
+        patch("regybox.regybox.get_classes", return_value=[mock_class]) as mock_get_classes,
+        patch("regybox.regybox.pick_class", return_value=mock_class),
+    ):
+        main(
+            class_date="2026-03-10",
+            class_time="06:30",
+            class_type="WOD Rato",
+            check_calendar=False,
+            operation_options=OperationOptions(credentials=credentials),
+        )
+
+    assert mock_get_classes.call_args.kwargs["credentials"] is credentials
+    mock_class.enroll.assert_called_once_with(credentials=credentials)
+
+
 def test_main_attempts_to_enroll_when_class_full_with_waitlist(
     caplog: pytest.LogCaptureFixture,
 ) -> None:
@@ -198,6 +294,96 @@ def test_main_raises_overbooked_when_class_and_waitlist_full() -> None:
     mock_class.enroll.assert_not_called()
 
 
+@pytest.mark.parametrize("is_open", [True, False])
+def test_main_watches_overbooked_class_when_requested(*, is_open: bool) -> None:
+    mock_class: MagicMock = MagicMock(
+        start="06:30", is_open=is_open, is_full=True, is_overbooked=True, user_is_enrolled=False
+    )
+    mock_class.name = "WOD Rato"
+    with (
+        patch("regybox.regybox.get_classes", return_value=[mock_class]),
+        patch("regybox.regybox.pick_class", return_value=mock_class),
+        patch("regybox.regybox.watch_class", return_value=True) as watch_class,
+    ):
+        result = main(
+            class_date="2026-03-10",
+            class_time="06:30",
+            class_type="WOD Rato",
+            check_calendar=False,
+            timeout=60,
+            operation_options=OperationOptions(watch_waitlist=True, watch_budget=5),
+        )
+
+    watch_class.assert_called_once_with(
+        class_date="2026-03-10",
+        class_time="06:30",
+        class_type="WOD Rato",
+        credentials=None,
+        budget=5,
+    )
+    mock_class.enroll.assert_not_called()
+    assert result == OperationResult(operation="enroll", status="success", class_type="WOD Rato")
+
+
+def test_main_raises_overbooked_when_watch_finds_no_spot() -> None:
+    mock_class: MagicMock = MagicMock(
+        start="06:30", is_open=True, is_full=True, is_overbooked=True, user_is_enrolled=False
+    )
+    mock_class.name = "WOD Rato"
+    with (
+        patch("regybox.regybox.get_classes", return_value=[mock_class]),
+        patch("regybox.regybox.pick_class", return_value=mock_class),
+        patch("regybox.regybox.watch_class", return_value=False),
+        pytest.raises(ClassIsOverbookedError),
+    ):
+        main(
+            class_date="2026-03-10",
+            class_time="06:30",
+            class_type="WOD Rato",
+            check_calendar=False,
+            timeout=60,
+            operation_options=OperationOptions(watch_waitlist=True),
+        )
+
+
+@pytest.mark.parametrize(
+    ("user_is_enrolled", "status"),
+    [(False, "success"), (True, "noop")],
+)
+def test_main_watches_waitlist_when_requested(*, user_is_enrolled: bool, status: str) -> None:
+    mock_class: MagicMock = MagicMock(
+        start="06:30",
+        is_open=True,
+        is_full=True,
+        is_overbooked=False,
+        user_is_enrolled=user_is_enrolled,
+        user_is_waitlisted=user_is_enrolled,
+    )
+    mock_class.name = "WOD Rato"
+
+    def enroll(**_: object) -> str:
+        mock_class.user_is_waitlisted = True
+        return "Lista de espera"
+
+    mock_class.enroll.side_effect = enroll
+    with (
+        patch("regybox.regybox.get_classes", return_value=[mock_class]),
+        patch("regybox.regybox.pick_class", return_value=mock_class),
+        patch("regybox.regybox.watch_class", return_value=False) as watch_class,
+    ):
+        result = main(
+            class_date="2026-03-10",
+            class_time="06:30",
+            class_type="WOD Rato",
+            check_calendar=False,
+            timeout=60,
+            operation_options=OperationOptions(watch_waitlist=True),
+        )
+
+    watch_class.assert_called_once()
+    assert result.status == status
+
+
 def test_main_raises_overbooked_when_closed_class_and_waitlist_full(
     caplog: pytest.LogCaptureFixture,
 ) -> None:
@@ -333,6 +519,163 @@ def test_pick_first_class_rejects_empty_candidates() -> None:
         )
 
 
+def test_parse_class_slots() -> None:
+    assert parse_class_slots(" 7:30 WOD, 18:30 Open Gym ,, ") == (
+        ClassSlot("07:30", "WOD"),
+        ClassSlot("18:30", "Open Gym"),
+    )
+    with pytest.raises(ValueError, match="no class type"):
+        parse_class_slots("07:30")
+    with pytest.raises(ValueError, match="isoformat"):
+        parse_class_slots("7h30 WOD")
+
+
+def _candidate(
+    start: str, *, is_overbooked: bool = False, user_is_enrolled: bool = False
+) -> ClassSnapshot:
+    return ClassSnapshot(
+        name="WOD",
+        details="",
+        date="2026-03-10",
+        start=start,
+        end="",
+        max_capacity=15,
+        cur_capacity=15 if is_overbooked else 4,
+        is_open=True,
+        is_full=is_overbooked,
+        is_overbooked=is_overbooked,
+        user_is_enrolled=user_is_enrolled,
+    )
+
+
+def test_pick_first_class_falls_back_past_overbooked_slots(
+    caplog: pytest.LogCaptureFixture,
+) -> None:
+    classes: list[ClassSnapshot] = [
+        _candidate("06:30", is_overbooked=True),
+        _candidate("07:30", is_overbooked=True),
+        _candidate("18:30"),
+    ]
+
+    with caplog.at_level(logging.INFO):
+        picked: ClassSnapshot = pick_first_class(
+            classes,
+            class_time="06:30",
+            class_types=["WOD"],
+            class_date="2026-03-10",
+            fallback_slots=[ClassSlot("07:30", "WOD"), ClassSlot("18:30", "WOD")],
+        )
+
+    assert picked is classes[2]
+    assert "WOD at 06:30 is overbooked; falling back to WOD at 18:30" in caplog.text
+
+
+def test_pick_first_class_prefers_an_enrolled_fallback_slot() -> None:
+    classes: list[ClassSnapshot] = [
+        _candidate("06:30"),
+        _candidate("18:30", user_is_enrolled=True),
+    ]
+
+    picked: ClassSnapshot = pick_first_class(
+        classes,
+        class_time="06:30",
+        class_types=["WOD"],
+        class_date="2026-03-10",
+        fallback_slots=[ClassSlot("18:30", "WOD")],
+    )
+
+    assert picked is classes[1]
+
+
+def test_main_enrolls_in_a_fallback_slot_from_one_fetch() -> None:
+    overbooked: MagicMock = MagicMock(
+        start="06:30", date="2026-03-10", is_open=True, is_full=True, is_overbooked=True
+    )
+    overbooked.name = "WOD"
+    overbooked.user_is_enrolled = False
+    fallback: MagicMock = MagicMock(
+        start="18:30", date="2026-03-10", is_open=True, is_full=False, is_overbooked=False
+    )
+    fallback.name = "WOD"
+    fallback.user_is_enrolled = False
+    fallback.enroll.return_value = "Inscrito"
+    with patch(
+        "regybox.regybox.get_classes", return_value=[overbooked, fallback]
+    ) as mock_get_classes:
+        result = main(
+            class_date="2026-03-10",
+            class_time="06:30",
+            class_type="WOD",
+            check_calendar=False,
+            timeout=60,
+            operation_options=OperationOptions(fallback_slots=(ClassSlot("18:30", "WOD"),)),
+        )
+
+    mock_get_classes.assert_called_once_with(2026, 3, 10, class_types=["WOD"], credentials=None)
+    overbooked.enroll.assert_not_called()
+    fallback.enroll.assert_called_once()
+    assert result == OperationResult(operation="enroll", status="success", class_type="WOD")
+
+
+def _day_class(
+    start: str, *, is_open: bool = True, time_to_enroll: int | None = None
+) -> MagicMock:
+    class_: MagicMock = MagicMock(
+        start=start,
+        date="2026-03-10",
+        is_open=is_open,
+        is_full=False,
+        is_overbooked=False,
+        enrollment_deadline_expired=False,
+        user_is_enrolled=False,
+        time_to_enroll=time_to_enroll,
+    )
+    class_.name = "WOD"
+    class_.enroll.return_value = "Inscrito"
+    return class_
+
+
+def test_enroll_many_polls_the_date_once_for_every_class() -> None:
+    early: MagicMock = _day_class("06:30")
+    late_closed: MagicMock = _day_class("18:30", is_open=False, time_to_enroll=90)
+    late_open: MagicMock = _day_class("18:30")
+    with (
+        patch(
+            "regybox.regybox.get_classes",
+            side_effect=[[early, late_closed], [early, late_open]],
+        ) as mock_get_classes,
+        patch("regybox.regybox.time.sleep") as sleep_mock,
+    ):
+        outcomes = enroll_many(
+            [ClassSlot("06:30", "WOD"), ClassSlot("18:30", "WOD"), ClassSlot("20:00", "WOD")],
+            class_date="2026-03-10",
+            check_calendar=False,
+            timeout=900,
+        )
+
+    assert outcomes[:2] == [OperationResult("enroll", "success", "WOD")] * 2
+    assert isinstance(outcomes[2], ClassNotFoundError)
+    assert mock_get_classes.call_count == 2
+    mock_get_classes.assert_called_with(2026, 3, 10, credentials=None)
+    sleep_mock.assert_called_once_with(90 - VERIFY_LEAD)
+    early.enroll.assert_called_once_with(credentials=None)
+    late_closed.enroll.assert_not_called()
+    late_open.enroll.assert_called_once_with(credentials=None)
+
+
+def test_enroll_many_fails_every_class_when_the_fetch_fails() -> None:
+    error = NoClassesFoundError(class_date="2026-03-10")
+    with patch("regybox.regybox.get_classes", side_effect=error):
+        outcomes = enroll_many(
+            [ClassSlot("06:30", "WOD"), ClassSlot("", "")],
+            class_date="2026-03-10",
+            check_calendar=False,
+        )
+
+    assert outcomes[0] is error
+    assert isinstance(outcomes[1], ValueError)
+
+
 def test_main_rejects_empty_class_type() -> None:
     with pytest.raises(ValueError, match="class_type"):
         main(
@@ -489,8 +832,8 @@ def test_main_retries_not_open_noop_when_enrollment_opens_within_timeout(
         )
 
     assert result == OperationResult(operation="enroll", status="success", class_type="WOD Rato")
-    sleep_mock.assert_called_once_with(60)
-    open_class.enroll.assert_called_once_with()
+    sleep_mock.assert_called_once_with(90 - VERIFY_LEAD)
+    open_class.enroll.assert_called_once_with(credentials=None)
     structured_messages = [
         record.getMessage()
         for record in caplog.records
@@ -572,7 +915,8 @@ def test_main_unenrolls_when_enrolled(caplog: pytest.LogCaptureFixture) -> None:
     with (
         caplog.at_level(logging.INFO),
         patch("regybox.regybox.check_cal"),
-        patch("regybox.regybox.get_classes", return_value=[mock_class]),
+        patch("regybox.regybox.get_classes", return_value=[mock_class]) as get_classes,
+        patch("regybox.regybox.get_cached_classes") as get_cached_classes,
         patch("regybox.regybox.pick_class", return_value=mock_class),
     ):
         result = main(
@@ -584,6 +928,8 @@ def test_main_unenrolls_when_enrolled(caplog: pytest.LogCaptureFixture) -> None:
         )
 
     mock_class.unenroll.assert_called_once()
+    get_classes.assert_called_once()
+    get_cached_classes.assert_not_called()
     assert result == OperationResult(operation="unenroll", status="success", class_type="WOD Rato")
     assert "Attempting to unenroll from WOD Rato on 2026-03-10 at 06:30" in caplog.text
 
@@ -749,6 +1095,57 @@ def test_main_calls_check_cal_with_whitespace_event_name_uses_default() -> None:
     assert mock_check_cal.call_args[1]["event_name"] == "CrossFit"
 
 
+def test_main_checks_calendar_while_fetching_classes() -> None:
+    mock_class: MagicMock = MagicMock(is_open=True)
+    fetched = threading.Event()
+    fetched_during_check: list[bool] = []
+
+    def check_cal(**_: object) -> bool:
+        fetched_during_check.append(fetched.wait(timeout=5))
+        return True
+
+    def get_classes(*_: object, **__: object) -> list[MagicMock]:
+        fetched.set()
+        return [mock_class]
+
+    with (
+        patch("regybox.regybox.check_cal", side_effect=check_cal),
+        patch("regybox.regybox.get_classes", side_effect=get_classes),
+        patch("regybox.regybox.pick_class", return_value=mock_class),
+    ):
+        main(class_date="2026-03-10", class_time="06:30", class_type="WOD Rato", timeout=60)
+
+    assert fetched_during_check == [True]
+    mock_class.enroll.assert_called_once()
+
+
+@pytest.mark.parametrize("get_classes_error", [None, NoClassesFoundError(class_date="2026-03-10")])
+def test_main_unplanned_class_gates_enrollment(
+    get_classes_error: NoClassesFoundError | None,
+) -> None:
+    mock_class: MagicMock = MagicMock(is_open=True)
+    with (
+        patch(
+            "regybox.regybox.check_cal",
+            side_effect=UnplannedClassError(
+                class_type="WOD Rato",
+                event_name="CrossFit",
+                class_isotime="2026-03-10T06:30:00",
+            ),
+        ),
+        patch(
+            "regybox.regybox.get_classes",
+            return_value=[mock_class],
+            side_effect=get_classes_error,
+        ),
+        patch("regybox.regybox.pick_class", return_value=mock_class),
+        pytest.raises(UnplannedClassError),
+    ):
+        main(class_date="2026-03-10", class_time="06:30", class_type="WOD Rato", timeout=60)
+
+    mock_class.enroll.assert_not_called()
+
+
 def test_main_waits_then_enrolls_when_class_opens_later(
     caplog: pytest.LogCaptureFixture,
 ) -> None:
@@ -778,3 +1175,418 @@ def test_main_waits_then_enrolls_when_class_opens_later(
         )
     open_class.enroll.assert_called_once()
     assert "Waiting for" in caplog.text or "Retrying" in caplog.text
+
+
+def test_main_warms_up_connection_before_fetch_close_to_opening() -> None:
+    closed_class: MagicMock = MagicMock()
+    closed_class.name = "WOD Rato"
+    closed_class.is_open = False
+    closed_class.enrollment_deadline_expired = False
+    closed_class.time_to_enroll = 20
+    open_class: MagicMock = MagicMock()
+    open_class.name = "WOD Rato"
+    open_class.is_open = True
+    open_class.user_is_enrolled = False
+    calls: list[str] = []
+
+    def warm_up(_credentials: RegyboxCredentials | None) -> None:
+        calls.append("warm_up")
+
+    def sleep(secs: float) -> None:
+        calls.append(f"sleep {secs}")
+
+    with (
+        patch("regybox.regybox.check_cal"),
+        patch("regybox.regybox.get_classes", return_value=[closed_class]),
+        patch("regybox.regybox.pick_class", side_effect=[closed_class, open_class]),
+        patch("regybox.regybox.warm_up_connection", side_effect=warm_up),
+        patch("regybox.regybox.time.sleep", side_effect=sleep),
+        patch("regybox.regybox.time.monotonic", side_effect=[0, 0, 100, 107.5, 110]),
+    ):
+        result = main(
+            class_date="2026-03-10",
+            class_time="06:30",
+            class_type="WOD Rato",
+            check_calendar=False,
+            timeout=900,
+        )
+
+    assert result == OperationResult(operation="enroll", status="success", class_type="WOD Rato")
+    assert calls == [f"sleep {FINAL_WINDOW - WARMUP_LEAD}", "warm_up", "sleep 2.5"]
+
+
+def test_main_skips_warm_up_when_next_fetch_is_far_from_opening() -> None:
+    closed_class: MagicMock = MagicMock()
+    closed_class.name = "WOD Rato"
+    closed_class.is_open = False
+    closed_class.enrollment_deadline_expired = False
+    closed_class.time_to_enroll = 300
+    open_class: MagicMock = MagicMock()
+    open_class.name = "WOD Rato"
+    open_class.is_open = True
+    open_class.user_is_enrolled = False
+    with (
+        patch("regybox.regybox.check_cal"),
+        patch("regybox.regybox.get_classes", return_value=[closed_class]),
+        patch("regybox.regybox.pick_class", side_effect=[closed_class, open_class]),
+        patch("regybox.regybox.warm_up_connection") as mock_warm_up,
+        patch("regybox.regybox.time.sleep") as mock_sleep,
+    ):
+        main(
+            class_date="2026-03-10",
+            class_time="06:30",
+            class_type="WOD Rato",
+            check_calendar=False,
+            timeout=900,
+        )
+
+    mock_warm_up.assert_not_called()
+    mock_sleep.assert_called_once_with(300 - VERIFY_LEAD)
+
+
+def test_main_sleeps_most_of_the_wait_in_one_stretch(caplog: pytest.LogCaptureFixture) -> None:
+    closed_classes: list[MagicMock] = []
+    for time_to_enroll in (1740, VERIFY_LEAD, FINAL_WINDOW, 1):
+        closed_class: MagicMock = MagicMock()
+        closed_class.name = "WOD Rato"
+        closed_class.is_open = False
+        closed_class.enrollment_deadline_expired = False
+        closed_class.time_to_enroll = time_to_enroll
+        closed_classes.append(closed_class)
+    open_class: MagicMock = MagicMock()
+    open_class.name = "WOD Rato"
+    open_class.is_open = True
+    open_class.user_is_enrolled = False
+    caplog.set_level(logging.INFO, logger=LOGGER.name)
+    with (
+        patch("regybox.regybox.check_cal"),
+        patch("regybox.regybox.get_classes", return_value=[]) as mock_get_classes,
+        patch("regybox.regybox.pick_class", side_effect=[*closed_classes, open_class]),
+        patch("regybox.regybox._sleep_before_fetch") as mock_sleep_before_fetch,
+    ):
+        result = main(
+            class_date="2026-03-10",
+            class_time="06:30",
+            class_type="WOD Rato",
+            check_calendar=False,
+            timeout=1800,
+        )
+
+    assert result == OperationResult(operation="enroll", status="success", class_type="WOD Rato")
+    assert [call.args[0] for call in mock_sleep_before_fetch.call_args_list] == [
+        1740 - VERIFY_LEAD,
+        VERIFY_LEAD - FINAL_WINDOW,
+        SHORT_WAIT,
+        SHORT_WAIT,
+    ]
+    assert mock_get_classes.call_count == 5
+    assert "Fetched classes 5 time(s) while waiting for enrollment" in caplog.messages
+
+
+def test_main_stops_waiting_when_fetch_budget_runs_out() -> None:
+    closed_class: MagicMock = MagicMock()
+    closed_class.name = "WOD Rato"
+    closed_class.is_open = False
+    closed_class.enrollment_deadline_expired = False
+    closed_class.time_to_enroll = 5
+    with (
+        patch("regybox.regybox.check_cal"),
+        patch("regybox.regybox.get_classes", return_value=[closed_class]) as mock_get_classes,
+        patch("regybox.regybox.pick_class", return_value=closed_class),
+        patch("regybox.regybox.time.sleep"),
+    ):
+        result = main(
+            class_date="2026-03-10",
+            class_time="06:30",
+            class_type="WOD Rato",
+            check_calendar=False,
+            timeout=60,
+            operation_options=OperationOptions(not_open_is_noop=True, max_fetches=2),
+        )
+
+    assert result == OperationResult(operation="enroll", status="noop", class_type="WOD Rato")
+    assert mock_get_classes.call_count == 2
+
+
+def test_main_fire_at_open_sleeps_until_opening_and_polls_only_the_slot() -> None:
+    closed_class: MagicMock = MagicMock()
+    closed_class.name = "WOD Rato"
+    closed_class.is_open = False
+    closed_class.enrollment_deadline_expired = False
+    closed_class.time_to_enroll = 2
+    still_closed_class: MagicMock = MagicMock()
+    still_closed_class.name = "WOD Rato"
+    still_closed_class.is_open = False
+    still_closed_class.user_is_enrolled = False
+    still_closed_class.is_overbooked = False
+    open_class: MagicMock = MagicMock()
+    open_class.name = "WOD Rato"
+    open_class.is_open = True
+    open_class.user_is_enrolled = False
+    with (
+        patch("regybox.regybox.check_cal"),
+        patch("regybox.regybox.get_classes", return_value=[closed_class]) as mock_get_classes,
+        patch(
+            "regybox.regybox.get_slot_classes",
+            side_effect=[[], [still_closed_class], [open_class]],
+        ) as mock_get_slot_classes,
+        patch(
+            "regybox.regybox.pick_class",
+            side_effect=[
+                closed_class,
+                ClassNotFoundError(
+                    class_type="WOD Rato", class_time="06:30", class_date="2026-03-10"
+                ),
+                still_closed_class,
+                open_class,
+            ],
+        ),
+        patch("regybox.regybox.time.sleep") as mock_sleep,
+    ):
+        result = main(
+            class_date="2026-03-10",
+            class_time="06:30",
+            class_type="WOD Rato",
+            check_calendar=False,
+            timeout=60,
+            operation_options=OperationOptions(fire_at_open=True),
+        )
+
+    assert result == OperationResult(operation="enroll", status="success", class_type="WOD Rato")
+    mock_get_classes.assert_called_once()
+    assert mock_get_slot_classes.call_count == 3
+    mock_get_slot_classes.assert_called_with(
+        2026, 3, 10, start="06:30", class_types=["WOD Rato"], credentials=None
+    )
+    assert [call.args[0] for call in mock_sleep.call_args_list] == [
+        2,
+        FIRE_AT_OPEN_POLL_INTERVAL,
+        FIRE_AT_OPEN_POLL_INTERVAL,
+    ]
+    open_class.enroll.assert_called_once_with(credentials=None)
+
+
+def test_main_fire_at_open_resumes_polling_when_class_does_not_open() -> None:
+    closed_class: MagicMock = MagicMock()
+    closed_class.name = "WOD Rato"
+    closed_class.is_open = False
+    closed_class.enrollment_deadline_expired = False
+    closed_class.time_to_enroll = 1
+    closed_class.start = "06:30"
+    closed_class.date = "2026-03-10"
+    open_class: MagicMock = MagicMock()
+    open_class.name = "WOD Rato"
+    open_class.is_open = True
+    open_class.user_is_enrolled = False
+    open_class.start = "06:30"
+    open_class.date = "2026-03-10"
+    with (
+        patch("regybox.regybox.check_cal"),
+        patch("regybox.regybox.get_classes", side_effect=[[closed_class], [open_class]]),
+        patch("regybox.regybox.get_slot_classes", return_value=[]) as mock_get_slot_classes,
+        patch("regybox.regybox.time.sleep"),
+    ):
+        result = main(
+            class_date="2026-03-10",
+            class_time="06:30",
+            class_type="WOD Rato",
+            check_calendar=False,
+            timeout=60,
+            operation_options=OperationOptions(fire_at_open=True),
+        )
+
+    assert result == OperationResult(operation="enroll", status="success", class_type="WOD Rato")
+    assert mock_get_slot_classes.call_count == FIRE_AT_OPEN_MAX_POLLS
+    open_class.enroll.assert_called_once_with(credentials=None)
+
+
+def test_main_fire_at_open_skips_polls_that_miss_their_deadline() -> None:
+    closed_class: MagicMock = MagicMock()
+    closed_class.name = "WOD Rato"
+    closed_class.is_open = False
+    closed_class.enrollment_deadline_expired = False
+    closed_class.time_to_enroll = 1
+    open_class: MagicMock = MagicMock()
+    open_class.name = "WOD Rato"
+    open_class.is_open = True
+    open_class.user_is_enrolled = False
+    poll_budgets: list[float | None] = []
+    enroll_budgets: list[float | None] = []
+
+    def poll(*_: object, **__: object) -> list[MagicMock]:
+        poll_budgets.append(remaining_seconds())
+        if len(poll_budgets) == 1:
+            raise DeadlineExceededError(0)
+        return [open_class]
+
+    def enroll(**_: object) -> str:
+        enroll_budgets.append(remaining_seconds())
+        return "Inscrito com sucesso"
+
+    open_class.enroll.side_effect = enroll
+    with (
+        patch("regybox.regybox.check_cal"),
+        patch("regybox.regybox.get_classes", return_value=[closed_class]),
+        patch("regybox.regybox.get_slot_classes", side_effect=poll),
+        patch("regybox.regybox.pick_class", side_effect=[closed_class, open_class]),
+        patch("regybox.regybox.time.sleep"),
+    ):
+        result = main(
+            class_date="2026-03-10",
+            class_time="06:30",
+            class_type="WOD Rato",
+            check_calendar=False,
+            timeout=60,
+            operation_options=OperationOptions(fire_at_open=True),
+        )
+
+    assert result == OperationResult(operation="enroll", status="success", class_type="WOD Rato")
+    assert len(poll_budgets) == 2
+    assert all(
+        budget is not None and 0 < budget <= FIRE_AT_OPEN_POLL_DEADLINE for budget in poll_budgets
+    )
+    assert len(enroll_budgets) == 1
+    assert enroll_budgets[0] is not None
+    assert 0 < enroll_budgets[0] <= ENROLL_DEADLINE
+
+
+def test_main_hedges_only_class_fetches_close_to_opening() -> None:
+    closed_class: MagicMock = MagicMock()
+    closed_class.name = "WOD Rato"
+    closed_class.is_open = False
+    closed_class.enrollment_deadline_expired = False
+    closed_class.time_to_enroll = VERIFY_LEAD + 30
+    soon_class: MagicMock = MagicMock()
+    soon_class.name = "WOD Rato"
+    soon_class.is_open = False
+    soon_class.enrollment_deadline_expired = False
+    soon_class.time_to_enroll = 5
+    open_class: MagicMock = MagicMock()
+    open_class.name = "WOD Rato"
+    open_class.is_open = True
+    open_class.user_is_enrolled = False
+    fetch_delays: list[float | None] = []
+    enroll_delays: list[float | None] = []
+
+    def fetch(*_: object, **__: object) -> list[MagicMock]:
+        fetch_delays.append(hedge_delay())
+        return []
+
+    def enroll(**_: object) -> str:
+        enroll_delays.append(hedge_delay())
+        return "Inscrito com sucesso"
+
+    open_class.enroll.side_effect = enroll
+    with (
+        patch("regybox.regybox.check_cal"),
+        patch("regybox.regybox.get_classes", side_effect=fetch),
+        patch("regybox.regybox.pick_class", side_effect=[closed_class, soon_class, open_class]),
+        patch("regybox.regybox.time.sleep"),
+        patch("regybox.regybox.warm_up_connection"),
+    ):
+        result = main(
+            class_date="2026-03-10",
+            class_time="06:30",
+            class_type="WOD Rato",
+            check_calendar=False,
+            timeout=600,
+            operation_options=OperationOptions(hedge_requests=True),
+        )
+
+    assert result == OperationResult(operation="enroll", status="success", class_type="WOD Rato")
+    assert fetch_delays[0] is None
+    assert fetch_delays[1] is None
+    assert fetch_delays[2] is not None
+    assert enroll_delays == [None]
+
+
+def test_main_times_out_when_class_fetch_misses_the_deadline() -> None:
+    with (
+        patch("regybox.regybox.check_cal"),
+        patch("regybox.regybox.get_classes", side_effect=DeadlineExceededError(0)),
+        pytest.raises(RegyboxTimeoutError),
+    ):
+        main(
+            class_date="2026-03-10",
+            class_time="06:30",
+            class_type="WOD Rato",
+            check_calendar=False,
+            timeout=60,
+        )
+
+
+def test_seconds_until_open_uses_the_sample_of_the_page() -> None:
+    clock: MagicMock = MagicMock()
+    clock.last_sample = ClockSample(server_time=2000, sent_at=1999.6, received_at=1999.8)
+    clock.estimate.return_value = ClockOffset(offset=0.7, error=0.1, samples=3)
+    clock.seconds_until.return_value = 4.2
+    with patch("regybox.regybox.ServerClock", return_value=clock):
+        wait = _seconds_until_open(
+            5, clock_sample=ClockSample(server_time=1000, sent_at=999.6, received_at=999.8)
+        )
+
+    assert wait == pytest.approx(4.2)
+    clock.seconds_until.assert_called_once_with(1005)
+
+
+def test_seconds_until_open_without_a_sample_of_the_page() -> None:
+    clock: MagicMock = MagicMock()
+    clock.estimate.return_value = ClockOffset(offset=0.7, error=0.1, samples=3)
+    with patch("regybox.regybox.ServerClock", return_value=clock):
+        assert _seconds_until_open(5, clock_sample=None) == pytest.approx(5)
+
+    clock.seconds_until.assert_not_called()
+
+
+def test_main_fire_at_open_counts_slot_fetches_against_budget() -> None:
+    closed_class: MagicMock = MagicMock()
+    closed_class.name = "WOD Rato"
+    closed_class.is_open = False
+    closed_class.enrollment_deadline_expired = False
+    closed_class.time_to_enroll = 1
+    with (
+        patch("regybox.regybox.check_cal"),
+        patch("regybox.regybox.get_classes", return_value=[closed_class]) as mock_get_classes,
+        patch("regybox.regybox.get_slot_classes", return_value=[]) as mock_get_slot_classes,
+        patch("regybox.regybox.pick_class", return_value=closed_class),
+        patch("regybox.regybox.time.sleep"),
+        pytest.raises(RegyboxTimeoutError),
+    ):
+        main(
+            class_date="2026-03-10",
+            class_time="06:30",
+            class_type="WOD Rato",
+            check_calendar=False,
+            timeout=60,
+            operation_options=OperationOptions(fire_at_open=True, max_fetches=3),
+        )
+
+    mock_get_classes.assert_called_once()
+    assert mock_get_slot_classes.call_count == 2
+
+
+def test_main_fire_at_open_predicts_the_opening_from_the_polled_page() -> None:
+    page_sample = ClockSample(server_time=1000, sent_at=999.6, received_at=999.8)
+    closed_class: MagicMock = MagicMock(clock_sample=page_sample)
+    closed_class.name = "WOD Rato"
+    closed_class.is_open = False
+    closed_class.enrollment_deadline_expired = False
+    closed_class.time_to_enroll = 1
+    with (
+        patch("regybox.regybox.get_classes", return_value=[closed_class]),
+        patch("regybox.regybox.get_slot_classes", return_value=[]),
+        patch("regybox.regybox.pick_class", return_value=closed_class),
+        patch("regybox.regybox.time.sleep"),
+        patch("regybox.regybox._seconds_until_open", return_value=0.5) as seconds_until_open,
+        pytest.raises(RegyboxTimeoutError),
+    ):
+        main(
+            class_date="2026-03-10",
+            class_time="06:30",
+            class_type="WOD Rato",
+            check_calendar=False,
+            timeout=60,
+            operation_options=OperationOptions(fire_at_open=True, max_fetches=2),
+        )
+
+    seconds_until_open.assert_called_once_with(1, clock_sample=page_sample)
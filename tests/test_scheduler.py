@@ -0,0 +1,216 @@
+"""Tests for the scheduler module."""
+
+import datetime
+import json
+import threading
+from collections.abc import Iterator
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from regybox.batch import BatchResult, BatchTarget
+from regybox.classes import ClassSnapshot
+from regybox.common import TIMEZONE
+from regybox.exceptions import ClassNotFoundError
+from regybox.regybox import OperationResult
+from regybox.scheduler import ScheduledJob, Scheduler, serve
+
+NOW: float = datetime.datetime(2026, 3, 7, 18, 0, tzinfo=TIMEZONE).timestamp()
+TARGET = BatchTarget("2026-03-10", "06:30", "WOD Rato")
+
+
+@pytest.fixture(name="scheduler")
+def fixture_scheduler(tmp_path: Path) -> Iterator[Scheduler]:
+    with patch("regybox.scheduler.time.time", return_value=NOW):
+        scheduler = Scheduler(state_path=tmp_path / "schedule.json")
+        yield scheduler
+        scheduler.close()
+
+
+def _snapshot(*, time_to_enroll: int | None, is_open: bool = False) -> ClassSnapshot:
+    return ClassSnapshot(
+        name="WOD Rato",
+        details="",
+        date="2026-03-10",
+        start="06:30",
+        end="07:30",
+        max_capacity=20,
+        cur_capacity=0,
+        is_open=is_open,
+        time_to_enroll=time_to_enroll,
+    )
+
+
+def _job(scheduler: Scheduler) -> ScheduledJob:
+    (job,) = scheduler.jobs
+    return job
+
+
+def test_add_skips_known_and_started_classes(scheduler: Scheduler) -> None:
+    started = BatchTarget("2026-03-07", "06:30", "WOD Rato")
+
+    assert scheduler.add([TARGET, started]) == 1
+    assert scheduler.add([TARGET]) == 0
+    assert _job(scheduler) == ScheduledJob(target=TARGET, wake_at=NOW)
+
+
+def test_probe_schedules_the_job_before_the_opening(scheduler: Scheduler) -> None:
+    scheduler.add([TARGET])
+
+    with (
+        patch("regybox.scheduler.get_classes", return_value=[_snapshot(time_to_enroll=3600)]),
+        patch("regybox.scheduler.run_target") as run_target,
+    ):
+        scheduler._handle(_job(scheduler))
+
+    run_target.assert_not_called()
+    assert _job(scheduler) == ScheduledJob(
+        target=TARGET, opens_at=NOW + 3600, wake_at=NOW + 3600 - scheduler.wake_lead
+    )
+
+
+@pytest.mark.parametrize(
+    "side_effect",
+    [
+        [[_snapshot(time_to_enroll=None)]],
+        ClassNotFoundError(class_type="WOD Rato", class_time="06:30", class_date="2026-03-10"),
+    ],
+)
+def test_probe_retries_later_without_a_countdown(
+    scheduler: Scheduler, side_effect: object
+) -> None:
+    scheduler.add([TARGET])
+
+    with (
+        patch("regybox.scheduler.get_classes", side_effect=side_effect),
+        patch("regybox.scheduler.run_target") as run_target,
+    ):
+        scheduler._handle(_job(scheduler))
+
+    run_target.assert_not_called()
+    assert _job(scheduler).wake_at == NOW + scheduler.probe_interval
+    assert _job(scheduler).opens_at is None
+
+
+def test_job_runs_with_a_warm_session_close_to_the_opening(scheduler: Scheduler) -> None:
+    scheduler.add([TARGET])
+    result = BatchResult(TARGET, OperationResult("enroll", "success", "WOD Rato"))
+
+    with (
+        patch("regybox.scheduler.get_classes", return_value=[_snapshot(time_to_enroll=60)]),
+        patch("regybox.scheduler.Calendar") as calendar,
+        patch("regybox.scheduler.warm_up_connection") as warm_up,
+        patch("regybox.scheduler.run_target", return_value=result) as run_target,
+    ):
+        scheduler._handle(_job(scheduler))
+
+    calendar.return_value.refresh.assert_called_once_with()
+    warm_up.assert_called_once_with(None)
+    run_target.assert_called_once()
+    assert _job(scheduler).status == "done"
+
+
+def test_job_fails_on_an_unexpected_error(
+    tmp_path: Path, scheduler: Scheduler, caplog: pytest.LogCaptureFixture
+) -> None:
+    scheduler.add([TARGET])
+
+    with (
+        patch("regybox.scheduler.get_classes", return_value=[_snapshot(time_to_enroll=60)]),
+        patch("regybox.scheduler.Calendar"),
+        patch("regybox.scheduler.warm_up_connection", side_effect=RuntimeError("boom")),
+        patch("regybox.scheduler.run_target") as run_target,
+    ):
+        scheduler._handle(_job(scheduler))
+
+    run_target.assert_not_called()
+    assert _job(scheduler).status == "failed"
+    assert f"{_job(scheduler).key} failed unexpectedly" in caplog.text
+    assert "RuntimeError: boom" in caplog.text
+    state = json.loads((tmp_path / "schedule.json").read_text(encoding="utf-8"))
+    assert [job["status"] for job in state["jobs"]] == ["failed"]
+    assert not scheduler._running
+
+
+def test_job_of_a_started_class_expires(scheduler: Scheduler) -> None:
+    scheduler.add([TARGET])
+
+    with (
+        patch("regybox.scheduler.time.time", return_value=_job(scheduler).starts_at),
+        patch("regybox.scheduler.run_target") as run_target,
+    ):
+        scheduler._handle(_job(scheduler))
+
+    run_target.assert_not_called()
+    assert _job(scheduler).status == "expired"
+
+
+def test_run_pending_starts_due_jobs_only(scheduler: Scheduler) -> None:
+    later = BatchTarget("2026-03-11", "06:30", "WOD Rato")
+    scheduler.add([TARGET, later])
+    for job in scheduler.jobs:
+        if job.target == later:
+            scheduler._reschedule(job, wake_at=NOW + 600)
+    handled: list[BatchTarget] = []
+
+    def handle(_: Scheduler, job: ScheduledJob) -> None:
+        handled.append(job.target)
+
+    with (
+        patch("regybox.scheduler.time.time", return_value=NOW),
+        patch.object(Scheduler, "_handle", handle),
+    ):
+        assert scheduler.run_pending() == 600
+        scheduler.close()
+
+    assert handled == [TARGET]
+
+
+def test_pending_jobs_survive_a_restart(tmp_path: Path, scheduler: Scheduler) -> None:
+    scheduler.add([TARGET])
+    pending: ScheduledJob = _job(scheduler)
+    scheduler._reschedule(pending, wake_at=NOW + 60, opens_at=NOW + 180)
+    done = BatchTarget("2026-03-11", "06:30", "WOD Rato")
+    scheduler.add([done])
+    for job in scheduler.jobs:
+        if job.target == done:
+            scheduler._finish(job, "done")
+
+    with patch("regybox.scheduler.time.time", return_value=NOW):
+        restarted = Scheduler(state_path=tmp_path / "schedule.json")
+        assert restarted.add([TARGET, done]) == 0
+    restarted.close()
+
+    assert restarted.jobs == scheduler.jobs
+    assert restarted._queue == [(NOW + 60, pending.key)]
+    state = json.loads((tmp_path / "schedule.json").read_text(encoding="utf-8"))
+    assert state["version"] == 1
+
+
+def test_corrupt_state_file_is_ignored(tmp_path: Path) -> None:
+    (tmp_path / "schedule.json").write_text("{not json", encoding="utf-8")
+
+    scheduler = Scheduler(state_path=tmp_path / "schedule.json")
+    scheduler.close()
+
+    assert scheduler.jobs == []
+
+
+def test_serve_adds_the_targets_file_until_stopped(tmp_path: Path) -> None:
+    targets_file = tmp_path / "targets.txt"
+    targets_file.write_text("2026-03-10 06:30 WOD Rato\n", encoding="utf-8")
+    stop = threading.Event()
+    scheduler = Scheduler(state_path=None)
+
+    def run_pending() -> float:
+        stop.set()
+        return 0.0
+
+    with (
+        patch("regybox.scheduler.time.time", return_value=NOW),
+        patch.object(scheduler, "run_pending", side_effect=run_pending),
+    ):
+        serve(targets_file, scheduler, stop=stop)
+
+    assert [job.target for job in scheduler.jobs] == [TARGET]
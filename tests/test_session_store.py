@@ -0,0 +1,102 @@
+"""Tests for the session_store module."""
+
+import json
+import logging
+import stat
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from regybox.session_store import (
+    SESSION_STORE_VERSION,
+    SessionStore,
+    StoredCookie,
+    StoredSession,
+    get_session_store,
+)
+
+COOKIE = StoredCookie(name="PHPSESSID", value="abc", domain="www.regybox.pt", path="/")
+
+
+def test_save_and_load_round_trip(tmp_path: Path) -> None:
+    store = SessionStore(tmp_path / "regybox" / "sessions.json")
+    session = StoredSession(cookies=[COOKIE], validated_at=1000.0)
+
+    with patch("regybox.session_store.time.time", return_value=1060.0):
+        store.save("user:key", session)
+        assert store.load("user:key") == session
+        assert store.load("other:key") is None
+
+    assert stat.S_IMODE(store.path.stat().st_mode) == 0o600
+    assert not list(store.path.parent.glob("*.tmp"))
+
+
+def test_load_ignores_expired_sessions(tmp_path: Path) -> None:
+    store = SessionStore(tmp_path / "sessions.json", max_age=60)
+    store.save("user:key", StoredSession(cookies=[COOKIE], validated_at=1000.0))
+
+    with patch("regybox.session_store.time.time", return_value=1061.0):
+        assert store.load("user:key") is None
+
+
+def test_discard_removes_only_the_given_session(tmp_path: Path) -> None:
+    store = SessionStore(tmp_path / "sessions.json", max_age=float("inf"))
+    session = StoredSession(cookies=[COOKIE], validated_at=1000.0)
+    store.save("user:key", session)
+    store.save("other:key", session)
+
+    store.discard("user:key")
+    store.discard("missing:key")
+
+    assert store.load("user:key") is None
+    assert store.load("other:key") == session
+
+
+@pytest.mark.parametrize(
+    "content",
+    [
+        "not json",
+        json.dumps([]),
+        json.dumps({"version": SESSION_STORE_VERSION + 1, "sessions": {}}),
+        json.dumps({"version": SESSION_STORE_VERSION, "sessions": []}),
+        json.dumps({
+            "version": SESSION_STORE_VERSION,
+            "sessions": {"user:key": {"cookies": [{"name": "PHPSESSID"}], "validated_at": 1}},
+        }),
+        json.dumps({
+            "version": SESSION_STORE_VERSION,
+            "sessions": {"user:key": {"cookies": ["PHPSESSID"], "validated_at": 1}},
+        }),
+        json.dumps({"version": SESSION_STORE_VERSION, "sessions": {"user:key": {"cookies": []}}}),
+        json.dumps({"version": SESSION_STORE_VERSION, "sessions": {"user:key": []}}),
+    ],
+)
+def test_load_treats_invalid_stores_as_empty(tmp_path: Path, content: str) -> None:
+    path = tmp_path / "sessions.json"
+    path.write_text(content, encoding="utf-8")
+
+    assert SessionStore(path, max_age=float("inf")).load("user:key") is None
+
+
+def test_write_failures_are_logged_and_ignored(
+    tmp_path: Path, caplog: pytest.LogCaptureFixture
+) -> None:
+    blocker = tmp_path / "blocker"
+    blocker.write_text("", encoding="utf-8")
+    store = SessionStore(blocker / "sessions.json")
+
+    with caplog.at_level(logging.WARNING):
+        store.save("user:key", StoredSession(cookies=[COOKIE], validated_at=1000.0))
+
+    assert "Unable to write session store" in caplog.text
+    assert store.load("user:key") is None
+
+
+def test_get_session_store_is_disabled_by_an_empty_path(tmp_path: Path) -> None:
+    with patch("regybox.session_store.SESSION_STORE", ""):
+        assert get_session_store() is None
+    with patch("regybox.session_store.SESSION_STORE", str(tmp_path / "sessions.json")):
+        store = get_session_store()
+    assert store is not None
+    assert store.path == tmp_path / "sessions.json"
@@ -0,0 +1,130 @@
+"""Tests for the singleflight module."""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+import pytest
+
+from regybox.deadline import deadline
+from regybox.exceptions import DeadlineExceededError
+from regybox.singleflight import SingleFlight
+
+
+def _share_slow_call(flights: SingleFlight[str, int], *, callers: int) -> tuple[list[int], int]:
+    followers_waiting = threading.Semaphore(0)
+    calls: list[int] = []
+
+    def follower_waits() -> None:
+        followers_waiting.release()
+
+    def call() -> int:
+        calls.append(1)
+        for _ in range(callers - 1):
+            followers_waiting.acquire(timeout=5)
+        return len(calls)
+
+    with (
+        patch("regybox.singleflight.remaining_seconds", side_effect=follower_waits),
+        ThreadPoolExecutor(max_workers=callers) as executor,
+    ):
+        futures = [executor.submit(flights.do, "day", call) for _ in range(callers)]
+        results: list[int] = [future.result() for future in futures]
+    return results, len(calls)
+
+
+def test_concurrent_calls_share_one_call() -> None:
+    results, calls = _share_slow_call(SingleFlight(), callers=4)
+
+    assert calls == 1
+    assert results == [1, 1, 1, 1]
+
+
+def test_finished_calls_are_not_reused_without_freshness_window() -> None:
+    flights: SingleFlight[str, int] = SingleFlight()
+
+    assert flights.do("day", lambda: 1) == 1
+    assert flights.do("day", lambda: 2) == 2
+    assert flights.do("other", lambda: 3) == 3
+
+
+def test_results_are_reused_within_the_freshness_window() -> None:
+    flights: SingleFlight[str, int] = SingleFlight(fresh_for=1.0)
+
+    with patch("regybox.singleflight.monotonic", return_value=100.0) as monotonic:
+        assert flights.do("day", lambda: 1) == 1
+        monotonic.return_value = 100.9
+        assert flights.do("day", lambda: 2) == 1
+        assert flights.do("other", lambda: 3) == 3
+        monotonic.return_value = 101.5
+        assert flights.do("day", lambda: 4) == 4
+        flights.forget("day")
+        assert flights.do("day", lambda: 5) == 5
+
+
+def test_calls_can_extend_the_freshness_window() -> None:
+    flights: SingleFlight[str, int] = SingleFlight()
+
+    with patch("regybox.singleflight.monotonic", return_value=100.0) as monotonic:
+        assert flights.do("day", lambda: 1, fresh_for=0.5) == 1
+        monotonic.return_value = 100.4
+        assert flights.do("day", lambda: 2, fresh_for=0.5) == 1
+        assert flights.do("day", lambda: 3) == 3
+
+
+def test_results_are_kept_for_the_window_of_their_call() -> None:
+    flights: SingleFlight[str, int] = SingleFlight()
+
+    with patch("regybox.singleflight.monotonic", return_value=100.0) as monotonic:
+        assert flights.do("day", lambda: 1, fresh_for=60.0) == 1
+        monotonic.return_value = 130.0
+        assert flights.do("other", lambda: 2) == 2
+        assert flights.do("day", lambda: 3, fresh_for=60.0) == 1
+        monotonic.return_value = 160.0
+        assert flights.do("other", lambda: 4) == 4
+
+    assert "day" not in flights._flights
+
+
+def test_errors_are_shared_with_waiting_calls_but_not_reused() -> None:
+    flights: SingleFlight[str, int] = SingleFlight(fresh_for=60)
+    started = threading.Event()
+    release = threading.Event()
+
+    def fail() -> int:
+        started.set()
+        release.wait(5)
+        raise ConnectionError("down")
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        leader = executor.submit(flights.do, "day", fail)
+        started.wait(5)
+        follower = executor.submit(flights.do, "day", lambda: 0)
+        release.set()
+        with pytest.raises(ConnectionError):
+            leader.result()
+        with pytest.raises(ConnectionError):
+            follower.result()
+
+    assert flights.do("day", lambda: 1) == 1
+
+
+def test_waiting_call_is_bounded_by_its_deadline() -> None:
+    flights: SingleFlight[str, int] = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+
+    def slow() -> int:
+        started.set()
+        release.wait(5)
+        return 1
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        leader = executor.submit(flights.do, "day", slow)
+        started.wait(5)
+        try:
+            with deadline(0.05), pytest.raises(DeadlineExceededError):
+                flights.do("day", lambda: 2)
+        finally:
+            release.set()
+        assert leader.result() == 1
@@ -0,0 +1,268 @@
+"""Tests for the transport module."""
+
+import gzip
+import threading
+from collections.abc import Callable, Iterator
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import override
+
+import httpx
+import pytest
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from regybox.connection import RegyboxCredentials, RegyboxSession, get_retry_policy
+from regybox.transport import (
+    Http2Adapter,
+    available_transports,
+    get_adapter,
+    get_http2_client,
+    get_transport,
+    over_http1,
+)
+
+CREDENTIALS = RegyboxCredentials(user="testuser", phpsessid="testsession")
+URL: str = "https://www.regybox.pt/app/app_nova/php/aulas/aulas.php"
+
+
+def _session(
+    handler: Callable[[httpx.Request], httpx.Response], *, max_retries: Retry | None = None
+) -> RegyboxSession:
+    session = RegyboxSession(CREDENTIALS)
+    client = httpx.Client(transport=httpx.MockTransport(handler))
+    session.mount("https://", Http2Adapter(client, max_retries=max_retries or get_retry_policy()))
+    return session
+
+
+def _no_h2(monkeypatch: pytest.MonkeyPatch) -> None:
+    def find_spec(_name: str) -> None:
+        return None
+
+    monkeypatch.setattr("regybox.transport.importlib.util.find_spec", find_spec)
+
+
+def test_default_transport_prefers_http2_when_installed(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr("regybox.transport.TRANSPORT", "")
+
+    assert get_transport() == available_transports()[0]
+    _no_h2(monkeypatch)
+    assert available_transports() == ["http1"]
+    assert get_transport() == "http1"
+
+
+def test_transport_can_be_selected_from_the_environment(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr("regybox.transport.TRANSPORT", "http1")
+
+    assert get_transport() == "http1"
+    assert isinstance(get_adapter(get_retry_policy()), HTTPAdapter)
+
+
+def test_unavailable_transport_raises(monkeypatch: pytest.MonkeyPatch) -> None:
+    _no_h2(monkeypatch)
+
+    with pytest.raises(ValueError, match="http2"):
+        get_transport("http2")
+    with pytest.raises(ValueError, match="spdy"):
+        get_transport("spdy")
+
+
+def test_http2_adapters_share_one_client() -> None:
+    if "http2" not in available_transports():
+        pytest.skip("h2 is not installed")
+
+    first = get_adapter(get_retry_policy(), "http2")
+    second = get_adapter(get_retry_policy(), "http2")
+
+    assert isinstance(first, Http2Adapter)
+    assert isinstance(second, Http2Adapter)
+    assert first.client is second.client is get_http2_client()
+    first.close()
+    assert not get_http2_client().is_closed
+
+
+def test_http2_adapter_sends_session_cookies_and_stores_new_ones() -> None:
+    requests_seen: list[httpx.Request] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests_seen.append(request)
+        return httpx.Response(
+            200,
+            headers=[("Set-Cookie", "PHPSESSID=refreshed; Path=/"), ("Set-Cookie", "a=b")],
+            text="ok",
+        )
+
+    session = _session(handler)
+    session.headers["Connection"] = "keep-alive"
+
+    res = session.get(URL, params={"z": "testuser"}, timeout=(1, 2))
+
+    assert res.status_code == 200
+    assert res.text == "ok"
+    sent = requests_seen[0]
+    assert sent.url.params["z"] == "testuser"
+    assert "PHPSESSID=testsession" in sent.headers["Cookie"]
+    assert "Connection" not in sent.headers
+    assert sent.extensions["timeout"] == {"connect": 1, "read": 2, "write": 2, "pool": 2}
+    assert session.cookies.get("PHPSESSID") == "testsession"
+    assert session.cookies.get("a") == "b"
+
+
+def test_http2_adapter_streams_decoded_body() -> None:
+    body: bytes = b"<div>" * 10_000
+
+    def handler(_request: httpx.Request) -> httpx.Response:
+        return httpx.Response(
+            200,
+            headers={"Content-Encoding": "gzip", "Content-Type": "text/html; charset=utf-8"},
+            content=gzip.compress(body),
+        )
+
+    res = _session(handler).get(URL, stream=True, timeout=5)
+
+    assert res.encoding == "utf-8"
+    chunks = list(res.iter_content(1024))
+    assert all(len(chunk) == 1024 for chunk in chunks[:-1])
+    assert b"".join(chunks) == body
+    res.close()
+
+
+def test_http2_adapter_retries_transient_statuses(monkeypatch: pytest.MonkeyPatch) -> None:
+    sleeps: list[float] = []
+    monkeypatch.setattr("regybox.transport.time.sleep", sleeps.append)
+    statuses: list[int] = [503, 429, 200]
+
+    def handler(_request: httpx.Request) -> httpx.Response:
+        status: int = statuses.pop(0)
+        headers: dict[str, str] = {"Retry-After": "2"} if status == 429 else {}
+        return httpx.Response(status, headers=headers, text=str(status))
+
+    res = _session(handler).get(URL)
+
+    assert res.status_code == 200
+    assert len(sleeps) == 2
+    assert sleeps[1] == 2
+
+
+def test_http2_adapter_raises_like_http1_once_status_retries_are_exhausted(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    sleeps: list[float] = []
+    monkeypatch.setattr("regybox.transport.time.sleep", sleeps.append)
+
+    def handler(_request: httpx.Request) -> httpx.Response:
+        return httpx.Response(503)
+
+    with pytest.raises(requests.exceptions.RetryError):
+        _session(handler).get(URL)
+    assert len(sleeps) == get_retry_policy().total
+
+
+def test_http2_adapter_returns_error_status_without_raise_on_status(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    sleeps: list[float] = []
+    monkeypatch.setattr("regybox.transport.time.sleep", sleeps.append)
+
+    def handler(_request: httpx.Request) -> httpx.Response:
+        return httpx.Response(503)
+
+    session = _session(handler, max_retries=get_retry_policy().new(raise_on_status=False))
+
+    assert session.get(URL).status_code == 503
+
+
+@pytest.mark.parametrize(
+    ("error", "expected"),
+    [
+        (httpx.ConnectError("refused"), requests.ConnectionError),
+        (httpx.ConnectTimeout("slow connect"), requests.ConnectTimeout),
+        (httpx.ReadTimeout("slow read"), requests.ReadTimeout),
+    ],
+)
+def test_http2_adapter_raises_requests_errors_after_retries(
+    monkeypatch: pytest.MonkeyPatch,
+    error: httpx.TransportError,
+    expected: type[requests.RequestException],
+) -> None:
+    sleeps: list[float] = []
+    monkeypatch.setattr("regybox.transport.time.sleep", sleeps.append)
+
+    def handler(_request: httpx.Request) -> httpx.Response:
+        raise error
+
+    with pytest.raises(expected):
+        _session(handler).get(URL)
+    assert len(sleeps) == get_retry_policy().total
+
+
+def test_http2_adapter_raises_requests_error_while_reading_body() -> None:
+    class BrokenStream(httpx.SyncByteStream):
+        def __iter__(self) -> Iterator[bytes]:
+            raise httpx.ReadError("connection lost")
+
+    def handler(_request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, stream=BrokenStream())
+
+    res = _session(handler).get(URL, stream=True)
+
+    with pytest.raises(requests.ConnectionError):
+        res.raw.read(10)
+
+
+def test_http2_adapter_sends_request_bodies() -> None:
+    bodies: list[bytes] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        bodies.append(request.read())
+        return httpx.Response(200)
+
+    session = _session(handler)
+
+    assert session.post(URL, data=b"a=b").status_code == 200
+    assert session.post(URL, data=iter([b"a=", b"b"])).status_code == 200
+    assert bodies == [b"a=b", b"a=b"]
+
+
+class _Http1Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self) -> None:
+        self.send_response(200)
+        self.send_header("Content-Length", "5")
+        self.end_headers()
+        self.wfile.write(b"http1")
+
+    @override
+    def log_message(self, format: str, *args: object) -> None:
+        del format, args
+
+
+@pytest.fixture(name="http1_url")
+def fixture_http1_url() -> Iterator[str]:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Http1Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}/aulas.php"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_http2_adapter_sends_requests_over_http1_when_asked(http1_url: str) -> None:
+    def handler(_request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, text="http2")
+
+    session = RegyboxSession(CREDENTIALS)
+    adapter = Http2Adapter(
+        httpx.Client(transport=httpx.MockTransport(handler)), max_retries=get_retry_policy()
+    )
+    session.mount("http://", adapter)
+
+    assert session.get(http1_url, timeout=5).text == "http2"
+    with over_http1():
+        res = session.get(http1_url, timeout=5)
+    assert res.text == "http1"
+    assert session.get(http1_url, timeout=5).text == "http2"
+    adapter.close()
@@ -0,0 +1,209 @@
+"""Tests for the watch module."""
+
+import datetime
+from unittest.mock import MagicMock, patch
+
+import pytest
+import requests
+
+from regybox.common import TIMEZONE
+from regybox.exceptions import (
+    ClassIsOverbookedError,
+    DeadlineExceededError,
+    NoClassesFoundError,
+    ServiceUnavailableError,
+)
+from regybox.watch import (
+    WATCH_HOT_WINDOW_SECONDS,
+    WATCH_MAX_INTERVAL_SECONDS,
+    WATCH_MIN_INTERVAL_SECONDS,
+    WATCH_POLL_DEADLINE,
+    watch_class,
+    watch_interval,
+)
+
+STARTS_AT: float = datetime.datetime(2026, 3, 10, 18, 30, tzinfo=TIMEZONE).timestamp()
+HOUR: float = 60 * 60
+
+
+def _class(
+    *,
+    cur_capacity: int = 20,
+    max_capacity: int = 20,
+    user_is_enrolled: bool = False,
+    user_is_waitlisted: bool = False,
+) -> MagicMock:
+    class_: MagicMock = MagicMock(
+        start="18:30",
+        date="2026-03-10",
+        cur_capacity=cur_capacity,
+        max_capacity=max_capacity,
+        is_open=True,
+        enroll_url="https://www.regybox.pt/app/app_nova/php/aulas/marca_aulas.php?id=1",
+        user_is_enrolled=user_is_enrolled,
+        user_is_waitlisted=user_is_waitlisted,
+    )
+    class_.name = "WOD"
+    return class_
+
+
+def _watch(
+    classes: list[MagicMock | Exception] | Exception,
+    *,
+    budget: int = 10,
+    now: float = STARTS_AT - HOUR,
+) -> bool:
+    clock: list[float] = [now]
+
+    def time() -> float:
+        return clock[0]
+
+    def sleep(seconds: float) -> None:
+        clock[0] += seconds
+
+    with (
+        patch("regybox.watch.time.time", side_effect=time),
+        patch("regybox.watch.time.sleep", side_effect=sleep),
+        patch("regybox.watch.get_class_at", side_effect=classes),
+    ):
+        return watch_class(
+            class_date="2026-03-10", class_time="18:30", class_type="WOD", budget=budget
+        )
+
+
+@pytest.mark.parametrize(
+    ("seconds_to_start", "seconds_to_deadline"),
+    [
+        (WATCH_HOT_WINDOW_SECONDS - 1, -HOUR),
+        (HOUR + 60, 60),
+    ],
+)
+def test_interval_is_shortest_where_cancellations_cluster(
+    seconds_to_start: float, seconds_to_deadline: float
+) -> None:
+    assert (
+        watch_interval(
+            seconds_to_start=seconds_to_start,
+            seconds_to_deadline=seconds_to_deadline,
+            polls_left=1,
+        )
+        == WATCH_MIN_INTERVAL_SECONDS
+    )
+
+
+def test_interval_spreads_half_of_the_budget_until_the_next_window() -> None:
+    seconds_to_deadline: float = 5 * HOUR
+
+    interval: float = watch_interval(
+        seconds_to_start=seconds_to_deadline + HOUR,
+        seconds_to_deadline=seconds_to_deadline,
+        polls_left=40,
+    )
+
+    assert interval == pytest.approx((seconds_to_deadline - WATCH_HOT_WINDOW_SECONDS) / 20)
+
+
+def test_interval_is_bounded_and_stops_at_the_next_window() -> None:
+    far: float = watch_interval(
+        seconds_to_start=7 * 24 * HOUR, seconds_to_deadline=7 * 24 * HOUR - HOUR, polls_left=2
+    )
+    close: float = watch_interval(
+        seconds_to_start=HOUR + WATCH_HOT_WINDOW_SECONDS + 10,
+        seconds_to_deadline=WATCH_HOT_WINDOW_SECONDS + 10,
+        polls_left=100,
+    )
+
+    assert far == WATCH_MAX_INTERVAL_SECONDS
+    assert close == 10
+
+
+def test_watch_enrolls_once_a_spot_frees_up() -> None:
+    full: MagicMock = _class()
+    free: MagicMock = _class(cur_capacity=19)
+
+    assert _watch([full, free])
+
+    full.enroll.assert_not_called()
+    free.enroll.assert_called_once_with(credentials=None)
+
+
+def test_watch_ends_when_moved_from_the_waitlist() -> None:
+    promoted: MagicMock = _class(cur_capacity=19, user_is_enrolled=True)
+
+    assert _watch([promoted])
+
+    promoted.enroll.assert_not_called()
+
+
+def test_watch_leaves_a_free_spot_to_regybox_while_on_the_waitlist() -> None:
+    waitlisted: MagicMock = _class(cur_capacity=19, user_is_enrolled=True, user_is_waitlisted=True)
+    promoted: MagicMock = _class(cur_capacity=20, user_is_enrolled=True)
+
+    assert _watch([waitlisted, promoted])
+
+    waitlisted.enroll.assert_not_called()
+
+
+def test_watch_keeps_going_when_enrolling_only_joins_the_waitlist() -> None:
+    waitlisted: MagicMock = _class(cur_capacity=19)
+
+    def enroll(**_: object) -> str:
+        waitlisted.user_is_waitlisted = True
+        return "Lista de espera"
+
+    waitlisted.enroll.side_effect = enroll
+
+    assert _watch([waitlisted, _class(user_is_enrolled=True)])
+
+
+def test_watch_keeps_going_when_another_member_takes_the_spot(
+    caplog: pytest.LogCaptureFixture,
+) -> None:
+    taken: MagicMock = _class(cur_capacity=19)
+    taken.enroll.side_effect = ClassIsOverbookedError
+    free: MagicMock = _class(cur_capacity=19)
+
+    assert _watch([taken, free])
+
+    assert "Unable to enroll in WOD, watching it on: " in caplog.text
+    free.enroll.assert_called_once_with(credentials=None)
+
+
+@pytest.mark.parametrize(
+    "error",
+    [
+        requests.ConnectionError("reset"),
+        DeadlineExceededError(budget_secs=0.0),
+        ServiceUnavailableError("Regybox", retry_in=30.0),
+    ],
+)
+def test_watch_keeps_going_when_a_poll_fails(
+    error: Exception, caplog: pytest.LogCaptureFixture
+) -> None:
+    free: MagicMock = _class(cur_capacity=19)
+
+    assert _watch([error, free])
+
+    assert "Unable to fetch WOD, watching it on: " in caplog.text
+    free.enroll.assert_called_once_with(credentials=None)
+
+
+def test_watch_polls_within_a_deadline() -> None:
+    with patch("regybox.watch.deadline") as deadline:
+        assert _watch([_class(cur_capacity=19)])
+
+    deadline.assert_any_call(WATCH_POLL_DEADLINE)
+
+
+def test_watch_gives_up_when_the_budget_runs_out(caplog: pytest.LogCaptureFixture) -> None:
+    assert not _watch([_class(), _class()], budget=2)
+
+    assert "Reached the limit of 2 polls" in caplog.text
+
+
+def test_watch_gives_up_when_the_class_starts() -> None:
+    assert not _watch([], now=STARTS_AT - WATCH_MIN_INTERVAL_SECONDS / 2)
+
+
+def test_watch_gives_up_when_the_class_is_gone() -> None:
+    assert not _watch(NoClassesFoundError(class_date="2026-03-10"))